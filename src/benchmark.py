@@ -0,0 +1,263 @@
+"""
+Benchmark harness for the PathFinder.
+
+Generates seeded maps of each kind and size, times a fixed set of random queries on
+them in both movement modes, and records wall time, nodes expanded, peak memory and
+path cost (and, for weighted or budgeted searches, how many paths were proven
+optimal), along with latency percentiles and the largest open list from a
+SearchMetrics; with --profile, the time split of A* as well. Each case is timed over
+several repeats and its median time is reported. Results are written as JSON and can
+be compared against a saved baseline to catch regressions. Runs headless: PyGame is
+never imported.
+
+Example:
+    python benchmark.py --sizes 50 256 --output results.json
+    python benchmark.py --sizes 50 256 --baseline results.json
+    python benchmark.py --generators --maps arena.map level.bin
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from classes.MapGenerator import MapGenerator, GENERATORS
+from classes.MapFile import open_map
+from classes.PathFinder import PathFinder, STRATEGIES
+from classes.SearchMetrics import SearchMetrics
+
+MODES = {'manhattan': False, 'chebyshev': True}  # movement modes by name
+TIME_FLOOR = 0.005  # slowdowns of a case smaller than this many seconds are timing noise
+
+
+def pick_queries(map, count, rng):
+    """
+    Choose random (start, goal) pairs on free cells.
+
+    :param map: The map to pick cells from.
+    :param count: Number of pairs to pick.
+    :param rng: Seeded random number generator.
+    :return: List of (start index, goal index) tuples.
+    """
+    free = [index for index, blocked in enumerate(bytes(map.obstacles)) if not blocked] if map.size <= 1 << 20 else None
+    queries = []
+    while len(queries) < count:
+        if free is not None:
+            queries.append((rng.choice(free), rng.choice(free)))
+            continue
+        # Large maps: sample until two free cells are found instead of listing them all
+        start, goal = rng.randrange(map.size), rng.randrange(map.size)
+        if not map.obstacles[start] and not map.obstacles[goal]:
+            queries.append((start, goal))
+    return queries
+
+
+def run_case(map, queries, allow_diagonal, strategy, landmarks=0, options=None, repeats=5):
+    """
+    Time one set of queries with one pathfinder configuration.
+
+    :param map: The map to search.
+    :param queries: List of (start index, goal index) tuples.
+    :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+    :param strategy: The search algorithm to use.
+    :param landmarks: Number of ALT landmarks for A*, 0 for none.
+    :param options: Other PathFinder keyword arguments (weight, max_expansions, time_limit, profile).
+    :param repeats: Number of times the queries are run, each with a fresh pathfinder;
+                    the median time is reported and the counts come from the first run.
+    :return: Dictionary of measurements.
+    """
+    metrics = SearchMetrics()
+    map.neighbour_table  # build shared tables outside the timed region
+    build_started = time.perf_counter()
+    if landmarks:
+        map.landmarks(allow_diagonal, landmarks)
+    build_time = time.perf_counter() - build_started
+    times = []
+    for repeat in range(repeats):
+        path_finder = PathFinder(map, allow_diagonal, strategy, landmarks=landmarks, **(options or {}))
+        path_finder.observers.append(metrics)
+        expanded = 0
+        cost = 0.0
+        found = 0
+        optimal = 0
+        started = time.perf_counter()
+        for start, goal in queries:
+            cells, path_cost = path_finder.search_indices(start, goal)
+            expanded += path_finder.stats.expanded
+            if len(cells):
+                found += 1
+                cost += path_cost
+                optimal += path_finder.bound <= 1
+        times.append(time.perf_counter() - started)
+        path_finder.observers.remove(metrics)
+        if not repeat:
+            counts = expanded, cost, found, optimal
+    expanded, cost, found, optimal = counts
+    elapsed = statistics.median(times)
+
+    # Peak memory is measured on a separate traced run of the first query, since
+    # tracing slows every allocation down and would distort the timings above
+    tracemalloc.start()
+    path_finder.search_indices(*queries[0])
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {
+        'time': elapsed,
+        'times': times,
+        'time_per_query': elapsed / len(queries),
+        'p50': metrics.percentile(0.5),
+        'p99': metrics.percentile(0.99),
+        'expanded': expanded,
+        'neighbours': metrics.totals['neighbours'],
+        'heap_peak': metrics.heap_peak,
+        'found': found,
+        'optimal': optimal,
+        'cost': round(cost, 6),
+        'peak_memory': peak_memory,
+        'build_time': build_time,
+    }
+    if path_finder.profile:
+        result['time_split'] = {name: metrics.totals[name] for name in ('heuristic_time', 'heap_time', 'neighbour_time')}
+    return result
+
+
+def run(sizes, generators, strategies, query_count, seed, landmarks=0, options=None, files=(), repeats=5):
+    """
+    Run every benchmark case.
+
+    :param sizes: List of map sizes (maps are square).
+    :param generators: List of map kinds.
+    :param strategies: List of search strategies.
+    :param query_count: Number of queries per map.
+    :param seed: Seed for maps and queries.
+    :param landmarks: Number of ALT landmarks for A*, 0 for none.
+    :param options: Other PathFinder keyword arguments (weight, max_expansions, time_limit, profile).
+    :param files: Paths of map files (binary or MovingAI .map) to test as well.
+    :param repeats: Number of timed runs of each case.
+    :return: List of result dictionaries.
+    """
+    def maps():
+        # (map, name, size) of every generated map, then of every map file
+        generator = MapGenerator(seed)
+        for kind in generators:
+            for size in sizes:
+                yield generator.generate(kind, size, size), kind, size
+        for filename in files:
+            map = open_map(filename)
+            yield map, os.path.basename(filename), f"{map.width}x{map.height}"
+
+    results = []
+    for map, kind, size in maps():
+        queries = pick_queries(map, query_count, random.Random(f"{seed}:{kind}:{size}"))
+        for mode, allow_diagonal in MODES.items():
+            for strategy in strategies:
+                result = {'generator': kind, 'size': size, 'mode': mode, 'strategy': strategy, 'queries': query_count}
+                result.update(run_case(map, queries, allow_diagonal, strategy, landmarks, options, repeats))
+                results.append(result)
+                print(f"{kind:>6} {size:>5} {mode:>9} {strategy:>12}  "
+                      f"{result['time_per_query'] * 1000:9.2f} ms/query  "
+                      f"{result['expanded']:>10} expanded  {result['peak_memory'] / 1024:9.1f} KiB peak")
+    return results
+
+
+def compare(results, baseline, tolerance, time_floor=TIME_FLOOR, expansion_tolerance=0.02, deterministic=True):
+    """
+    Compare results against a baseline run.
+
+    A case is slower only if its median time grew by more than the tolerance and by
+    more than time_floor seconds, since small cases are dominated by timing noise.
+
+    :param results: List of result dictionaries from this run.
+    :param baseline: List of result dictionaries from the baseline run.
+    :param tolerance: Allowed relative slowdown before a case counts as a regression.
+    :param time_floor: Slowdown in seconds below which a case never counts as slower.
+    :param expansion_tolerance: Allowed relative increase in nodes expanded.
+    :param deterministic: False if the searches ran under a wall-clock budget, whose
+                          expansions and paths depend on timing and are not compared.
+    :return: List of regression descriptions.
+    """
+    def key(result):
+        return result['generator'], result['size'], result['mode'], result['strategy']
+
+    previous = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        name = "/".join(str(part) for part in key(result))
+        if result['time'] > old['time'] * (1 + tolerance) and result['time'] - old['time'] > time_floor:
+            regressions.append(f"{name}: time {old['time']:.3f}s -> {result['time']:.3f}s")
+        if not deterministic:
+            continue
+        if result['expanded'] > old['expanded'] * (1 + expansion_tolerance):
+            regressions.append(f"{name}: expanded {old['expanded']} -> {result['expanded']}")
+        if result['found'] != old['found'] or result['cost'] > old['cost'] + 1e-6:
+            regressions.append(f"{name}: cost {old['cost']} ({old['found']} found) -> "
+                               f"{result['cost']} ({result['found']} found)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PathFinder on generated maps.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 128, 256, 512],
+                        help="square map sizes to test (up to 4096)")
+    parser.add_argument('--generators', nargs='*', default=list(GENERATORS), choices=GENERATORS)
+    parser.add_argument('--maps', nargs='+', default=[],
+                        help="map files to test as well (binary map files or MovingAI .map files)")
+    parser.add_argument('--strategies', nargs='+', default=['astar'], choices=STRATEGIES)
+    parser.add_argument('--queries', type=int, default=20, help="queries per map")
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs of each case, of which the median is kept")
+    parser.add_argument('--landmarks', type=int, default=0,
+                        help="number of ALT landmarks for A* (build time is reported separately)")
+    parser.add_argument('--weight', type=float, default=1.0,
+                        help="heuristic weight for A* and the starting weight for 'anytime'")
+    parser.add_argument('--max-expansions', type=int, help="expansion budget per query")
+    parser.add_argument('--time-limit', type=float, help="wall-clock budget per query in seconds")
+    parser.add_argument('--profile', action='store_true',
+                        help="time the heuristic, open list and neighbour work of A* (slows the searches down)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against results saved in this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="relative slowdown allowed before reporting a regression")
+    parser.add_argument('--time-floor', type=float, default=TIME_FLOOR,
+                        help="slowdown in seconds below which a case is never reported")
+    parser.add_argument('--expansion-tolerance', type=float, default=0.02,
+                        help="relative increase in nodes expanded allowed before reporting a regression")
+    args = parser.parse_args()
+
+    options = {'weight': args.weight, 'max_expansions': args.max_expansions, 'time_limit': args.time_limit,
+               'profile': args.profile}
+    results = run(args.sizes, args.generators, args.strategies, args.queries, args.seed, args.landmarks, options,
+                  args.maps, args.repeats)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'landmarks': args.landmarks,
+        'repeats': args.repeats,
+        'options': options,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance, args.time_floor,
+                                  args.expansion_tolerance, deterministic=args.time_limit is None)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
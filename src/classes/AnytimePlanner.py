@@ -0,0 +1,200 @@
+from .SearchState import OPEN, CLOSED
+from .SearchStats import SearchStats
+from .OpenList import OpenList
+import time
+
+INFINITY = float('inf')
+
+class AnytimePlanner:
+    """
+    Anytime Repairing A* (ARA*): a weighted A* search that keeps improving its path.
+
+    The first pass inflates the heuristic by the pathfinder's ``weight``, which reaches
+    the goal quickly with a path costing at most ``weight`` times the optimum. Each later
+    pass lowers the weight by ``decrement`` and repairs the previous search instead of
+    starting over: cells whose g-score improved after they were expanded are collected
+    as inconsistent and are the only closed cells expanded again. The last pass runs
+    with a weight of 1 and proves the path optimal.
+
+    The pathfinder's ``max_expansions`` and ``time_limit`` cover all passes together.
+    When the budget runs out, the best path found so far is returned together with the
+    bound proven for it.
+    """
+
+    def __init__(self, path_finder, decrement=0.5):
+        """
+        Initialise the planner for a pathfinder.
+
+        :param path_finder: The PathFinder that owns this planner.
+        :param decrement: How much the weight drops after each pass.
+        """
+        self.path_finder = path_finder
+        self.map = path_finder.map
+        self.decrement = decrement
+        self.stats = SearchStats()  # counters from the most recent query, over all passes
+        self.passes = 0  # number of passes completed by the most recent query
+
+    def plan(self, start_index, goal_index):
+        """
+        Find a path, improving it until it is optimal or the budget runs out.
+        The best path is written to the pathfinder's search state and its bound to
+        ``path_finder.bound``.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if a path was found.
+        """
+        path_finder = self.path_finder
+        state = path_finder.state
+        self.stats = path_finder.stats = SearchStats()
+        self.passes = 0
+        self.goal = goal_index
+        self.goal_y, self.goal_x = divmod(goal_index, self.map.width)
+        self.allow_diagonal = path_finder.allow_diagonal
+        self.min_cost = self.map.min_cost
+        self.landmarks = self.map.landmarks(self.allow_diagonal, path_finder.landmarks).heuristic(goal_index) \
+            if path_finder.landmarks else None
+        max_expansions = path_finder.max_expansions
+        self.deadline = time.perf_counter() + path_finder.time_limit if path_finder.time_limit is not None else None
+        self.checkpoint = path_finder._next_checkpoint(0) if max_expansions is not None or self.deadline is not None else -1
+
+        state.new_search()
+        state.touch(start_index)
+        state.g_scores[start_index] = 0
+        weight = path_finder.weight
+        proven = INFINITY  # weight of the last completed pass, which bounds its path
+        self.inconsistent = set()  # cells improved after being expanded in this pass
+        self.closed = []  # cells expanded in this pass
+        open_list = self._reopen([start_index], weight)
+        best = None  # (cells, cost, bound) of the best path so far
+        while True:
+            exhausted = self._improve_path(open_list, weight)
+            if not exhausted:
+                proven = weight
+                self.passes += 1
+            if state.g(goal_index) < INFINITY:
+                # Every cheaper path runs through an open or inconsistent cell, so the
+                # lowest unweighted f-score among them bounds the optimal cost from below
+                lower = min(open_list.lower_bound(state.g_scores, state.flags),
+                            min((state.g_scores[index] + self._heuristic(index) for index in self.inconsistent),
+                                default=INFINITY))
+                cells = path_finder.path_indices(goal_index)
+                cost = path_finder.path_cost(cells)
+                bound = max(1.0, min(proven, cost / lower)) if lower > 0 else 1.0
+                if best is None or cost < best[1] or (cost == best[1] and bound < best[2]):
+                    best = (cells, cost, bound)
+            elif not exhausted:
+                break  # the goal is unreachable, which no lower weight changes
+            if exhausted or weight == 1 or best[2] <= 1:
+                break
+            weight = max(1.0, weight - self.decrement)
+            # The next pass continues from the open and inconsistent cells of this one
+            flags = state.flags
+            cells = [index for _, _, _, index in open_list.heap if flags[index] == OPEN]
+            cells.extend(self.inconsistent)
+            for index in self.closed:
+                flags[index] = 0
+            self.inconsistent = set()
+            self.closed = []
+            open_list = self._reopen(cells, weight)
+
+        if best is None:
+            state.new_search()
+            path_finder.bound = INFINITY if exhausted else 1.0
+            return False
+        cells, cost, bound = best
+        state.store_path(cells, cost)
+        path_finder.bound = bound
+        return True
+
+    def _heuristic(self, index):
+        """
+        Estimated cost from a cell to the goal.
+
+        :param index: The index of the cell.
+        :return: The landmark estimate if landmarks are enabled, otherwise the Chebyshev
+                 or Manhattan distance scaled by the cheapest cell cost.
+        """
+        if self.landmarks is not None:
+            return self.landmarks[index]
+        y, x = divmod(index, self.map.width)
+        dx, dy = abs(x - self.goal_x), abs(y - self.goal_y)
+        return (max(dx, dy) if self.allow_diagonal else dx + dy) * self.min_cost
+
+    def _reopen(self, cells, weight):
+        """
+        Build the open list for a pass, with priorities for its weight.
+
+        :param cells: Indices of the cells to queue.
+        :param weight: The heuristic weight of the pass.
+        :return: The new OpenList.
+        """
+        state = self.path_finder.state
+        open_list = OpenList()
+        for index in dict.fromkeys(cells):
+            h = self._heuristic(index)
+            state.flags[index] = OPEN
+            open_list.push(state.g_scores[index] + weight * h, h, index)
+            self.stats.pushes += 1
+        return open_list
+
+    def _improve_path(self, open_list, weight):
+        """
+        Expand cells until no open cell can lead to a path cheaper than the goal's
+        current cost under this pass's weight.
+
+        :param open_list: The open list of the pass.
+        :param weight: The heuristic weight of the pass.
+        :return: True if the budget ran out before the pass finished.
+        """
+        state = self.path_finder.state
+        generation = state.generation
+        stamps, g_scores, parents, flags = state.stamps, state.g_scores, state.parents, state.flags
+        table = self.map.neighbour_table
+        masks, moves = table.masks, table.moves[self.allow_diagonal]
+        costs = self.map.costs
+        stats = self.stats
+        goal = self.goal
+        goal_g = state.g(goal)
+        while open_list and open_list.peek_f() < goal_g:
+            current = open_list.pop()
+            if flags[current] == CLOSED:
+                stats.stale += 1
+                continue
+            if stats.expanded == self.checkpoint:
+                max_expansions = self.path_finder.max_expansions
+                if (max_expansions is not None and self.checkpoint >= max_expansions) or \
+                        (self.deadline is not None and time.perf_counter() >= self.deadline):
+                    return True
+                self.checkpoint = self.path_finder._next_checkpoint(self.checkpoint)
+            flags[current] = CLOSED
+            self.closed.append(current)
+            stats.expanded += 1
+            current_g = g_scores[current]
+            for offset, cost in moves[masks[current]]:
+                neighbour = current + offset
+                if stamps[neighbour] != generation:
+                    stamps[neighbour] = generation
+                    g_scores[neighbour] = INFINITY
+                    parents[neighbour] = -1
+                    flags[neighbour] = 0
+                if costs is not None:
+                    cost *= costs[neighbour]
+                tentative_g_score = current_g + cost
+                if tentative_g_score < g_scores[neighbour]:
+                    g_scores[neighbour] = tentative_g_score
+                    parents[neighbour] = current
+                    if neighbour == goal:
+                        goal_g = tentative_g_score
+                    if flags[neighbour] == CLOSED:
+                        # Expanded already in this pass: repair it in the next one
+                        self.inconsistent.add(neighbour)
+                        stats.reopened += 1
+                    else:
+                        if flags[neighbour] == OPEN:
+                            stats.decreased += 1
+                        flags[neighbour] = OPEN
+                        h = self._heuristic(neighbour)
+                        open_list.push(tentative_g_score + weight * h, h, neighbour)
+                        stats.pushes += 1
+        return False
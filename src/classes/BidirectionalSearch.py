@@ -0,0 +1,180 @@
+from .SearchState import SearchState, OPEN, CLOSED
+from .SearchStats import SearchStats
+from .OpenList import OpenList
+import time
+
+INFINITY = float('inf')
+
+class BidirectionalSearch:
+    """
+    Bidirectional A*: one search grows forward from the start while a second grows
+    backward from the goal, and the path is joined where the two frontiers meet.
+
+    The forward search uses the pathfinder's own state and the backward search keeps a
+    second SearchState. Moving backward into a cell costs the cost of the cell being
+    left, which is the cell the forward move would enter, so both halves measure the
+    same path costs.
+
+    Both halves are ordered by the average potential ``(h_goal(n) - h_start(n)) / 2``,
+    added to the g-scores of the forward search and subtracted from those of the
+    backward search, where h_goal and h_start are the Manhattan or Chebyshev distances
+    (scaled by the cheapest cell cost) to the goal and from the start. Unlike running
+    two independent A* searches, this makes both halves search the same reduced costs,
+    so the search can stop as soon as the lowest keys of the two open lists add up to
+    the cheapest meeting found, and the joined path is optimal in either movement mode.
+    Each step expands the side with the smaller open list. Weights and landmarks are
+    not used; the pathfinder's ``max_expansions`` and ``time_limit`` are.
+    """
+
+    def __init__(self, path_finder):
+        """
+        Initialise the search for a pathfinder, sharing its map, state and stats.
+
+        :param path_finder: The PathFinder that owns this search.
+        """
+        self.path_finder = path_finder
+        self.map = path_finder.map
+        self.state = SearchState(self.map.size)  # g-scores and parents of the backward search
+        self.stats = SearchStats()  # counters from the most recent query, both halves together
+        self.meeting = -1  # cell where the halves of the last path were joined
+
+    def search(self, start_index, goal_index):
+        """
+        Run the two searches until the cheapest path is proven, then write it to the
+        pathfinder's state so it can be reconstructed like an A* result.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if the goal was reached.
+        """
+        path_finder = self.path_finder
+        allow_diagonal = path_finder.allow_diagonal
+        map = self.map
+        width = map.width
+        table = map.neighbour_table
+        masks, moves = table.masks, table.moves[allow_diagonal]
+        costs = map.costs
+        half_cost = map.min_cost / 2
+        start_y, start_x = divmod(start_index, width)
+        goal_y, goal_x = divmod(goal_index, width)
+        stats = self.stats = path_finder.stats = SearchStats()
+        if start_index != goal_index and map.obstacles[goal_index]:
+            # Cell masks ignore a cell's own obstacle bit, so the backward search would
+            # leave a blocked goal as if it could be entered
+            path_finder.bound = 1.0
+            path_finder.state.new_search()
+            return False
+
+        forward, backward = path_finder.state, self.state
+        forward_open, backward_open = OpenList(), OpenList()
+        # One tuple per direction: (state, other state, open list, potential sign, reverse)
+        sides = ((forward, backward, forward_open, 1, False), (backward, forward, backward_open, -1, True))
+        for state, _, open_list, sign, _ in sides:
+            state.new_search()
+            index = goal_index if sign < 0 else start_index
+            state.touch(index)
+            state.g_scores[index] = 0
+            state.flags[index] = OPEN
+            potential = sign * self._potential(index, start_index, goal_index)
+            open_list.push(potential, potential, index)
+            stats.pushes += 1
+        best = 0 if start_index == goal_index else INFINITY  # cheapest meeting cost so far
+        meeting = start_index if start_index == goal_index else -1
+
+        max_expansions = path_finder.max_expansions
+        deadline = time.perf_counter() + path_finder.time_limit if path_finder.time_limit is not None else None
+        checkpoint = path_finder._next_checkpoint(0) if max_expansions is not None or deadline is not None else -1
+        exhausted = False
+        checked, peak = 0, 2  # neighbours checked, and most entries in the two open lists together
+        while True:
+            # Every path cheaper than the two lowest keys together has been seen already
+            lower = forward_open.peek_f() + backward_open.peek_f()
+            if best <= lower:
+                break
+            state, other, open_list, sign, reverse = sides[len(forward_open) > len(backward_open)]
+            flags = state.flags
+            current = open_list.pop()
+            if flags[current] == CLOSED:
+                stats.stale += 1
+                continue
+            if stats.expanded == checkpoint:
+                if (max_expansions is not None and checkpoint >= max_expansions) or \
+                        (deadline is not None and time.perf_counter() >= deadline):
+                    exhausted = True
+                    break
+                checkpoint = path_finder._next_checkpoint(checkpoint)
+            flags[current] = CLOSED
+            stats.expanded += 1
+            generation, stamps, g_scores, parents = state.generation, state.stamps, state.g_scores, state.parents
+            other_generation, other_stamps, other_g_scores = other.generation, other.stamps, other.g_scores
+            current_g = g_scores[current]
+            neighbour_moves = moves[masks[current]]
+            checked += len(neighbour_moves)
+            for offset, cost in neighbour_moves:
+                neighbour = current + offset
+                if stamps[neighbour] != generation:
+                    stamps[neighbour] = generation
+                    g_scores[neighbour] = INFINITY
+                    parents[neighbour] = -1
+                    flags[neighbour] = 0
+                if costs is not None:
+                    cost *= costs[current] if reverse else costs[neighbour]
+                tentative_g_score = current_g + cost
+                if tentative_g_score < g_scores[neighbour]:
+                    flag = flags[neighbour]
+                    if flag == OPEN:
+                        stats.decreased += 1
+                    elif flag == CLOSED:
+                        stats.reopened += 1
+                    parents[neighbour] = current
+                    g_scores[neighbour] = tentative_g_score
+                    flags[neighbour] = OPEN
+                    y, x = divmod(neighbour, width)
+                    to_goal_x, to_goal_y = abs(x - goal_x), abs(y - goal_y)
+                    from_start_x, from_start_y = abs(x - start_x), abs(y - start_y)
+                    if allow_diagonal:
+                        h = max(to_goal_x, to_goal_y) - max(from_start_x, from_start_y)
+                    else:
+                        h = to_goal_x + to_goal_y - from_start_x - from_start_y
+                    h *= sign * half_cost
+                    open_list.push(tentative_g_score + h, h, neighbour)
+                    stats.pushes += 1
+                    if other_stamps[neighbour] == other_generation:
+                        # The other direction reached this cell too: the halves can join here
+                        total = tentative_g_score + other_g_scores[neighbour]
+                        if total < best:
+                            best, meeting = total, neighbour
+            if len(forward_open) + len(backward_open) > peak:
+                peak = len(forward_open) + len(backward_open)
+        self.meeting = meeting
+        stats.neighbours, stats.heap_peak = checked, peak
+
+        if best == INFINITY:
+            forward.new_search()
+            path_finder.bound = INFINITY if exhausted else 1.0
+            return False
+        if exhausted:
+            path_finder.bound = max(1.0, best / lower) if lower > 0 else INFINITY
+        cells = path_finder.path_indices(meeting)
+        current = backward.parent(meeting)
+        while current != -1:
+            cells.append(current)
+            current = backward.parent(current)
+        forward.store_path(cells, path_finder.path_cost(cells))
+        return True
+
+    def _potential(self, index, start_index, goal_index):
+        """
+        Half the difference between a cell's estimated cost to the goal and from the start.
+
+        :param index: The index of the cell.
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: The potential of the cell.
+        """
+        heuristic = self.path_finder.heuristic
+        node_at = self.map.node_at
+        allow_diagonal = self.path_finder.allow_diagonal
+        cell = node_at(index)
+        return (heuristic(cell, node_at(goal_index), allow_diagonal) -
+                heuristic(cell, node_at(start_index), allow_diagonal)) / 2
@@ -0,0 +1,155 @@
+from .Path import Path
+from .PathSmoother import line_cells, turning_points
+from array import array
+import struct
+import sys
+
+HEADER = struct.Struct('<ddBI')  # cost, bound, flags, number of waypoints
+DIAGONAL = 1  # flag: exactly diagonal segments are walked in diagonal steps
+
+class CompactPath(Path):
+    """
+    A path stored as the cell indices of its waypoints instead of a list of nodes.
+
+    For a grid path the waypoints are its first cell, the cells where it turns and its
+    last cell; every segment between them is then a straight run and the path is
+    recovered exactly. A smoothed path (see PathSmoother) has waypoints joined by
+    any-angle segments, which expand to the cells each line crosses. A long path takes
+    four bytes per turn rather than a Node object per cell, and ``encode`` turns it into
+    a few dozen bytes for sending elsewhere.
+
+    The cells are only produced when asked for: ``cells()`` yields their indices, and
+    ``nodes`` and ``get_path`` build a fresh list on every access, so code that uses
+    them repeatedly should keep the result.
+    """
+
+    def __init__(self, map, waypoints=(), cost=0, bound=1.0, allow_diagonal=True):
+        """
+        Initialise a CompactPath from its waypoints.
+
+        :param map: The map the path is on.
+        :param waypoints: Iterable of waypoint cell indices from start to goal.
+        :param cost: The total movement cost of the path.
+        :param bound: Guaranteed ratio between the cost and the optimal cost, as for Path.
+        :param allow_diagonal: Whether exactly diagonal segments are walked in diagonal
+                               steps. Otherwise every segment that is not orthogonal is
+                               expanded into orthogonal steps.
+        """
+        self.map = map
+        self.waypoints = array('i', waypoints)  # cell indices of the start, turns and goal
+        self.cost = cost
+        self.bound = bound
+        self.allow_diagonal = allow_diagonal
+
+    @classmethod
+    def from_cells(cls, map, cells, cost=0, bound=1.0, allow_diagonal=True):
+        """
+        Compress a grid path, keeping only the cells where it changes direction.
+
+        :param map: The map the path is on.
+        :param cells: Sequence of adjacent cell indices from start to goal.
+        :param cost: The total movement cost of the path.
+        :param bound: The suboptimality bound of the path.
+        :param allow_diagonal: Whether the path may contain diagonal steps.
+        :return: The CompactPath.
+        """
+        return cls(map, [cells[position] for position in turning_points(cells)], cost, bound, allow_diagonal)
+
+    def cells(self):
+        """
+        Expand the path into the indices of the cells it passes through.
+
+        :return: Iterator of cell indices from start to goal.
+        """
+        waypoints = self.waypoints
+        if not waypoints:
+            return
+        width = self.map.width
+        yield waypoints[0]
+        for a, b in zip(waypoints, waypoints[1:]):
+            (y0, x0), (y1, x1) = divmod(a, width), divmod(b, width)
+            dx, dy = x1 - x0, y1 - y0
+            if not dx or not dy or (self.allow_diagonal and abs(dx) == abs(dy)):
+                # A straight run of grid steps
+                steps = max(abs(dx), abs(dy))
+                offset = ((dx > 0) - (dx < 0)) + ((dy > 0) - (dy < 0)) * width
+                for step in range(1, steps + 1):
+                    yield a + step * offset
+            else:
+                cells = line_cells(x0, y0, x1, y1, corners=False)
+                next(cells)  # the segment's first cell ends the previous segment
+                for x, y in cells:
+                    yield y * width + x
+
+    @property
+    def nodes(self):
+        """
+        The nodes of the path, built from the waypoints on each access.
+        """
+        node_at = self.map.node_at
+        return [node_at(index) for index in self.cells()]
+
+    def add_node(self, node):
+        """
+        Append a waypoint to the path.
+
+        :param node: The node to be added; the segment to it should be a straight run or
+                     have line of sight.
+        """
+        self.waypoints.append(node.index)
+
+    def get_path(self):
+        """
+        Get the list of cell coordinates that make up the path.
+
+        :return: A list of tuples, each representing the (x, y) coordinates of a cell.
+        """
+        width = self.map.width
+        return [divmod(index, width)[::-1] for index in self.cells()]
+
+    def get_waypoints(self):
+        """
+        Get the coordinates of the waypoints.
+
+        :return: A list of (x, y) tuples, from start to goal.
+        """
+        width = self.map.width
+        return [divmod(index, width)[::-1] for index in self.waypoints]
+
+    def expand(self):
+        """
+        Convert to an ordinary Path holding every node.
+
+        :return: The Path.
+        """
+        return Path(self.nodes, self.cost, self.bound)
+
+    def encode(self):
+        """
+        Serialise the path: a small header followed by the waypoint indices as
+        little-endian 32-bit integers.
+
+        :return: The encoded bytes.
+        """
+        waypoints = self.waypoints
+        if sys.byteorder == 'big':
+            waypoints = array('i', waypoints)
+            waypoints.byteswap()
+        flags = DIAGONAL if self.allow_diagonal else 0
+        return HEADER.pack(self.cost, self.bound, flags, len(self.waypoints)) + waypoints.tobytes()
+
+    @classmethod
+    def decode(cls, map, data):
+        """
+        Rebuild a path serialised with encode.
+
+        :param map: The map the path is on.
+        :param data: The encoded bytes.
+        :return: The CompactPath.
+        """
+        cost, bound, flags, count = HEADER.unpack_from(data)
+        waypoints = array('i')
+        waypoints.frombytes(data[HEADER.size:HEADER.size + 4 * count])
+        if sys.byteorder == 'big':
+            waypoints.byteswap()
+        return cls(map, waypoints, cost, bound, bool(flags & DIAGONAL))
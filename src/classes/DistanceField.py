@@ -0,0 +1,185 @@
+from .Path import Path
+from array import array
+import heapq
+
+_numpy = False  # the numpy module once load_numpy has run, or None if it is not installed
+
+INFINITY = float('inf')
+VECTOR_FRONTIER = 128  # frontier size from which a breadth-first level is expanded with NumPy
+
+def load_numpy():
+    """
+    Import NumPy on first use rather than with this module, so that importing the
+    pathfinding core (and starting worker processes) stays fast. NumPy is optional;
+    without it the vectorised passes run in plain Python.
+
+    :return: The numpy module, or None if it is not installed.
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+class DistanceField:
+    """
+    Distances from a set of source cells to every cell of a map, with the parent of each
+    cell on a cheapest route, computed by one flood fill over the whole map.
+
+    With several sources each cell gets the distance to its nearest source, which is
+    what influence maps and "nearest of many" queries need. Once built, the path from a
+    cell's nearest source to it (or, in reverse, from the cell to its nearest source) is
+    read off the parent array in time proportional to its length, without searching.
+
+    Maps with cell costs or diagonal moves are filled with Dijkstra's algorithm. On
+    unit-cost grids (no cost layer, Manhattan movement) the fill is a breadth-first
+    search, level by level; wide levels are expanded with NumPy when it is installed.
+
+    The field describes the map as it was when built; ``version`` records the map
+    version so callers can tell when it is out of date.
+    """
+
+    def __init__(self, map, allow_diagonal, sources, reverse=False):
+        """
+        Compute the field.
+
+        :param map: The map to fill.
+        :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+        :param sources: Iterable of source cell indices.
+        :param reverse: If True, compute the cost of reaching the nearest source from every
+                        cell instead of the cost of reaching every cell from the nearest
+                        source. The two only differ on maps with cell costs.
+        """
+        self.map = map
+        self.allow_diagonal = allow_diagonal
+        self.reverse = reverse
+        self.sources = [index for index in dict.fromkeys(sources) if not map.obstacles[index]]
+        self.version = map.version  # map version the field was computed for
+        self.distances = array('d', [INFINITY]) * map.size  # cost to or from the nearest source
+        self.parents = array('i', [-1]) * map.size  # next cell towards the nearest source, -1 for none
+        for index in self.sources:
+            self.distances[index] = 0
+        if map.costs is None and not allow_diagonal:
+            self._breadth_first()
+        else:
+            self._dijkstra()
+
+    def _dijkstra(self):
+        """
+        Fill the field with Dijkstra's algorithm.
+        """
+        table = self.map.neighbour_table
+        masks, moves = table.masks, table.moves[self.allow_diagonal]
+        costs = self.map.costs
+        reverse = self.reverse
+        distances, parents = self.distances, self.parents
+        queue = [(0, index) for index in self.sources]
+        while queue:
+            distance, current = heapq.heappop(queue)
+            if distance > distances[current]:
+                continue
+            for offset, cost in moves[masks[current]]:
+                neighbour = current + offset
+                if costs is not None:
+                    # A move costs the step times the cost of the cell it enters
+                    cost *= costs[current] if reverse else costs[neighbour]
+                candidate = distance + cost
+                if candidate < distances[neighbour]:
+                    distances[neighbour] = candidate
+                    parents[neighbour] = current
+                    heapq.heappush(queue, (candidate, neighbour))
+
+    def _breadth_first(self):
+        """
+        Fill the field of a unit-cost grid one distance level at a time.
+        """
+        table = self.map.neighbour_table
+        masks, moves = table.masks, table.moves[False]
+        distances, parents = self.distances, self.parents
+        vectorised = None  # whether large levels are expanded with NumPy, decided at the first one
+        frontier = self.sources
+        level = 0
+        while len(frontier):
+            level += 1
+            if vectorised is None and len(frontier) >= VECTOR_FRONTIER:
+                numpy = load_numpy()
+                vectorised = numpy is not None
+                if vectorised:
+                    # Views onto the same buffers, for the levels expanded in bulk
+                    all_masks = numpy.frombuffer(masks, dtype=numpy.uint8)
+                    all_distances = numpy.frombuffer(distances)
+                    all_parents = numpy.frombuffer(parents, dtype=numpy.int32)
+                    offsets = table.offsets[:4]  # the orthogonal directions
+            if vectorised and len(frontier) >= VECTOR_FRONTIER:
+                frontier = numpy.asarray(frontier)
+                reached = []
+                for bit, offset in enumerate(offsets):
+                    cells = frontier[all_masks[frontier] & (1 << bit) != 0]
+                    neighbours = cells + offset
+                    new = all_distances[neighbours] == INFINITY
+                    cells, neighbours = cells[new], neighbours[new]
+                    all_distances[neighbours] = level
+                    all_parents[neighbours] = cells
+                    reached.append(neighbours)
+                frontier = numpy.concatenate(reached)
+                continue
+            if vectorised and not isinstance(frontier, list):
+                frontier = frontier.tolist()
+            reached = []
+            for current in frontier:
+                for offset, _ in moves[masks[current]]:
+                    neighbour = current + offset
+                    if distances[neighbour] == INFINITY:
+                        distances[neighbour] = level
+                        parents[neighbour] = current
+                        reached.append(neighbour)
+            frontier = reached
+
+    def distance(self, x, y):
+        """
+        The distance of a cell in the field.
+
+        :param x: The x-coordinate of the cell.
+        :param y: The y-coordinate of the cell.
+        :return: The cost from the nearest source (or to it, for a reverse field), or
+                 infinity if no source is connected to the cell.
+        """
+        return self.distances[self.map.index(x, y)]
+
+    def path_indices(self, index):
+        """
+        Trace the parents from a cell back to its nearest source.
+
+        :param index: The index of the cell.
+        :return: An array of cell indices from the source to the cell (from the cell to
+                 the source for a reverse field), empty if the cell is not reached.
+        """
+        cells = array('i')
+        if self.distances[index] == INFINITY:
+            return cells
+        parents = self.parents
+        while index != -1:
+            cells.append(index)
+            index = parents[index]
+        if not self.reverse:
+            cells.reverse()
+        return cells
+
+    def path_to(self, point):
+        """
+        Extract the path between a cell and its nearest source without searching.
+
+        :param point: A Node or an (x, y) tuple.
+        :return: Path from the nearest source to the cell (from the cell to the nearest
+                 source for a reverse field), or an empty Path if none exists.
+        """
+        x, y = (point.x, point.y) if hasattr(point, 'x') else point
+        index = self.map.index(x, y)
+        node_at = self.map.node_at
+        cells = self.path_indices(index)
+        if not len(cells):
+            return Path()
+        return Path([node_at(cell) for cell in cells], self.distances[index])
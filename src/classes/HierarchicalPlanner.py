@@ -0,0 +1,403 @@
+from .SearchStats import SearchStats
+import heapq
+
+INFINITY = float('inf')
+
+class HierarchicalPlanner:
+    """
+    Hierarchical pathfinding (HPA*) over a map split into square clusters.
+
+    Wherever two neighbouring clusters share a run of free cells along their border,
+    transition cells are placed on both sides of it. These entrance cells form an
+    abstract graph: crossing a border costs one step into the cell on the far side, and
+    the cost of moving between two entrances of the same cluster is precomputed with a
+    search confined to that cluster. A query connects its start and goal to the entrances of their clusters,
+    searches the small abstract graph, and only then refines each abstract edge into
+    grid cells with another search confined to one cluster.
+
+    ``entrance_spacing`` sets how much optimality is traded for speed: a border run
+    gets a transition every ``entrance_spacing`` cells (and at both of its ends), so
+    1 keeps every border cell and finds near-optimal paths, while larger values give a
+    smaller abstract graph and faster queries at the price of longer paths. Paths only
+    cross borders orthogonally, even in the 8-connected mode.
+
+    The planner listens to the map and, after an obstacle edit, rebuilds only the
+    clusters whose borders or interior the edit touches.
+    """
+
+    def __init__(self, path_finder, cluster_size=16, entrance_spacing=6):
+        """
+        Initialise the planner; the abstraction is built on the first query.
+
+        :param path_finder: The PathFinder that owns this planner.
+        :param cluster_size: Width and height of a cluster in cells.
+        :param entrance_spacing: Distance between transitions along a border run.
+        """
+        self.path_finder = path_finder
+        self.map = path_finder.map
+        self.cluster_size = cluster_size
+        self.entrance_spacing = entrance_spacing
+        self.clusters_x = (self.map.width + cluster_size - 1) // cluster_size  # clusters per row
+        self.clusters_y = (self.map.height + cluster_size - 1) // cluster_size  # clusters per column
+        self.allow_diagonal = None  # movement mode the abstraction was built for
+        self.borders = {}  # (cluster, cluster) -> list of (cell, cell) transitions
+        self.inter = {}  # entrance cell -> {entrance cell across a border: cost}
+        self.intra = {}  # cluster -> {entrance cell: {entrance cell: cost}}
+        self.dirty = set()  # clusters to rebuild before the next query
+        self.valid = False  # whether the abstraction exists and matches the map
+        self.stats = SearchStats()  # counters from the most recent query
+        self.map.add_listener(self._cell_changed)
+
+    def close(self):
+        """
+        Stop listening to the map's changes. The planner must not be used afterwards.
+        """
+        self.map.remove_listener(self._cell_changed)
+
+    def plan(self, start_index, goal_index):
+        """
+        Find a path through the abstract graph and refine it into grid cells.
+        The resulting parent chain is written to the pathfinder's search state.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if a path was found.
+        """
+        self.stats = self.path_finder.stats = SearchStats()
+        if not self.valid or self.allow_diagonal != self.path_finder.allow_diagonal:
+            self.build()
+        elif self.dirty:
+            self._rebuild(self.dirty)
+        self.dirty = set()
+
+        if start_index == goal_index:
+            self.path_finder.state.store_path([start_index], 0)
+            return True
+        if self.map.obstacles[goal_index]:
+            # Searching outwards from the goal below assumes it can be entered
+            self.path_finder.state.new_search()
+            return False
+
+        start_cluster = self.cluster_of(start_index)
+        goal_cluster = self.cluster_of(goal_index)
+        best_cells, best_cost = None, INFINITY
+        if start_cluster == goal_cluster:
+            # The direct route inside the cluster may beat any route through a border
+            distances, parents = self._cluster_search(start_cluster, start_index, {goal_index})
+            if goal_index in distances:
+                best_cells, best_cost = self._trace(parents, goal_index), distances[goal_index]
+
+        start_edges, _ = self._cluster_search(start_cluster, start_index, self._entrances(start_cluster))
+        goal_edges, _ = self._cluster_search(goal_cluster, goal_index, self._entrances(goal_cluster), reverse=True)
+        exits = self._exits(start_index, goal_index) if self.map.obstacles[start_index] else {}
+        route, cost = self._abstract_search(start_index, goal_index, start_edges, goal_edges, exits)
+        if route is not None and cost < best_cost:
+            best_cells, best_cost = self._refine(route), cost
+
+        if best_cells is None:
+            self.path_finder.state.new_search()
+            return False
+        self.path_finder.state.store_path(best_cells, best_cost)
+        return True
+
+    def cluster_of(self, index):
+        """
+        The cluster containing a cell.
+
+        :param index: The index of the cell.
+        :return: The cluster number.
+        """
+        y, x = divmod(index, self.map.width)
+        return (y // self.cluster_size) * self.clusters_x + x // self.cluster_size
+
+    def build(self):
+        """
+        Build the whole abstraction: every border's transitions and every cluster's
+        entrance-to-entrance costs.
+        """
+        self.allow_diagonal = self.path_finder.allow_diagonal
+        self.borders.clear()
+        self.inter.clear()
+        self.intra.clear()
+        self._rebuild(range(self.clusters_x * self.clusters_y))
+        self.valid = True
+
+    def _rebuild(self, clusters):
+        """
+        Recompute the borders around some clusters and the intra-cluster costs of every
+        cluster whose entrances may have changed as a result.
+
+        :param clusters: Iterable of cluster numbers to rebuild.
+        """
+        affected = set()
+        borders = set()
+        for cluster in clusters:
+            cy, cx = divmod(cluster, self.clusters_x)
+            affected.add(cluster)
+            for nx, ny in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+                if 0 <= nx < self.clusters_x and 0 <= ny < self.clusters_y:
+                    neighbour = ny * self.clusters_x + nx
+                    borders.add((min(cluster, neighbour), max(cluster, neighbour)))
+                    affected.add(neighbour)
+        for border in borders:
+            self._build_border(*border)
+        for cluster in affected:
+            entrances = self._entrances(cluster)
+            self.intra[cluster] = {
+                entrance: self._cluster_search(cluster, entrance, entrances - {entrance})[0]
+                for entrance in entrances
+            }
+
+    def _build_border(self, first, second):
+        """
+        Place transitions along the border between two neighbouring clusters.
+
+        :param first: The lower cluster number.
+        :param second: The higher cluster number (to the right of or below first).
+        """
+        for a, b in self.borders.pop((first, second), ()):
+            self.inter[a].pop(b, None)
+            self.inter[b].pop(a, None)
+        width = self.map.width
+        obstacles = self.map.obstacles
+        x0, y0, x1, y1 = self._bounds(first)
+        if first // self.clusters_x == second // self.clusters_x:
+            # Vertical border: pair column x1 - 1 with column x1
+            pairs = [(y * width + x1 - 1, y * width + x1) for y in range(y0, y1)]
+        else:
+            # Horizontal border: pair row y1 - 1 with row y1
+            pairs = [((y1 - 1) * width + x, y1 * width + x) for x in range(x0, x1)]
+        transitions = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and not obstacles[a] and not obstacles[b]:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) <= self.entrance_spacing:
+                    transitions.append(run[len(run) // 2])
+                else:
+                    chosen = run[::self.entrance_spacing]
+                    if chosen[-1] != run[-1]:
+                        chosen.append(run[-1])
+                    transitions.extend(chosen)
+                run = []
+        self.borders[(first, second)] = transitions
+        costs = self.map.costs
+        for a, b in transitions:
+            self.inter.setdefault(a, {})[b] = costs[b] if costs is not None else 1
+            self.inter.setdefault(b, {})[a] = costs[a] if costs is not None else 1
+
+    def _bounds(self, cluster):
+        """
+        The cell bounds of a cluster.
+
+        :param cluster: The cluster number.
+        :return: Tuple of (x0, y0, x1, y1), with x1 and y1 exclusive.
+        """
+        cy, cx = divmod(cluster, self.clusters_x)
+        size = self.cluster_size
+        return (cx * size, cy * size,
+                min((cx + 1) * size, self.map.width), min((cy + 1) * size, self.map.height))
+
+    def _entrances(self, cluster):
+        """
+        The entrance cells lying inside a cluster.
+
+        :param cluster: The cluster number.
+        :return: A set of cell indices.
+        """
+        cy, cx = divmod(cluster, self.clusters_x)
+        entrances = set()
+        for nx, ny in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+            if 0 <= nx < self.clusters_x and 0 <= ny < self.clusters_y:
+                neighbour = ny * self.clusters_x + nx
+                first, second = min(cluster, neighbour), max(cluster, neighbour)
+                for a, b in self.borders.get((first, second), ()):
+                    entrances.add(a if cluster == first else b)
+        return entrances
+
+    def _cluster_search(self, cluster, source, targets, reverse=False):
+        """
+        Dijkstra search from a cell that never leaves its cluster.
+
+        :param cluster: The cluster number.
+        :param source: The index of the cell to search from.
+        :param targets: Set of cell indices; the search stops once all are settled.
+        :param reverse: If True, find the cost of reaching the source from each target
+                        instead, which differs when cells have costs.
+        :return: Tuple of ({target: cost} for the reachable targets, {cell: parent cell}).
+        """
+        width = self.map.width
+        x0, y0, x1, y1 = self._bounds(cluster)
+        table = self.map.neighbour_table
+        masks, moves = table.masks, table.moves[self.allow_diagonal]
+        costs = self.map.costs
+        remaining = set(targets)
+        distances = {source: 0}
+        parents = {source: -1}
+        found = {}
+        closed = set()
+        queue = [(0, source)]
+        while queue and remaining:
+            distance, current = heapq.heappop(queue)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.stats.expanded += 1
+            if current in remaining:
+                remaining.discard(current)
+                found[current] = distance
+            for offset, cost in moves[masks[current]]:
+                neighbour = current + offset
+                y, x = divmod(neighbour, width)
+                if not (x0 <= x < x1 and y0 <= y < y1):
+                    continue
+                if costs is not None:
+                    # A move costs the step times the cost of the cell it enters
+                    cost *= costs[current] if reverse else costs[neighbour]
+                candidate = distance + cost
+                if candidate < distances.get(neighbour, INFINITY):
+                    distances[neighbour] = candidate
+                    parents[neighbour] = current
+                    heapq.heappush(queue, (candidate, neighbour))
+        if source in remaining:
+            found[source] = 0
+        return found, parents
+
+    def _exits(self, start, goal):
+        """
+        Connect a blocked start to the clusters around it. A blocked cell is never a
+        transition, but like A*, a search may still step out of its start cell, so each
+        cell it can step to in another cluster is joined to that cluster's entrances.
+
+        :param start: The index of the start cell.
+        :param goal: The index of the goal cell.
+        :return: {cell: (cost of the step from the start, {entrance or goal: cost})}.
+        """
+        table = self.map.neighbour_table
+        costs = self.map.costs
+        cluster = self.cluster_of(start)
+        exits = {}
+        for offset, cost in table.moves[self.allow_diagonal][table.masks[start]]:
+            neighbour = start + offset
+            other = self.cluster_of(neighbour)
+            if other == cluster:
+                continue
+            targets = self._entrances(other)
+            if self.cluster_of(goal) == other:
+                targets.add(goal)
+            step = cost * costs[neighbour] if costs is not None else cost
+            exits[neighbour] = (step, self._cluster_search(other, neighbour, targets)[0])
+        return exits
+
+    def _abstract_search(self, start, goal, start_edges, goal_edges, exits=None):
+        """
+        A* over the abstract graph of entrances, with the start and goal attached.
+
+        :param start: The index of the start cell.
+        :param goal: The index of the goal cell.
+        :param start_edges: {entrance: cost} from the start inside its cluster.
+        :param goal_edges: {entrance: cost} to the goal inside its cluster.
+        :param exits: Cells a blocked start steps to in other clusters, as returned by _exits.
+        :return: Tuple of (list of abstract cells from start to goal, cost), or (None, infinity).
+        """
+        width = self.map.width
+        goal_y, goal_x = divmod(goal, width)
+        allow_diagonal = self.allow_diagonal
+        min_cost = self.map.min_cost
+
+        def heuristic(index):
+            y, x = divmod(index, width)
+            dx, dy = abs(x - goal_x), abs(y - goal_y)
+            return (max(dx, dy) if allow_diagonal else dx + dy) * min_cost
+
+        exits = exits or {}
+        distances = {start: 0}
+        parents = {start: None}
+        closed = set()
+        counter = 0
+        queue = [(heuristic(start), 0, start)]
+        while queue:
+            _, _, current = heapq.heappop(queue)
+            if current in closed:
+                continue
+            if current == goal:
+                route = []
+                while current is not None:
+                    route.append(current)
+                    current = parents[current]
+                route.reverse()
+                return route, distances[goal]
+            closed.add(current)
+            self.stats.expanded += 1
+            if current == start:
+                edges = list(start_edges.items())
+                edges.extend(self.inter.get(current, {}).items())
+                edges.extend((cell, step) for cell, (step, _) in exits.items())
+            elif current in exits:
+                edges = list(exits[current][1].items())
+                edges.extend(self.inter.get(current, {}).items())
+            else:
+                edges = list(self.intra[self.cluster_of(current)].get(current, {}).items())
+                edges.extend(self.inter.get(current, {}).items())
+                if current in goal_edges:
+                    edges.append((goal, goal_edges[current]))
+            for neighbour, cost in edges:
+                candidate = distances[current] + cost
+                if candidate < distances.get(neighbour, INFINITY):
+                    distances[neighbour] = candidate
+                    parents[neighbour] = current
+                    counter += 1
+                    heapq.heappush(queue, (candidate + heuristic(neighbour), counter, neighbour))
+                    self.stats.pushes += 1
+        return None, INFINITY
+
+    def _refine(self, route):
+        """
+        Turn a route of abstract cells into the full list of grid cells.
+
+        :param route: List of abstract cells from start to goal.
+        :return: List of cell indices from start to goal.
+        """
+        cells = [route[0]]
+        for a, b in zip(route, route[1:]):
+            cluster = self.cluster_of(a)
+            if self.cluster_of(b) != cluster:
+                cells.append(b)  # a single step across a border
+                continue
+            _, parents = self._cluster_search(cluster, a, {b})
+            cells.extend(self._trace(parents, b)[1:])
+        return cells
+
+    def _trace(self, parents, cell):
+        """
+        Follow a parent dictionary back to the search source.
+
+        :param parents: {cell: parent cell} from a cluster search.
+        :param cell: The cell to trace back from.
+        :return: List of cell indices from the source to the cell.
+        """
+        cells = []
+        while cell != -1:
+            cells.append(cell)
+            cell = parents[cell]
+        cells.reverse()
+        return cells
+
+    def _cell_changed(self, index, blocked):
+        """
+        Map listener: mark the clusters affected by an obstacle or cost edit for rebuilding.
+
+        :param index: The index of the changed cell, or None for a bulk change.
+        :param blocked: Whether the cell is now blocked.
+        """
+        if index is None:
+            self.valid = False
+            return
+        width, height = self.map.width, self.map.height
+        y, x = divmod(index, width)
+        # Moves next to the cell change too, and they may belong to a neighbouring cluster
+        for ny in range(max(y - 1, 0), min(y + 2, height)):
+            for nx in range(max(x - 1, 0), min(x + 2, width)):
+                self.dirty.add(self.cluster_of(ny * width + nx))
@@ -0,0 +1,261 @@
+from .SearchStats import SearchStats
+from .NeighbourTable import DIRECTIONS, DIAGONAL_COST
+import heapq
+
+INFINITY = float('inf')
+
+class IncrementalPlanner:
+    """
+    Lifelong Planning A* (LPA*) search that keeps its search tree between calls.
+
+    Every cell has a g-score (the cost found so far) and an rhs-score (a one-step
+    lookahead from its predecessors). Cells where the two disagree are queued and fixed
+    in priority order, exactly like the open list of A*. When obstacles change, only the
+    cells next to the edit have their rhs-score recomputed, and the repair then spreads
+    only as far as costs actually change. A replan after a small edit therefore touches
+    a fraction of the cells a fresh A* search would.
+
+    The planner listens to the map, so edits made through ``Map.set_obstacle``,
+    ``Map.clear_obstacle``, ``Map.set_cost`` or the visualiser are picked up on the next
+    ``plan`` call. Changing the start, goal or movement mode, a bulk change to the map,
+    or a cost edit that changes the map's cheapest cell cost, starts a new tree.
+    """
+
+    def __init__(self, path_finder):
+        """
+        Initialise the planner for a pathfinder and subscribe it to map changes.
+
+        :param path_finder: The PathFinder that owns this planner.
+        """
+        self.path_finder = path_finder
+        self.map = path_finder.map
+        self.start = None  # index of the start cell of the current tree
+        self.goal = None  # index of the goal cell of the current tree
+        self.allow_diagonal = None  # movement mode of the current tree
+        self.min_cost = None  # heuristic scale of the current tree
+        self.g = {}  # cell index -> g-score, missing means infinity
+        self.rhs = {}  # cell index -> rhs-score, missing means infinity
+        self.queue = []  # (key, secondary key, counter, cell index) entries
+        self.keys = {}  # cell index -> key of its live queue entry
+        self.counter = 0  # insertion counter for deterministic tie-breaking
+        self.changed = set()  # cells edited since the last plan
+        self.valid = False  # whether the current tree can be repaired
+        self.map.add_listener(self._cell_changed)
+
+    def close(self):
+        """
+        Stop listening to the map's changes. The planner must not be used afterwards.
+        """
+        self.map.remove_listener(self._cell_changed)
+
+    def plan(self, start_index, goal_index):
+        """
+        Find the shortest path, repairing the previous search tree where possible.
+        The resulting parent chain is written to the pathfinder's search state.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if the goal is reachable.
+        """
+        self.stats = self.path_finder.stats = SearchStats()
+        if not self.valid or (start_index, goal_index, self.path_finder.allow_diagonal, self.map.min_cost) != \
+                (self.start, self.goal, self.allow_diagonal, self.min_cost):
+            self._initialise(start_index, goal_index)
+        elif self.changed:
+            width, height = self.map.width, self.map.height
+            affected = set()
+            for index in self.changed:
+                # An edit changes the moves of its neighbours, which lead up to two cells away
+                y, x = divmod(index, width)
+                for ny in range(max(y - 2, 0), min(y + 3, height)):
+                    for nx in range(max(x - 2, 0), min(x + 3, width)):
+                        affected.add(ny * width + nx)
+            for index in affected:
+                self._update_vertex(index)
+        self.changed.clear()
+        self._compute_shortest_path()
+        return self._write_parents()
+
+    def _initialise(self, start_index, goal_index):
+        """
+        Discard the search tree and start a new one.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        """
+        self.start, self.goal = start_index, goal_index
+        self.allow_diagonal = self.path_finder.allow_diagonal
+        self.min_cost = self.map.min_cost
+        self.goal_y, self.goal_x = divmod(goal_index, self.map.width)
+        self.g.clear()
+        self.rhs.clear()
+        self.queue.clear()
+        self.keys.clear()
+        self.rhs[start_index] = 0
+        self._push(start_index)
+        self.valid = True
+
+    def _heuristic(self, index):
+        """
+        Estimated cost from a cell to the goal.
+
+        :param index: The index of the cell.
+        :return: Chebyshev or Manhattan distance, depending on the movement mode, scaled
+                 by the cheapest cell cost.
+        """
+        y, x = divmod(index, self.map.width)
+        dx, dy = abs(x - self.goal_x), abs(y - self.goal_y)
+        return (max(dx, dy) if self.allow_diagonal else dx + dy) * self.min_cost
+
+    def _key(self, index):
+        """
+        The queue priority of a cell.
+
+        :param index: The index of the cell.
+        :return: Tuple of (min(g, rhs) + h, min(g, rhs)).
+        """
+        best = min(self.g.get(index, INFINITY), self.rhs.get(index, INFINITY))
+        return best + self._heuristic(index), best
+
+    def _push(self, index):
+        """
+        Queue a cell with its current key, superseding any older entry.
+
+        :param index: The index of the cell.
+        """
+        key = self._key(index)
+        self.keys[index] = key
+        self.counter += 1
+        heapq.heappush(self.queue, (key[0], key[1], self.counter, index))
+        self.stats.pushes += 1
+
+    def _top_key(self):
+        """
+        Drop outdated entries from the head of the queue and return the smallest key.
+
+        :return: The smallest live key, or (infinity, infinity) if the queue is empty.
+        """
+        queue = self.queue
+        while queue:
+            first, second, _, index = queue[0]
+            if self.keys.get(index) == (first, second):
+                return first, second
+            heapq.heappop(queue)
+            self.stats.stale += 1
+        return INFINITY, INFINITY
+
+    def _predecessors(self, index):
+        """
+        Cells that can move directly into a cell, with the cost of that move.
+
+        :param index: The index of the cell.
+        :return: Iterator of (predecessor index, step cost) tuples.
+        """
+        table = self.map.neighbour_table
+        masks, offsets, size = table.masks, table.offsets, self.map.size
+        scale = self.map.costs[index] if self.map.costs is not None else 1  # cost of entering the cell
+        for bit in range(8 if self.allow_diagonal else 4):
+            predecessor = index - offsets[bit]
+            # The mask bounds check also rejects offsets that wrap around a row end
+            if 0 <= predecessor < size and masks[predecessor] & (1 << bit):
+                dx, dy = DIRECTIONS[bit]
+                yield predecessor, (DIAGONAL_COST if dx and dy else 1) * scale
+
+    def _successors(self, index):
+        """
+        Cells reachable in one move from a cell.
+
+        :param index: The index of the cell.
+        :return: Iterator of successor indices.
+        """
+        table = self.map.neighbour_table
+        for offset, _ in table.moves[self.allow_diagonal][table.masks[index]]:
+            yield index + offset
+
+    def _update_vertex(self, index):
+        """
+        Recompute a cell's rhs-score and queue it if it is inconsistent.
+
+        :param index: The index of the cell.
+        """
+        g = self.g
+        if index != self.start:
+            best = INFINITY
+            for predecessor, cost in self._predecessors(index):
+                candidate = g.get(predecessor, INFINITY) + cost
+                if candidate < best:
+                    best = candidate
+            if best == INFINITY:
+                self.rhs.pop(index, None)
+            else:
+                self.rhs[index] = best
+        if g.get(index, INFINITY) != self.rhs.get(index, INFINITY):
+            self._push(index)
+        else:
+            self.keys.pop(index, None)
+
+    def _compute_shortest_path(self):
+        """
+        Process inconsistent cells until the goal's cost is settled.
+        """
+        g, rhs, goal = self.g, self.rhs, self.goal
+        while True:
+            top = self._top_key()
+            if top == (INFINITY, INFINITY):
+                break
+            goal_rhs = rhs.get(goal, INFINITY)
+            if not top < self._key(goal) and goal_rhs == g.get(goal, INFINITY):
+                break
+            index = heapq.heappop(self.queue)[3]
+            del self.keys[index]
+            self.stats.expanded += 1
+            if g.get(index, INFINITY) > rhs.get(index, INFINITY):
+                g[index] = rhs[index]  # overconsistent: the cell got cheaper
+            else:
+                g.pop(index, None)  # underconsistent: the cell got dearer, re-derive it
+                self._update_vertex(index)
+            for successor in self._successors(index):
+                self._update_vertex(successor)
+
+    def _write_parents(self):
+        """
+        Follow the cheapest predecessors back from the goal and store them as parents in
+        the pathfinder's search state, so the usual path reconstruction applies.
+
+        :return: True if the goal is reachable.
+        """
+        g = self.g
+        state = self.path_finder.state
+        state.new_search()
+        goal_cost = g.get(self.goal, INFINITY)
+        if goal_cost == INFINITY:
+            return False
+        state.touch(self.goal)
+        state.g_scores[self.goal] = goal_cost
+        current = self.goal
+        for _ in range(self.map.size):
+            if current == self.start:
+                return True
+            parent, best = -1, INFINITY
+            for predecessor, cost in self._predecessors(current):
+                candidate = g.get(predecessor, INFINITY) + cost
+                if candidate < best:
+                    parent, best = predecessor, candidate
+            if parent == -1:
+                return False
+            state.touch(parent)
+            state.parents[current] = parent
+            current = parent
+        return False
+
+    def _cell_changed(self, index, blocked):
+        """
+        Map listener: remember edited cells (obstacle or cost changes) for the next plan.
+
+        :param index: The index of the changed cell, or None for a bulk change.
+        :param blocked: Whether the cell is now blocked.
+        """
+        if index is None:
+            self.valid = False
+        else:
+            self.changed.add(index)
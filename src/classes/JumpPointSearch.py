@@ -0,0 +1,218 @@
+from .SearchState import OPEN, CLOSED
+from .SearchStats import SearchStats
+from .OpenList import OpenList
+from .NeighbourTable import DIRECTIONS, DIAGONAL_COST
+
+class JumpPointSearch:
+    """
+    Jump Point Search over a uniform-cost grid, used by a PathFinder as an alternative
+    to plain A*.
+
+    Instead of queueing every neighbour, the search jumps in a straight line (or along a
+    diagonal) until it reaches a cell with a forced neighbour, i.e. a cell that can only
+    be reached optimally by turning there. Only those jump points enter the open list,
+    which removes the symmetric paths A* expands on open grids. Both the 8-connected
+    mode, with the same no-corner-cutting rule as ``PathFinder.get_neighbours``, and the
+    4-connected mode are supported, and the resulting paths cost the same as A*.
+    """
+
+    def __init__(self, path_finder):
+        """
+        Initialise the search for a pathfinder, sharing its map, state and stats.
+
+        :param path_finder: The PathFinder that owns this search.
+        """
+        self.path_finder = path_finder
+        self.map = path_finder.map
+
+    def search(self, start_index, goal_index):
+        """
+        Run Jump Point Search between two cells.
+
+        Parent indices in the pathfinder's state point at the previous jump point, so
+        consecutive path cells may be several steps apart along a straight line.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if the goal was reached.
+        """
+        path_finder = self.path_finder
+        allow_diagonal = path_finder.allow_diagonal
+        state = path_finder.state
+        state.new_search()
+        generation = state.generation
+        stamps = state.stamps
+        g_scores = state.g_scores
+        parents = state.parents
+        flags = state.flags
+        map = self.map
+        width, height = map.width, map.height
+        obstacles = map.obstacles
+        goal_y, goal_x = divmod(goal_index, width)
+        stats = path_finder.stats = SearchStats()
+
+        rows = obstacles
+        columns = map.neighbour_table.columns
+
+        def free(x, y):
+            return 0 <= x < width and 0 <= y < height and not obstacles[y * width + x]
+
+        def scan(lines, length, count, line, position, step, goal_line, goal_position):
+            # Scan one row (or column) for the next jump point using bytes.find, so the
+            # cells in between are never visited one by one in Python.
+            # Returns (jump point position or None, position of the blocking wall).
+            base = line * length
+            if step > 0:
+                wall = lines.find(b'\x01', base + position + 1, base + length)
+                stop = wall - base if wall != -1 else length
+                best = stop
+                for side in (line - 1, line + 1):
+                    if 0 <= side < count:
+                        side_base = side * length
+                        # Free cell whose predecessor is blocked: reachable only by turning here
+                        found = lines.find(b'\x01\x00', side_base + position, side_base + stop)
+                        if found != -1 and found + 1 - side_base < best:
+                            best = found + 1 - side_base
+                if goal_line == line and position < goal_position < best:
+                    best = goal_position
+                return (best if best < stop else None), stop
+            wall = lines.rfind(b'\x01', base, base + position)
+            stop = wall - base if wall != -1 else -1
+            best = stop
+            for side in (line - 1, line + 1):
+                if 0 <= side < count:
+                    side_base = side * length
+                    found = lines.rfind(b'\x00\x01', side_base + stop + 1, side_base + position + 1)
+                    if found != -1 and found - side_base > best:
+                        best = found - side_base
+            if goal_line == line and best < goal_position < position:
+                best = goal_position
+            return (best if best > stop else None), stop
+
+        def jump_straight(x, y, dx, dy):
+            # Jump along a row or column to the next jump point, or None at a wall
+            if dx:
+                found, _ = scan(rows, width, height, y, x, dx, goal_y, goal_x)
+                return None if found is None else (found, y)
+            found, stop = scan(columns, height, width, x, y, dy, goal_x, goal_y)
+            if not allow_diagonal:
+                # Without diagonals, turns off a column are found by scanning each row
+                for row in range(y + dy, stop if found is None else found, dy):
+                    if scan(rows, width, height, row, x, 1, goal_y, goal_x)[0] is not None or \
+                            scan(rows, width, height, row, x, -1, goal_y, goal_x)[0] is not None:
+                        return x, row
+            return None if found is None else (x, found)
+
+        def jump_diagonal(x, y, dx, dy):
+            # Step diagonally until a cell from which a straight jump finds something
+            while True:
+                if not (free(x + dx, y) and free(x, y + dy)):
+                    return None  # the move would cut a blocked corner
+                x += dx
+                y += dy
+                if not free(x, y):
+                    return None
+                if x == goal_x and y == goal_y:
+                    return x, y
+                if jump_straight(x, y, dx, 0) or jump_straight(x, y, 0, dy):
+                    return x, y
+
+        def successor_directions(x, y, parent):
+            # Directions worth jumping in, pruned by the direction we arrived from
+            if parent == -1:
+                return DIRECTIONS if allow_diagonal else DIRECTIONS[:4]
+            parent_y, parent_x = divmod(parent, width)
+            dx = (x > parent_x) - (x < parent_x)
+            dy = (y > parent_y) - (y < parent_y)
+            directions = []
+            if dx and dy:
+                vertical = free(x, y + dy)
+                horizontal = free(x + dx, y)
+                if vertical:
+                    directions.append((0, dy))
+                if horizontal:
+                    directions.append((dx, 0))
+                if vertical and horizontal:
+                    directions.append((dx, dy))
+            elif not allow_diagonal:
+                if dx:
+                    directions.extend(((0, -1), (0, 1), (dx, 0)))
+                else:
+                    directions.extend(((-1, 0), (1, 0), (0, dy)))
+            elif dx:
+                ahead = free(x + dx, y)
+                below, above = free(x, y + 1), free(x, y - 1)
+                if ahead:
+                    directions.append((dx, 0))
+                    if below:
+                        directions.append((dx, 1))
+                    if above:
+                        directions.append((dx, -1))
+                if below:
+                    directions.append((0, 1))
+                if above:
+                    directions.append((0, -1))
+            else:
+                ahead = free(x, y + dy)
+                right, left = free(x + 1, y), free(x - 1, y)
+                if ahead:
+                    directions.append((0, dy))
+                    if right:
+                        directions.append((1, dy))
+                    if left:
+                        directions.append((-1, dy))
+                if right:
+                    directions.append((1, 0))
+                if left:
+                    directions.append((-1, 0))
+            return directions
+
+        open_list = OpenList()
+        push, pop = open_list.push, open_list.pop
+        state.touch(start_index)
+        g_scores[start_index] = 0
+        flags[start_index] = OPEN
+        push(0, 0, start_index)
+        stats.pushes += 1
+
+        while open_list:
+            current = pop()
+            if flags[current] == CLOSED:
+                stats.stale += 1
+                continue
+            if current == goal_index:
+                return True
+            flags[current] = CLOSED
+            stats.expanded += 1
+            current_g = g_scores[current]
+            y, x = divmod(current, width)
+            for dx, dy in successor_directions(x, y, parents[current]):
+                if dx and dy:
+                    point = jump_diagonal(x, y, dx, dy)
+                else:
+                    point = jump_straight(x, y, dx, dy)
+                if point is None:
+                    continue
+                jump_x, jump_y = point
+                neighbour = jump_y * width + jump_x
+                if stamps[neighbour] != generation:
+                    stamps[neighbour] = generation
+                    g_scores[neighbour] = float('inf')
+                    parents[neighbour] = -1
+                    flags[neighbour] = 0
+                steps = max(abs(jump_x - x), abs(jump_y - y))
+                tentative_g_score = current_g + (steps * DIAGONAL_COST if dx and dy else steps)
+                if tentative_g_score < g_scores[neighbour]:
+                    flag = flags[neighbour]
+                    if flag == OPEN:
+                        stats.decreased += 1
+                    elif flag == CLOSED:
+                        stats.reopened += 1
+                    parents[neighbour] = current
+                    g_scores[neighbour] = tentative_g_score
+                    flags[neighbour] = OPEN
+                    distance_x, distance_y = abs(jump_x - goal_x), abs(jump_y - goal_y)
+                    h = max(distance_x, distance_y) if allow_diagonal else distance_x + distance_y
+                    push(tentative_g_score + h, h, neighbour)
+                    stats.pushes += 1
+        return False
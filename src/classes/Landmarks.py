@@ -0,0 +1,191 @@
+from .DistanceField import DistanceField, load_numpy
+from array import array
+
+INFINITY = float('inf')
+
+class _GoalHeuristic(dict):
+    """
+    Landmark heuristic towards one goal, computed on first lookup of each cell.
+    """
+
+    def __init__(self, landmarks, goal):
+        """
+        Initialise the heuristic for a goal.
+
+        :param landmarks: The Landmarks object.
+        :param goal: The index of the goal cell.
+        """
+        super().__init__()
+        map = landmarks.map
+        self.width = map.width
+        self.goal_y, self.goal_x = divmod(goal, map.width)
+        self.allow_diagonal = landmarks.allow_diagonal
+        self.min_cost = map.min_cost
+        self.terms = [(forward, forward[goal], backward, backward[goal])
+                      for forward, backward in zip(landmarks.forward, landmarks.backward)]
+
+    def __missing__(self, index):
+        y, x = divmod(index, self.width)
+        dx, dy = abs(x - self.goal_x), abs(y - self.goal_y)
+        best = (max(dx, dy) if self.allow_diagonal else dx + dy) * self.min_cost
+        for forward, to_goal, backward, from_goal in self.terms:
+            # Triangle inequality in both directions; NaN (both unreachable) never wins
+            estimate = max(to_goal - forward[index], backward[index] - from_goal)
+            if estimate > best:
+                best = estimate
+        self[index] = best
+        return best
+
+class Landmarks:
+    """
+    Precomputed distances for the ALT (A*, landmarks, triangle inequality) heuristic.
+
+    A few landmark cells are picked far apart from each other, and the exact cost from
+    each landmark to every cell (and back, when cell costs make the two differ) is
+    computed once with a DistanceField. For any cell n and goal g, the triangle
+    inequality gives ``d(L, g) - d(L, n) <= d(n, g)``, so the largest such difference
+    over all landmarks is an admissible and consistent heuristic. Unlike the Manhattan
+    or Chebyshev distance it accounts for walls and terrain costs, so searches expand far
+    fewer cells. Cells that cannot reach the goal at all get an infinite estimate.
+
+    The tables stay valid only while the map is unchanged, so maps drop their landmarks
+    on every edit and they are rebuilt on the next query that asks for them. They suit
+    maps that are queried many times between changes.
+
+    When NumPy is installed, landmark selection and the per-goal heuristic use
+    vectorised passes over the tables; otherwise the heuristic is computed lazily for
+    the cells a search actually reaches.
+    """
+
+    def __init__(self, map, allow_diagonal, count=8):
+        """
+        Select the landmarks and compute their distance tables.
+
+        :param map: The map the landmarks are placed on.
+        :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+        :param count: Number of landmarks.
+        """
+        self.map = map
+        self.allow_diagonal = allow_diagonal
+        self.count = count
+        self.cells = []  # indices of the landmark cells
+        self.forward = []  # per landmark, array('d') of costs from the landmark to every cell
+        self.backward = []  # per landmark, costs from every cell to the landmark
+        self._last = (None, None)  # (goal, heuristic) of the most recent query
+        self.build()
+
+    def build(self):
+        """
+        Pick landmarks by farthest-point selection and compute their tables.
+
+        Starting from a cell of the largest connected region, each new landmark is the
+        cell farthest from all landmarks chosen so far, which spreads them around the
+        edges of the map where they give the most informative estimates.
+        """
+        map = self.map
+        seed = self._seed()
+        if seed is None or not self.count:
+            return
+        numpy = load_numpy()
+        nearest = DistanceField(map, self.allow_diagonal, [seed]).distances
+        for _ in range(self.count):
+            cell = self._farthest(nearest)
+            if cell is None:
+                break
+            forward = DistanceField(map, self.allow_diagonal, [cell]).distances
+            backward = forward if map.costs is None else DistanceField(map, self.allow_diagonal, [cell], reverse=True).distances
+            self.cells.append(cell)
+            self.forward.append(forward)
+            self.backward.append(backward)
+            if numpy is not None:
+                nearest = array('d', numpy.minimum(numpy.frombuffer(nearest), numpy.frombuffer(forward)).tobytes())
+            else:
+                nearest = array('d', [min(a, b) for a, b in zip(nearest, forward)])
+
+    def _seed(self):
+        """
+        Find a free cell inside the largest connected region of the map, so landmarks
+        are not wasted on a small enclosed pocket.
+
+        :return: A cell index, or None if the map has no free cells.
+        """
+        table = self.map.neighbour_table
+        masks, moves = table.masks, table.moves[self.allow_diagonal]
+        seen = bytearray(self.map.obstacles)  # blocked cells count as already seen
+        best, best_size = None, 0
+        start = seen.find(0)
+        while start != -1:
+            # Flood fill the region around start
+            seen[start] = 1
+            stack = [start]
+            size = 0
+            while stack:
+                current = stack.pop()
+                size += 1
+                for offset, _ in moves[masks[current]]:
+                    neighbour = current + offset
+                    if not seen[neighbour]:
+                        seen[neighbour] = 1
+                        stack.append(neighbour)
+            if size > best_size:
+                best, best_size = start, size
+            start = seen.find(0, start + 1)
+        return best
+
+    def _farthest(self, nearest):
+        """
+        The reachable cell with the largest distance to its nearest landmark.
+
+        :param nearest: array('d') of distances to the nearest landmark so far.
+        :return: The cell index, or None if every reachable cell is already a landmark.
+        """
+        numpy = load_numpy()
+        if numpy is not None:
+            values = numpy.frombuffer(nearest)
+            cell = int(numpy.where(numpy.isfinite(values), values, -1).argmax())
+        else:
+            cell = max((index for index, value in enumerate(nearest) if value != INFINITY),
+                       key=nearest.__getitem__, default=None)
+        if cell is None or not nearest[cell] > 0:
+            return None
+        return cell
+
+    def heuristic(self, goal):
+        """
+        The landmark heuristic towards a goal, combined with the Manhattan or Chebyshev
+        distance scaled by the map's cheapest cell cost.
+
+        :param goal: The index of the goal cell.
+        :return: Object indexed by cell giving the estimated cost to the goal.
+        """
+        last_goal, last = self._last
+        if last_goal == goal:
+            return last
+        if load_numpy() is not None:
+            estimates = self._dense_heuristic(goal)
+        else:
+            estimates = _GoalHeuristic(self, goal)
+        self._last = (goal, estimates)
+        return estimates
+
+    def _dense_heuristic(self, goal):
+        """
+        Compute the heuristic of every cell at once with NumPy.
+
+        :param goal: The index of the goal cell.
+        :return: array('d') of estimates for every cell.
+        """
+        numpy = load_numpy()
+        map = self.map
+        cells = numpy.arange(map.size)
+        goal_y, goal_x = divmod(goal, map.width)
+        dx = numpy.abs(cells % map.width - goal_x)
+        dy = numpy.abs(cells // map.width - goal_y)
+        best = (numpy.maximum(dx, dy) if self.allow_diagonal else dx + dy) * float(map.min_cost)
+        with numpy.errstate(invalid='ignore'):  # infinity minus infinity where both are unreachable
+            for forward, backward in zip(self.forward, self.backward):
+                forward, backward = numpy.frombuffer(forward), numpy.frombuffer(backward)
+                # fmax skips the NaN estimates of cells the landmark cannot reach either
+                best = numpy.fmax(best, forward[goal] - forward)
+                best = numpy.fmax(best, backward - backward[goal])
+        return array('d', best.tobytes())
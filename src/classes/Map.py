@@ -1,24 +1,119 @@
 from .Node import Node
+from .NeighbourTable import NeighbourTable
+from array import array
+import weakref
+
+BLOCKED_CELLS = bytes([0] + [1] * 255)  # translation table normalising obstacle bytes to 0 or 1
+CELL_STATES = b'\x00\x01'  # the only bytes of a normalised obstacle layer
 
 class Map:
     """
     Represents a grid of nodes, gives operations such as setting start and goal positions,
     adding obstacles, and accessing individual nodes.
+
+    Cell data is kept in flat arrays indexed by ``y * width + x`` rather than one Python
+    object per cell, so large maps stay compact. Node objects are created on demand as
+    lightweight views onto those arrays.
+
+    Cells may also carry a traversal cost. Moving into a cell costs the usual step cost
+    (1 orthogonally, 1.414 diagonally) multiplied by the cost of that cell. Maps without
+    a cost layer have a cost of 1 everywhere.
     """
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, obstacles=None, costs=None, min_cost=None, normalised=False):
         """
-        Initialises the Map with specified dimensions and populate it with nodes.
+        Initialises the Map with specified dimensions and an empty obstacle layer.
 
         :param width: The number of nodes across (x-direction).
         :param height: The number of nodes down (y-direction).
+        :param obstacles: Optional existing obstacle layer of width * height bytes (such as
+                          a shared or memory-mapped buffer) to use instead of a new one.
+                          Non-zero bytes are blocked; they are rewritten to 1 in place, so a
+                          read-only layer must already hold only 0 and 1.
+        :param costs: Optional existing cost layer of width * height floats to use as is.
+        :param min_cost: The cheapest cost in costs, if already known, to avoid scanning
+                         the whole layer.
+        :param normalised: True if obstacles is known to hold only 0 and 1, to avoid
+                           scanning the whole layer.
         """
         self.width = width  # Number of nodes horizontally
         self.height = height  # Number of nodes vertically
-        # Generate a 2D list of Node objects
-        self.nodes = [[Node(x, y) for y in range(height)] for x in range(width)]
+        self.size = width * height  # Total number of cells
+        if obstacles is None:
+            obstacles = bytearray(self.size)
+        elif not normalised and bytes(obstacles).translate(None, CELL_STATES):
+            # Searches scan for blocked cells by their byte value, so it must be exactly 1
+            try:
+                obstacles[:] = bytes(obstacles).translate(BLOCKED_CELLS)
+            except TypeError:
+                raise ValueError("A read-only obstacle layer must hold only 0 and 1") from None
+        # 1 byte per cell, 1 when blocked and 0 when free
+        self.obstacles = obstacles
+        self.costs = costs  # array('f') of cell traversal costs, None when every cost is 1
+        if min_cost is None:
+            min_cost = min(costs) if costs is not None and self.size else 1
+        self.min_cost = min_cost  # cheapest cell cost, scales the heuristics
         self.start = None  # Starting node coordinates for pathfinding
         self.goal = None  # Goal node coordinates for pathfinding
+        self._neighbour_table = None  # NeighbourTable, built on first use
+        self.version = 0  # incremented on every change to the obstacle layer
+        self._listeners = []  # references to the callbacks notified of obstacle changes
+        self._landmarks = {}  # (allow_diagonal, count) -> Landmarks for the current version
+        self.source = None  # (filename, version) of the map file this map was loaded from
+
+    @property
+    def neighbour_table(self):
+        """
+        The precomputed adjacency of the map, built on first access and kept up to date
+        as obstacles change.
+        """
+        if self._neighbour_table is None:
+            self._neighbour_table = NeighbourTable(self)
+        return self._neighbour_table
+
+    @neighbour_table.setter
+    def neighbour_table(self, table):
+        self._neighbour_table = table
+
+    def index(self, x, y):
+        """
+        Convert coordinates into a flat array index.
+
+        :param x: The x-coordinate of the node.
+        :param y: The y-coordinate of the node.
+        :return: The index of the cell in the map arrays.
+        """
+        return y * self.width + x
+
+    def coords(self, index):
+        """
+        Convert a flat array index back into coordinates.
+
+        :param index: The index of the cell in the map arrays.
+        :return: Tuple of (x, y) coordinates.
+        """
+        y, x = divmod(index, self.width)
+        return x, y
+
+    def in_bounds(self, x, y):
+        """
+        Check whether the coordinates lie inside the map.
+
+        :param x: The x-coordinate of the node.
+        :param y: The y-coordinate of the node.
+        :return: True if the coordinates are inside the grid.
+        """
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_blocked(self, x, y):
+        """
+        Check whether the node at the given coordinates is an obstacle.
+
+        :param x: The x-coordinate of the node.
+        :param y: The y-coordinate of the node.
+        :return: True if the node is blocked.
+        """
+        return self.obstacles[y * self.width + x] != 0
 
     def set_obstacle(self, x, y):
         """
@@ -27,7 +122,189 @@ class Map:
         :param x: The x-coordinate of the node.
         :param y: The y-coordinate of the node.
         """
-        self.nodes[x][y].block = True
+        index = y * self.width + x
+        if not self.obstacles[index]:
+            self.obstacles[index] = 1
+            self._cell_changed(x, y)
+
+    def clear_obstacle(self, x, y):
+        """
+        Mark a node at the given coordinates as traversable.
+
+        :param x: The x-coordinate of the node.
+        :param y: The y-coordinate of the node.
+        """
+        index = y * self.width + x
+        if self.obstacles[index]:
+            self.obstacles[index] = 0
+            self._cell_changed(x, y)
+
+    def clear_obstacles(self):
+        """
+        Remove every obstacle from the map.
+        """
+        self.load_obstacles(bytes(self.size))
+
+    def load_obstacles(self, data):
+        """
+        Replace the whole obstacle layer at once, which is much faster than calling
+        set_obstacle for every cell.
+
+        :param data: Bytes-like object of width * height cells, non-zero where blocked.
+        """
+        if len(data) != self.size:
+            raise ValueError(f"Expected {self.size} cells, got {len(data)}")
+        self.obstacles[:] = bytes(data).translate(BLOCKED_CELLS)
+        if self._neighbour_table is not None:
+            self._neighbour_table.build()
+        self._bulk_changed()
+
+    def get_cost(self, x, y):
+        """
+        Get the traversal cost of a cell.
+
+        :param x: The x-coordinate of the node.
+        :param y: The y-coordinate of the node.
+        :return: The cost of moving into the cell, relative to a plain step.
+        """
+        return self.costs[y * self.width + x] if self.costs is not None else 1
+
+    def set_cost(self, x, y, cost):
+        """
+        Set the traversal cost of a cell, creating the cost layer if needed.
+
+        :param x: The x-coordinate of the node.
+        :param y: The y-coordinate of the node.
+        :param cost: The cost of moving into the cell, which must be positive.
+        """
+        if not cost > 0:
+            raise ValueError(f"Cell costs must be positive, got {cost}")
+        if self.costs is None:
+            if cost == 1:
+                return
+            self.costs = array('f', [1.0]) * self.size
+        index = y * self.width + x
+        old_cost = self.costs[index]
+        self.costs[index] = cost
+        if self.costs[index] == old_cost:
+            return
+        if self.costs[index] < self.min_cost:
+            self.min_cost = self.costs[index]
+        elif old_cost == self.min_cost:
+            self.min_cost = min(self.costs)
+        self._cell_changed(x, y, passability=False)
+
+    def load_costs(self, data):
+        """
+        Replace the whole cost layer at once.
+
+        :param data: Sequence or buffer of width * height positive costs (such as an
+                     array('f'), a NumPy array, or bytes of small integer costs), or None
+                     to give every cell a cost of 1.
+        """
+        if data is None:
+            self.costs = None
+            self.min_cost = 1
+            self._bulk_changed()
+            return
+        if len(data) != self.size:
+            raise ValueError(f"Expected {self.size} cells, got {len(data)}")
+        costs = array('f')
+        try:
+            view = memoryview(data)
+        except TypeError:
+            view = None
+        if view is not None and view.format == 'f' and view.contiguous:
+            costs.frombytes(view.cast('B'))  # same layout, so copy the buffer directly
+        else:
+            costs.extend(data)
+        min_cost = min(costs) if self.size else 1
+        if not min_cost > 0:
+            raise ValueError(f"Cell costs must be positive, got {min_cost}")
+        self.costs = costs
+        self.min_cost = min_cost
+        self._bulk_changed()
+
+    def landmarks(self, allow_diagonal, count=8):
+        """
+        Get landmark distance tables for the ALT heuristic, building them on first use.
+        They are kept until the obstacle or cost layers next change.
+
+        :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+        :param count: Number of landmarks.
+        :return: The Landmarks object.
+        """
+        key = (allow_diagonal, count)
+        if key not in self._landmarks:
+            from .Landmarks import Landmarks  # keeps distance fields out of the core import
+            self._landmarks[key] = Landmarks(self, allow_diagonal, count)
+        return self._landmarks[key]
+
+    def _bulk_changed(self):
+        """
+        Propagate a change of many cells to the derived data and the listeners.
+        """
+        self.version += 1
+        self._landmarks.clear()
+        self._notify(None, False)
+
+    def add_listener(self, listener):
+        """
+        Register a callback to be told about obstacle and cost changes.
+
+        The callback receives the index of the changed cell and whether it is now
+        blocked. A bulk change to many cells is reported with an index of None.
+
+        A bound method is only weakly referenced, so a cache or planner the map reports
+        to is freed, and stops being notified, once nothing else uses it.
+
+        :param listener: Callable taking (index, blocked).
+        """
+        if hasattr(listener, '__func__'):
+            reference = weakref.WeakMethod(listener, self._listeners.remove)
+        else:
+            reference = lambda: listener
+        self._listeners.append(reference)
+
+    def remove_listener(self, listener):
+        """
+        Unregister a callback added with add_listener.
+
+        :param listener: The callback to remove.
+        """
+        for reference in self._listeners:
+            if reference() == listener:
+                self._listeners.remove(reference)
+                return
+        raise ValueError("Listener is not registered")
+
+    def _notify(self, index, blocked):
+        """
+        Call every live listener with a change.
+
+        :param index: The index of the changed cell, or None for a bulk change.
+        :param blocked: Whether the cell is now blocked.
+        """
+        # A copy, since listeners that are freed meanwhile remove themselves from the list
+        for reference in tuple(self._listeners):
+            listener = reference()
+            if listener is not None:
+                listener(index, blocked)
+
+    def _cell_changed(self, x, y, passability=True):
+        """
+        Propagate a change of one cell's obstacle state or cost to the derived data.
+
+        :param x: The x-coordinate of the changed cell.
+        :param y: The y-coordinate of the changed cell.
+        :param passability: Whether the obstacle state changed, rather than only the cost.
+        """
+        self.version += 1
+        self._landmarks.clear()
+        if passability and self._neighbour_table is not None:
+            self._neighbour_table.update(x, y)
+        index = y * self.width + x
+        self._notify(index, self.obstacles[index] != 0)
 
     def set_goal(self, x, y):
         """
@@ -53,6 +330,16 @@ class Map:
 
         :param x: The x-coordinate of the node.
         :param y: The y-coordinate of the node.
-        :return: The Node object at the specified coordinates.
+        :return: A Node view of the cell at the specified coordinates.
+        """
+        return Node(x, y, self)
+
+    def node_at(self, index):
+        """
+        Retrieve a node from its flat array index.
+
+        :param index: The index of the cell in the map arrays.
+        :return: A Node view of the cell.
         """
-        return self.nodes[x][y]
\ No newline at end of file
+        y, x = divmod(index, self.width)
+        return Node(x, y, self)
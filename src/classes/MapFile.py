@@ -0,0 +1,215 @@
+"""
+Reading and writing maps on disk.
+
+The binary map format is a fixed header followed by up to four layers, each starting
+at a multiple of LAYER_ALIGNMENT so it can be memory-mapped on its own:
+
+- header: magic ``ASTARMAP``, format version, flags, width, height and the cheapest
+  cell cost, as ``HEADER`` (little-endian).
+- obstacles: one byte per cell (0 free, 1 blocked) or, with the PACKED flag, one bit
+  per cell, least significant bit first.
+- masks and columns (TABLE flag): the neighbour table of the map, so it does not have
+  to be rebuilt on load.
+- costs (COSTS flag): one little-endian float32 per cell.
+
+Byte layers are memory-mapped rather than read, so opening even a very large map is
+immediate, and processes that open the same file share its pages through the page
+cache. Bit-packed files are eight times smaller but their obstacle layer is unpacked
+into memory on load; they suit distribution and archiving more than shared use.
+
+MovingAI benchmark maps (``.map``) can be imported with load_movingai.
+"""
+
+from .Map import Map, BLOCKED_CELLS
+from .NeighbourTable import NeighbourTable
+from array import array
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+MAGIC = b'ASTARMAP'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIIf')  # magic, version, flags, width, height, cheapest cell cost
+PACKED = 1  # flag: the obstacle layer holds one bit per cell
+TABLE = 2  # flag: the neighbour table masks and columns follow the obstacle layer
+COSTS = 4  # flag: a float32 cost layer follows
+LAYER_ALIGNMENT = 1 << 16  # layer offset alignment, a multiple of every platform's mmap granularity
+
+# Byte patterns of eight cells for each packed byte value, and the reverse lookup
+UNPACKED_BYTES = [bytes((value >> bit) & 1 for bit in range(8)) for value in range(256)]
+PACKED_BYTES = {pattern: value for value, pattern in enumerate(UNPACKED_BYTES)}
+
+# MovingAI terrain: '.' and 'G' are ground and 'S' swamp; '@', 'O', 'T' and 'W' block ground movement
+MOVINGAI_PASSABLE = b'.GS'
+
+
+def _aligned(offset):
+    """
+    Round a file offset up to the next layer boundary.
+
+    :param offset: The offset in bytes.
+    :return: The aligned offset.
+    """
+    return (offset + LAYER_ALIGNMENT - 1) // LAYER_ALIGNMENT * LAYER_ALIGNMENT
+
+
+def save_map(map, filename, packed=False, table=True):
+    """
+    Write a map to a binary map file.
+
+    :param map: The map to save.
+    :param filename: Path of the file to write.
+    :param packed: If True, store one bit per cell for a file eight times smaller that
+                   is unpacked on load instead of memory-mapped.
+    :param table: If True, store the neighbour table so loading does not rebuild it.
+    """
+    obstacles = bytes(map.obstacles).translate(BLOCKED_CELLS)
+    if packed:
+        obstacles += bytes(-len(obstacles) % 8)
+        obstacles = bytes([PACKED_BYTES[obstacles[i:i + 8]] for i in range(0, len(obstacles), 8)])
+    layers = [obstacles]
+    if table:
+        neighbour_table = map.neighbour_table
+        layers += [neighbour_table.masks, neighbour_table.columns]
+    if map.costs is not None:
+        costs = map.costs
+        if sys.byteorder == 'big':
+            costs = array('f', costs)
+            costs.byteswap()
+        layers.append(costs)
+    flags = (PACKED if packed else 0) | (TABLE if table else 0) | (COSTS if map.costs is not None else 0)
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, flags, map.width, map.height, map.min_cost))
+        for layer in layers:
+            file.write(bytes(_aligned(file.tell()) - file.tell()))
+            file.write(layer)
+
+
+def load_map(filename, access=mmap.ACCESS_COPY):
+    """
+    Open a binary map file, memory-mapping its layers.
+
+    :param filename: Path of the file to open.
+    :param access: mmap access mode for the mapped layers. The default ACCESS_COPY gives
+                   a map that can be edited privately, with pages shared until written;
+                   ACCESS_READ gives a read-only map, and ACCESS_WRITE writes edits back
+                   to the file.
+    :return: The loaded Map. Unless the file is bit-packed, ``map.source`` names the
+             file so that worker processes can open it directly.
+    """
+    with open(filename, 'rb') as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{filename} is not a binary map file")
+        _, version, flags, width, height, min_cost = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError(f"{filename} has map format version {version}, expected {VERSION}")
+        size = width * height
+        offset = _aligned(HEADER.size)
+
+        def layer(length):
+            # Map the next layer of the file and move past it
+            nonlocal offset
+            start, offset = offset, _aligned(offset + length)
+            if not length:
+                return bytearray()
+            return mmap.mmap(file.fileno(), length, access=access, offset=start)
+
+        if flags & PACKED:
+            packed = bytes(layer((size + 7) // 8))
+            obstacles = bytearray(b''.join([UNPACKED_BYTES[value] for value in packed])[:size])
+        else:
+            obstacles = layer(size)
+        masks, columns = (layer(size), layer(size)) if flags & TABLE else (None, None)
+        costs = None
+        if flags & COSTS:
+            costs = layer(4 * size)
+            if sys.byteorder == 'big':
+                costs = array('f', bytes(costs))
+                costs.byteswap()
+            else:
+                costs = memoryview(costs).cast('f')
+    # save_map writes normalised obstacle bytes, so the layer needs no scan
+    map = Map(width, height, obstacles=obstacles, costs=costs, min_cost=min_cost, normalised=True)
+    if masks is not None:
+        map.neighbour_table = NeighbourTable(map, masks=masks, columns=columns)
+    if not flags & PACKED:
+        map.source = (filename, map.version)
+    return map
+
+
+def load_movingai(filename, terrain_costs=None):
+    """
+    Import a map in the MovingAI benchmark format (``type``, ``height`` and ``width``
+    lines, a ``map`` line, then one line of terrain characters per row).
+
+    :param filename: Path of the ``.map`` file.
+    :param terrain_costs: Optional dictionary mapping terrain characters to cell costs,
+                          such as ``{'S': 3, 'W': 10}``. Characters listed here are
+                          passable even if they normally block movement.
+    :return: The imported Map.
+    """
+    with open(filename, 'rb') as file:
+        lines = file.read().splitlines()
+    header = {}
+    for row, line in enumerate(lines):
+        if line.strip() == b'map':
+            break
+        key, _, value = line.decode('ascii').partition(' ')
+        header[key] = value.strip()
+    else:
+        raise ValueError(f"{filename} has no 'map' line")
+    try:
+        width, height = int(header['width']), int(header['height'])
+    except (KeyError, ValueError):
+        raise ValueError(f"{filename} has no valid width and height") from None
+    rows = lines[row + 1:row + 1 + height]
+    if len(rows) != height or any(len(line) != width for line in rows):
+        raise ValueError(f"{filename} does not hold {height} rows of {width} cells")
+    grid = b''.join(rows)
+
+    terrain_costs = {ord(terrain): cost for terrain, cost in (terrain_costs or {}).items()}
+    for cost in terrain_costs.values():
+        if not cost > 0:
+            raise ValueError(f"Cell costs must be positive, got {cost}")
+    passable = set(MOVINGAI_PASSABLE) | set(terrain_costs)
+    obstacles = bytearray(grid.translate(bytes(value not in passable for value in range(256))))
+    costs = None
+    if any(cost != 1 for cost in terrain_costs.values()):
+        cell_costs = [float(terrain_costs.get(value, 1)) for value in range(256)]
+        costs = array('f', [cell_costs[value] for value in grid])
+    return Map(width, height, obstacles=obstacles, costs=costs, normalised=True)
+
+
+def share_map(map):
+    """
+    Find or write a binary map file that other processes can memory-map to share a map.
+    A map loaded from such a file and not edited since is shared straight from that
+    file; otherwise the map is written, with its neighbour table, to a temporary file in
+    shared memory (a memory-backed filesystem where one exists).
+
+    :param map: The map to share.
+    :return: Tuple of (filename, whether it is a temporary file the caller should delete).
+    """
+    if map.source is not None and map.source[1] == map.version:
+        return map.source[0], False
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    descriptor, filename = tempfile.mkstemp(prefix='astar-grid-', dir=directory)
+    os.close(descriptor)
+    save_map(map, filename)
+    return filename, True
+
+
+def open_map(filename, **options):
+    """
+    Open a map file of either supported format, chosen by its extension.
+
+    :param filename: Path of a MovingAI ``.map`` file or a binary map file.
+    :param options: Keyword arguments for load_movingai or load_map.
+    :return: The loaded Map.
+    """
+    if str(filename).endswith('.map'):
+        return load_movingai(filename, **options)
+    return load_map(filename, **options)
@@ -0,0 +1,161 @@
+from .Map import Map
+import random
+
+GENERATORS = ('open', 'noise', 'maze', 'rooms')  # map kinds MapGenerator.generate accepts
+
+class MapGenerator:
+    """
+    Builds reproducible test maps from a seed, for benchmarks and comparisons.
+
+    Every map kind is written into the obstacle layer in one bulk load, so even
+    4096x4096 maps are generated without a set_obstacle call per cell.
+    """
+
+    def __init__(self, seed=0):
+        """
+        Initialise the generator.
+
+        :param seed: Seed for the random number generator; the same seed gives the same maps.
+        """
+        self.seed = seed
+
+    def generate(self, kind, width, height, density=0.2):
+        """
+        Build a map of the given kind.
+
+        :param kind: One of GENERATORS.
+        :param width: Width of the map.
+        :param height: Height of the map.
+        :param density: Fraction of blocked cells for the 'noise' kind.
+        :return: The generated Map.
+        """
+        if kind == 'open':
+            return self.open_field(width, height)
+        if kind == 'noise':
+            return self.noise(width, height, density)
+        if kind == 'maze':
+            return self.maze(width, height)
+        if kind == 'rooms':
+            return self.rooms(width, height)
+        raise ValueError(f"Unknown map kind {kind!r}, expected one of {GENERATORS}")
+
+    def _random(self, kind, width, height):
+        """
+        A random number generator seeded from the generator seed and the map parameters,
+        so each map is reproducible on its own regardless of generation order.
+
+        :param kind: Name of the map kind.
+        :param width: Width of the map.
+        :param height: Height of the map.
+        :return: A seeded random.Random instance.
+        """
+        return random.Random(f"{self.seed}:{kind}:{width}x{height}")
+
+    def open_field(self, width, height, blocks=0.002):
+        """
+        A mostly empty map with a few small rectangular blocks.
+
+        :param width: Width of the map.
+        :param height: Height of the map.
+        :param blocks: Number of blocks per cell of the map.
+        :return: The generated Map.
+        """
+        rng = self._random('open', width, height)
+        cells = bytearray(width * height)
+        for _ in range(int(width * height * blocks)):
+            x, y = rng.randrange(width), rng.randrange(height)
+            x_end, y_end = min(x + rng.randint(1, 4), width), min(y + rng.randint(1, 4), height)
+            for row in range(y, y_end):
+                cells[row * width + x:row * width + x_end] = b'\x01' * (x_end - x)
+        return self._build(width, height, cells)
+
+    def noise(self, width, height, density=0.2):
+        """
+        A map where each cell is blocked independently with the given probability.
+
+        :param width: Width of the map.
+        :param height: Height of the map.
+        :param density: Probability that a cell is blocked.
+        :return: The generated Map.
+        """
+        rng = self._random(f'noise{density}', width, height)
+        random_value = rng.random
+        cells = bytes(random_value() < density for _ in range(width * height))
+        return self._build(width, height, cells)
+
+    def maze(self, width, height):
+        """
+        A perfect maze with one-cell corridors, carved by a randomised depth-first search.
+
+        :param width: Width of the map.
+        :param height: Height of the map.
+        :return: The generated Map.
+        """
+        rng = self._random('maze', width, height)
+        cells = bytearray(b'\x01' * (width * height))
+        rooms_x, rooms_y = (width + 1) // 2, (height + 1) // 2  # corridor cells sit on even coordinates
+        visited = bytearray(rooms_x * rooms_y)
+        stack = [(0, 0)]
+        visited[0] = 1
+        cells[0] = 0
+        while stack:
+            room_x, room_y = stack[-1]
+            options = [
+                (room_x + dx, room_y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if 0 <= room_x + dx < rooms_x and 0 <= room_y + dy < rooms_y
+                and not visited[(room_y + dy) * rooms_x + room_x + dx]
+            ]
+            if not options:
+                stack.pop()
+                continue
+            next_x, next_y = rng.choice(options)
+            visited[next_y * rooms_x + next_x] = 1
+            # Open the wall between the two rooms and the next room itself
+            cells[(room_y + next_y) * width + room_x + next_x] = 0
+            cells[2 * next_y * width + 2 * next_x] = 0
+            stack.append((next_x, next_y))
+        return self._build(width, height, cells)
+
+    def rooms(self, width, height, room_count=None):
+        """
+        Rectangular rooms joined in sequence by L-shaped corridors, on a solid background.
+
+        :param width: Width of the map.
+        :param height: Height of the map.
+        :param room_count: Number of rooms, scaled to the map area by default.
+        :return: The generated Map.
+        """
+        rng = self._random('rooms', width, height)
+        cells = bytearray(b'\x01' * (width * height))
+        if room_count is None:
+            room_count = max(2, width * height // 400)
+        centres = []
+        for _ in range(room_count):
+            room_width = rng.randint(3, max(3, min(20, width // 3)))
+            room_height = rng.randint(3, max(3, min(20, height // 3)))
+            x = rng.randrange(max(1, width - room_width))
+            y = rng.randrange(max(1, height - room_height))
+            x_end, y_end = min(x + room_width, width), min(y + room_height, height)
+            for row in range(y, y_end):
+                cells[row * width + x:row * width + x_end] = bytes(x_end - x)
+            centres.append(((x + x_end) // 2, (y + y_end) // 2))
+        for (x0, y0), (x1, y1) in zip(centres, centres[1:]):
+            # Horizontal leg along y0, then vertical leg along x1
+            for x in range(min(x0, x1), max(x0, x1) + 1):
+                cells[y0 * width + x] = 0
+            for y in range(min(y0, y1), max(y0, y1) + 1):
+                cells[y * width + x1] = 0
+        return self._build(width, height, cells)
+
+    def _build(self, width, height, cells):
+        """
+        Create a map and bulk load its obstacle layer.
+
+        :param width: Width of the map.
+        :param height: Height of the map.
+        :param cells: Bytes of width * height cells, non-zero where blocked.
+        :return: The Map.
+        """
+        map = Map(width, height)
+        map.load_obstacles(cells)
+        return map
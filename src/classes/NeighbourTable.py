@@ -0,0 +1,124 @@
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))  # bit k of a mask is DIRECTIONS[k]
+DIAGONAL_COST = 1.414  # cost of a diagonal step
+FREE_CELLS = bytes([1] + [0] * 255)  # translation table turning the obstacle layer into 1 for free cells
+
+class NeighbourTable:
+    """
+    Precomputed adjacency for a map, shared by every search over it.
+
+    Each cell has a passability bitmask where bit k is set when a move in direction
+    ``DIRECTIONS[k]`` stays inside the map, lands on a free cell and, for diagonal moves,
+    does not cut the corner of a blocked cell. Orthogonal moves use the low four bits and
+    diagonal moves the high four, so one mask serves both movement modes. For every
+    possible mask value the table also stores the tuple of (flat index offset, step cost)
+    pairs it allows, so expanding a cell needs no new lists or node objects.
+
+    A transposed copy of the obstacle layer, with each column stored contiguously, is
+    kept alongside so that vertical scans (as used by Jump Point Search) can search a
+    column with ``bytes.find`` just like a row of the map.
+    """
+
+    def __init__(self, map, masks=None, columns=None):
+        """
+        Initialise the table and compute the mask of every cell.
+
+        :param map: The map object the table describes.
+        :param masks: Optional precomputed mask layer (such as a shared buffer) to use as is.
+        :param columns: Optional precomputed transposed obstacle layer to use with masks.
+        """
+        self.map = map
+        width = map.width
+        offsets = [dx + dy * width for dx, dy in DIRECTIONS]
+        costs = [DIAGONAL_COST if dx and dy else 1 for dx, dy in DIRECTIONS]
+        moves_4 = []
+        moves_8 = []
+        for mask in range(256):
+            allowed = [(offsets[bit], costs[bit]) for bit in range(8) if mask & (1 << bit)]
+            moves_4.append(tuple(move for move in allowed if move[1] == 1))
+            moves_8.append(tuple(allowed))
+        self.offsets = tuple(offsets)  # flat index offset of each direction
+        self.moves = (tuple(moves_4), tuple(moves_8))  # indexed by [allow_diagonal][mask]
+        if masks is not None:
+            self.masks = masks  # passability bitmask of each cell
+            self.columns = columns  # obstacle layer indexed by x * height + y
+            return
+        self.masks = bytearray(map.size)
+        self.columns = bytearray(map.size)
+        self.build()
+
+    def build(self):
+        """
+        Recompute the mask of every cell, and the transposed obstacle layer, from the
+        map's obstacle layer.
+
+        The grid is processed as one large integer holding a byte per cell, so each
+        direction costs a handful of shifts and bitwise operations instead of a Python
+        loop over every cell.
+        """
+        map = self.map
+        width, height, size = map.width, map.height, map.size
+        if size == 0:
+            return
+        full = (1 << (8 * size)) - 1
+        free = int.from_bytes(bytes(map.obstacles).translate(FREE_CELLS), 'little')
+        # Cells that may move left (x > 0) or right (x < width - 1) without leaving the row
+        columns = {
+            -1: int.from_bytes((b'\x00' + b'\x01' * (width - 1)) * height, 'little'),
+            1: int.from_bytes((b'\x01' * (width - 1) + b'\x00') * height, 'little'),
+        }
+
+        def shifted(offset):
+            # Byte i of the result holds the free flag of cell i + offset
+            if offset >= 0:
+                return free >> (8 * offset)
+            return (free << (-8 * offset)) & full
+
+        masks = 0
+        for bit, (dx, dy) in enumerate(DIRECTIONS):
+            allowed = shifted(dx + dy * width)
+            if dx:
+                allowed &= columns[dx]
+            if dx and dy:
+                allowed &= shifted(dx) & shifted(dy * width)
+            masks |= allowed << bit
+        self.masks[:] = masks.to_bytes(size, 'little')
+        rows = bytes(map.obstacles)
+        for x in range(width):
+            self.columns[x * height:(x + 1) * height] = rows[x::width]
+
+    def cell_mask(self, x, y):
+        """
+        Compute the passability bitmask of a single cell.
+
+        :param x: The x-coordinate of the cell.
+        :param y: The y-coordinate of the cell.
+        :return: The bitmask of allowed directions.
+        """
+        map = self.map
+        width, height = map.width, map.height
+        obstacles = map.obstacles
+        mask = 0
+        for bit, (dx, dy) in enumerate(DIRECTIONS):
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height) or obstacles[ny * width + nx]:
+                continue
+            if dx and dy and (obstacles[y * width + nx] or obstacles[ny * width + x]):
+                continue  # diagonal moves may not cut the corner of a blocked cell
+            mask |= 1 << bit
+        return mask
+
+    def update(self, x, y):
+        """
+        Refresh the masks affected by a change to one cell.
+
+        Only the cell's immediate neighbours can move into it or past its corner, so
+        at most nine masks are recomputed.
+
+        :param x: The x-coordinate of the changed cell.
+        :param y: The y-coordinate of the changed cell.
+        """
+        width, height = self.map.width, self.map.height
+        self.columns[x * height + y] = self.map.obstacles[y * width + x]
+        for ny in range(max(y - 1, 0), min(y + 2, height)):
+            for nx in range(max(x - 1, 0), min(x + 2, width)):
+                self.masks[ny * width + nx] = self.cell_mask(nx, ny)
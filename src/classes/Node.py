@@ -1,45 +1,58 @@
 class Node:
     """
-    Represents a single node within a grid map. Each node
-    contains data related to its location, cost metrics for pathfinding, and other 
-    properties.
+    Represents a single node within a grid map. A node is a lightweight view
+    onto one cell of a Map: its position is stored here, while the cell data
+    itself (such as whether it is blocked) lives in the map's flat arrays.
     """
 
-    def __init__(self, x, y):
+    __slots__ = ('x', 'y', 'map')
+
+    def __init__(self, x, y, map):
         """
-        Initialise a node with its position and default values.
+        Initialise a node view with its position and the map it belongs to.
 
         :param x: The x-coordinate of the node in the grid.
         :param y: The y-coordinate of the node in the grid.
+        :param map: The map object holding the cell data.
         """
         self.x = x  # x-coordinate
         self.y = y  # y-coordinate
-        self.g = float('inf')  # Cost from start to node
-        self.h = 0  # Heuristic cost from node to goal
-        self.f = float('inf')  # Total cost (g + h)
-        self.parent = None  # Parent node in the path
-        self.block = False  # Whether the node is traversable
-        self.in_closed_set = False  # Whether node has been processed
-        self.in_open_set = False  # Whether node is in the queue to be processed
+        self.map = map  # map that owns the underlying cell
 
-    def reset(self):
+    @property
+    def index(self):
         """
-        Reset the node's pathfinding vals.
+        The flat index of the node within the map arrays.
         """
-        self.g = float('inf')
-        self.f = float('inf')
-        self.h = 0
-        self.parent = None
-        self.in_closed_set = False
-        self.in_open_set = False
+        return self.y * self.map.width + self.x
 
-    def __lt__(self, other):
+    @property
+    def block(self):
+        """
+        Whether the node is an obstacle (not traversable).
         """
-        Override Python comparison operation to enable direct comparison between
-        Node objects to facilitate and measure Node cost.
-        https://www.geeksforgeeks.org/python-__lt__-magic-method/
+        return self.map.obstacles[self.index] != 0
+
+    @block.setter
+    def block(self, value):
+        if value:
+            self.map.set_obstacle(self.x, self.y)
+        else:
+            self.map.clear_obstacle(self.x, self.y)
+
+    def __eq__(self, other):
+        """
+        Two views are equal when they refer to the same cell of the same map.
 
         :param other: Another node to compare against.
-        :return: True if this node's f cost is less than the other's.
+        :return: True if both nodes describe the same cell.
         """
-        return self.f < other.f
\ No newline at end of file
+        if not isinstance(other, Node):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y and self.map is other.map
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"Node({self.x}, {self.y})"
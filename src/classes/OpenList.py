@@ -0,0 +1,68 @@
+from .SearchState import OPEN
+import heapq
+
+class OpenList:
+    """
+    Priority queue of cells waiting to be expanded by a search.
+
+    Entries are ordered by f-score, then by h-score (preferring cells closer to the goal)
+    and finally by insertion order, so ties are resolved deterministically without ever
+    comparing node objects. Decrease-key is done by lazy re-insertion: a cell whose
+    g-score improves is simply pushed again, and the caller skips any popped entry whose
+    cell has already been closed.
+    """
+
+    __slots__ = ('heap', 'counter')
+
+    def __init__(self):
+        """
+        Initialise an empty open list.
+        """
+        self.heap = []  # (f, h, insertion counter, cell index) entries
+        self.counter = 0  # number of entries pushed so far
+
+    def push(self, f, h, index):
+        """
+        Add a cell to the open list, or re-insert it with a better priority.
+
+        :param f: The f-score of the cell (g + h, or g + weight * h for weighted searches).
+        :param h: The unweighted heuristic estimate from the cell to the goal.
+        :param index: The index of the cell in the map arrays.
+        """
+        self.counter += 1
+        heapq.heappush(self.heap, (f, h, self.counter, index))
+
+    def pop(self):
+        """
+        Remove the entry with the lowest priority.
+
+        :return: The index of the cell; it may be a stale duplicate of a closed cell.
+        """
+        return heapq.heappop(self.heap)[3]
+
+    def peek_f(self):
+        """
+        The f-score of the entry that would be popped next.
+
+        :return: The lowest f-score, or infinity if the list is empty.
+        """
+        return self.heap[0][0] if self.heap else float('inf')
+
+    def lower_bound(self, g_scores, flags):
+        """
+        The smallest g + h over the cells still open. With an admissible heuristic this
+        is a lower bound on the optimal cost, even when the list is ordered by a
+        weighted f-score.
+
+        :param g_scores: The g-score array of the search.
+        :param flags: The open/closed flag array of the search.
+        :return: The bound, or infinity if no cell is open.
+        """
+        return min((g_scores[index] + h for _, h, _, index in self.heap if flags[index] == OPEN),
+                   default=float('inf'))
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __bool__(self):
+        return bool(self.heap)
@@ -0,0 +1,121 @@
+from .MapFile import share_map, load_map
+import multiprocessing
+import mmap
+import os
+
+_worker_path_finder = None  # PathFinder of the current worker process
+
+def _start_worker(filename, allow_diagonal, strategy, options):
+    """
+    Pool initialiser: map the shared grid read-only and build this worker's PathFinder.
+
+    :param filename: Path of the shared map file.
+    :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+    :param strategy: The search algorithm to use.
+    :param options: Other PathFinder keyword arguments (landmarks, which each worker builds
+                    once, weight, the per-query budgets and the hierarchy settings).
+    """
+    from .PathFinder import PathFinder
+    global _worker_path_finder
+    _worker_path_finder = PathFinder(load_map(filename, access=mmap.ACCESS_READ), allow_diagonal, strategy, **options)
+
+def _solve(pairs):
+    """
+    Pool task: solve a chunk of queries with the worker's own search state.
+
+    :param pairs: List of (start index, goal index) tuples.
+    :return: List of (array of path cell indices, path cost, suboptimality bound) tuples.
+    """
+    return [_solve_one(_worker_path_finder, start, goal) for start, goal in pairs]
+
+def _solve_one(path_finder, start, goal):
+    """
+    Solve one query.
+
+    :param path_finder: The PathFinder to search with.
+    :param start: The index of the start cell.
+    :param goal: The index of the goal cell.
+    :return: Tuple of (array of path cell indices, path cost, suboptimality bound).
+    """
+    cells, cost = path_finder.search_indices(start, goal)
+    return cells, cost, path_finder.bound
+
+class ParallelSearch:
+    """
+    Runs many independent path queries over one map across a pool of processes.
+
+    The map is written once, with its neighbour table, as a binary map file in shared
+    memory (a memory-backed filesystem where one exists), which every worker maps
+    read-only. A map loaded from such a file and not edited since is shared straight
+    from that file instead. Workers therefore start without copying or rebuilding the
+    grid, and each keeps its own SearchState so queries never share mutable state.
+    """
+
+    def __init__(self, path_finder, processes=None, chunksize=64):
+        """
+        Initialise the batch runner for a pathfinder.
+
+        :param path_finder: The PathFinder whose map and settings the workers copy.
+        :param processes: Number of worker processes, defaults to the number of CPUs.
+        :param chunksize: Number of queries sent to a worker at a time.
+        """
+        self.path_finder = path_finder
+        self.processes = processes or os.cpu_count() or 1
+        self.chunksize = chunksize
+
+    def iter_paths(self, pairs):
+        """
+        Solve queries in the worker pool, yielding results as they complete.
+
+        :param pairs: Iterable of (start, goal) pairs, each a Node or an (x, y) tuple.
+        :return: Iterator of Path objects, in the same order as the pairs.
+        """
+        indices = [(self._index(start), self._index(goal)) for start, goal in pairs]
+        if self.processes == 1:
+            for start, goal in indices:
+                yield self._to_path(_solve_one(self.path_finder, start, goal))
+            return
+        chunks = [indices[i:i + self.chunksize] for i in range(0, len(indices), self.chunksize)]
+        filename, temporary = share_map(self.path_finder.map)
+        try:
+            path_finder = self.path_finder
+            options = {'landmarks': path_finder.landmarks, 'weight': path_finder.weight,
+                       'max_expansions': path_finder.max_expansions, 'time_limit': path_finder.time_limit,
+                       'cluster_size': path_finder.cluster_size, 'entrance_spacing': path_finder.entrance_spacing}
+            settings = (filename, path_finder.allow_diagonal, path_finder.strategy, options)
+            with multiprocessing.Pool(self.processes, _start_worker, settings) as pool:
+                for results in pool.imap(_solve, chunks):
+                    for result in results:
+                        yield self._to_path(result)
+        finally:
+            if temporary:
+                os.unlink(filename)
+
+    def find_paths(self, pairs):
+        """
+        Solve queries in the worker pool.
+
+        :param pairs: Iterable of (start, goal) pairs, each a Node or an (x, y) tuple.
+        :return: List of Path objects, in the same order as the pairs.
+        """
+        return list(self.iter_paths(pairs))
+
+    def _index(self, point):
+        """
+        Convert a Node or (x, y) tuple into a flat map index.
+
+        :param point: A Node or an (x, y) tuple.
+        :return: The index of the cell in the map arrays.
+        """
+        x, y = (point.x, point.y) if hasattr(point, 'x') else point
+        return self.path_finder.map.index(x, y)
+
+    def _to_path(self, result):
+        """
+        Build a Path on the parent's map from a worker result.
+
+        :param result: Tuple of (array of path cell indices, path cost, suboptimality bound).
+        :return: The Path object.
+        """
+        cells, cost, bound = result
+        return self.path_finder.make_path(cells, cost, bound)
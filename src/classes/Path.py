@@ -3,13 +3,27 @@ class Path:
     Represents a path as a list of nodes within a grid.
     """
 
-    def __init__(self, nodes=None):
+    def __init__(self, nodes=None, cost=0, bound=1.0):
         """
         Initialise a Path instance.
 
         :param nodes: A list of nodes to initialise the path.
+        :param cost: The total movement cost of the path.
+        :param bound: Guaranteed ratio between the cost and the optimal cost: 1 when the
+                      path is proven optimal (or proven not to exist, for an empty path),
+                      infinity when no guarantee is known.
         """
         self.nodes = nodes if nodes is not None else []
+        self.cost = cost  # Sum of the step costs from start to goal
+        self.bound = bound  # cost is at most bound times the optimal cost
+
+    @property
+    def optimal(self):
+        """
+        Whether the search proved this result optimal. An empty path is proven only when
+        the search ruled out every route, not when it stopped early.
+        """
+        return self.bound <= 1
 
     def add_node(self, node):
         """
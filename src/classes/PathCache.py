@@ -0,0 +1,151 @@
+from .CompactPath import CompactPath
+from .PathSmoother import line_cells
+from collections import OrderedDict
+
+class PathCache:
+    """
+    Least-recently-used cache of search results for one map.
+
+    Entries are keyed on the query (endpoints and movement settings) and are only valid
+    for the map version they were computed against. The cache listens to the map: when
+    a cell becomes blocked only the cached paths that step on it, or cut diagonally past
+    its corner, are dropped, since every other path is still valid and still optimal.
+    When a cell is freed any path could get shorter, so the whole cache is cleared.
+    """
+
+    def __init__(self, map, maxsize=256):
+        """
+        Initialise an empty cache and subscribe it to changes of the map.
+
+        :param map: The map object the cached paths belong to.
+        :param maxsize: Maximum number of paths kept before the oldest are evicted.
+        """
+        self.map = map
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # key -> Path, least recently used first
+        self.cells = {}  # cell index -> set of keys whose path depends on the cell
+        self.footprints = {}  # key -> cell indices the cached path depends on
+        self.version = map.version  # map version the entries are valid for
+        self.hits = 0  # lookups answered from the cache
+        self.misses = 0  # lookups that had to search
+        self.evictions = 0  # entries dropped to respect maxsize
+        self.invalidations = 0  # entries dropped because the map changed
+        map.add_listener(self._cell_changed)
+
+    def get(self, key):
+        """
+        Look up a cached path.
+
+        :param key: The query key.
+        :return: The cached Path, or None on a miss.
+        """
+        if self.version != self.map.version:
+            # The map changed without notifying us (e.g. its buffer was written directly)
+            self.clear()
+        path = self.entries.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def put(self, key, path):
+        """
+        Store the result of a search.
+
+        :param key: The query key.
+        :param path: The Path found for the query (possibly empty).
+        """
+        if key in self.entries:
+            self._discard(key)
+        footprint = self._footprint(path)
+        self.entries[key] = path
+        self.footprints[key] = footprint
+        for index in footprint:
+            self.cells.setdefault(index, set()).add(key)
+        while len(self.entries) > self.maxsize:
+            self._discard(next(iter(self.entries)))
+            self.evictions += 1
+
+    def close(self):
+        """
+        Stop listening to the map's changes. The cache must not be used afterwards.
+        """
+        self.map.remove_listener(self._cell_changed)
+
+    def clear(self):
+        """
+        Drop every cached path.
+        """
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+        self.cells.clear()
+        self.footprints.clear()
+        self.version = self.map.version
+
+    def as_dict(self):
+        """
+        Get the cache statistics as a dictionary.
+
+        :return: A dictionary of hit, miss, eviction and invalidation counts and the current size.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self.entries),
+        }
+
+    def _footprint(self, path):
+        """
+        Find the cells whose blocking would invalidate a path.
+
+        :param path: The Path to inspect.
+        :return: A set of cell indices.
+        """
+        index = self.map.index
+        if isinstance(path, CompactPath):
+            # Every cell each segment's line of sight depends on, including both cells
+            # beside any corner it passes through, which the expanded nodes leave out
+            waypoints = path.get_waypoints()
+            footprint = {index(x, y) for x, y in waypoints}
+            for (x0, y0), (x1, y1) in zip(waypoints, waypoints[1:]):
+                footprint.update(index(x, y) for x, y in line_cells(x0, y0, x1, y1))
+            return footprint
+        footprint = {index(node.x, node.y) for node in path.nodes}
+        for a, b in zip(path.nodes, path.nodes[1:]):
+            if a.x != b.x and a.y != b.y:
+                # A diagonal step also needs both cells beside it to stay free
+                footprint.add(index(b.x, a.y))
+                footprint.add(index(a.x, b.y))
+        return footprint
+
+    def _discard(self, key):
+        """
+        Remove one entry and its cell references.
+
+        :param key: The query key.
+        """
+        del self.entries[key]
+        for index in self.footprints.pop(key):
+            keys = self.cells[index]
+            keys.discard(key)
+            if not keys:
+                del self.cells[index]
+
+    def _cell_changed(self, index, blocked):
+        """
+        Map listener: drop the entries invalidated by an obstacle change.
+
+        :param index: The index of the changed cell, or None for a bulk change.
+        :param blocked: Whether the cell is now blocked.
+        """
+        if index is None or not blocked:
+            self.clear()
+            return
+        for key in list(self.cells.get(index, ())):
+            self._discard(key)
+            self.invalidations += 1
+        self.version = self.map.version
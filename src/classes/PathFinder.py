@@ -1,20 +1,121 @@
-from .Node import Node
 from .Path import Path
-import heapq
+from .CompactPath import CompactPath
+from .PathSmoother import PathSmoother
+from .SearchState import SearchState, OPEN, CLOSED
+from .SearchStats import SearchStats
+from .SearchProfiler import SearchProfiler
+from .SearchStep import SearchStep
+from .OpenList import OpenList
+from .JumpPointSearch import JumpPointSearch
+from .PathCache import PathCache
+from .IncrementalPlanner import IncrementalPlanner
+from .HierarchicalPlanner import HierarchicalPlanner
+from .AnytimePlanner import AnytimePlanner
+from .BidirectionalSearch import BidirectionalSearch
+from .DistanceField import DistanceField
+from .NeighbourTable import DIAGONAL_COST
+from array import array
+import time
+
+STRATEGIES = ('astar', 'jps', 'incremental', 'hierarchical', 'anytime', 'bidirectional')  # search algorithms selectable on a PathFinder
+PATH_FORMATS = ('nodes', 'compact', 'smooth')  # forms of the Path returned by searches
+BUDGET_CHECK_INTERVAL = 256  # expansions between checks of the wall-clock budget
+NEAREST_HEURISTIC_GOALS = 16  # most goals search_nearest estimates distances to, beyond which it runs Dijkstra
+INFINITY = float('inf')
 
 class PathFinder:
     """
     Provides functionalities for pathfinding algorithms.
+
+    Per-search data (g-scores, parent indices and open/closed flags) is kept in a
+    SearchState of flat arrays indexed the same way as the map, so the search runs over
+    contiguous buffers instead of attributes on individual node objects.
+
+    On maps with cell costs, each step costs its usual amount times the cost of the cell
+    it enters, and the distance heuristics are scaled by the cheapest cell cost so they
+    stay admissible.
+
+    A* can trade optimality for speed: with a ``weight`` above 1 the heuristic is
+    inflated, which finds a path far sooner at a cost of at most ``weight`` times the
+    optimum. The 'anytime' strategy starts from that weight and keeps improving the path
+    towards the optimum while its budget allows. ``max_expansions`` and ``time_limit``
+    bound the work done per query; the ``bound`` of the resulting Path says how far from
+    optimal it may be.
+
+    The counters of the most recent search are kept in ``stats``, and every callable in
+    ``observers`` is called with them after each search, which is how a SearchMetrics
+    collects aggregates. With ``profile`` set, A* also measures how its time divides
+    between the heuristic, the open list and neighbour generation.
+
+    ``path_format`` selects the form of the returned paths: a Path holding every node,
+    a CompactPath holding only the cells where the path turns, or a CompactPath
+    straightened by a PathSmoother into any-angle segments between waypoints.
     """
-    def __init__(self, map, allow_diagonal=False):
+    def __init__(self, map, allow_diagonal=False, strategy='astar', cache_size=0, landmarks=0,
+                 weight=1.0, max_expansions=None, time_limit=None, profile=False, path_format='nodes',
+                 cluster_size=16, entrance_spacing=6):
         """
         Initialise the pathfinder with a map and an option to allow diagonal movement (Chebyshev vs. Manhattan).
 
         :param map: The map object consisting of nodes.
         :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+        :param strategy: The search algorithm used by search(), one of STRATEGIES.
+        :param cache_size: Number of search() results to keep in a PathCache, 0 to disable caching.
+        :param landmarks: Number of landmarks for the ALT heuristic used by A*, 0 to use the
+                          Manhattan or Chebyshev distance alone.
+        :param weight: Heuristic weight (epsilon) for A*, at least 1; paths cost at most
+                       weight times the optimum. The starting weight for 'anytime'.
+        :param max_expansions: Expansion budget per A* or anytime query, None for no limit.
+        :param time_limit: Wall-clock budget in seconds per A* or anytime query, None for no limit.
+        :param profile: If True, A* times its heuristic, open list and neighbour work in ``stats``.
+        :param path_format: The form of returned paths, one of PATH_FORMATS: 'nodes' for a Path
+                            of every node, 'compact' for a CompactPath of the turns, or
+                            'smooth' for a CompactPath smoothed by string pulling.
+        :param cluster_size: Width and height in cells of the clusters of the 'hierarchical' strategy.
+        :param entrance_spacing: Distance between the entrances the 'hierarchical' strategy places
+                                 along cluster borders. Closer entrances give paths nearer the
+                                 optimum at the cost of a larger abstract graph to search.
         """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        if path_format not in PATH_FORMATS:
+            raise ValueError(f"Unknown path format {path_format!r}, expected one of {PATH_FORMATS}")
+        if not weight >= 1:
+            raise ValueError(f"weight must be at least 1, got {weight}")
+        if cluster_size < 1 or entrance_spacing < 1:
+            raise ValueError(f"cluster_size and entrance_spacing must be at least 1, "
+                             f"got {cluster_size} and {entrance_spacing}")
         self.map = map  # map object containing nodes
         self.allow_diagonal = allow_diagonal  # toggles between Chebyshev and Manhattan distance
+        self.strategy = strategy  # algorithm used by search()
+        self.state = SearchState(map.size)  # generation-stamped per-search arrays
+        self.stats = SearchStats()  # counters from the most recent search
+        self.cache = PathCache(map, cache_size) if cache_size else None  # results of search()
+        self.planner = None  # IncrementalPlanner, created on first use
+        self.hierarchy = None  # HierarchicalPlanner, created on first use
+        self.cluster_size = cluster_size  # cluster width and height of the hierarchy
+        self.entrance_spacing = entrance_spacing  # distance between the hierarchy's border entrances
+        self.anytime_planner = None  # AnytimePlanner, created on first use with default settings
+        self.bidirectional = None  # BidirectionalSearch and its backward state, created on first use
+        self.landmarks = landmarks  # number of ALT landmarks, 0 to disable
+        self.weight = weight  # heuristic inflation of A*, 1 for optimal paths
+        self.max_expansions = max_expansions  # per-query expansion budget
+        self.time_limit = time_limit  # per-query wall-clock budget in seconds
+        self.bound = 1.0  # suboptimality bound of the most recent search's result
+        self.profile = profile  # time the parts of each A* search
+        self.observers = []  # callables given the SearchStats of every search, such as a SearchMetrics
+        self.path_format = path_format  # form of the returned paths
+
+    def close(self):
+        """
+        Detach the path cache and planners from the map, so the map no longer notifies
+        them of edits. The pathfinder must not be used afterwards. A pathfinder that is
+        simply dropped is detached once it is garbage collected.
+        """
+        for listener in (self.cache, self.planner, self.hierarchy):
+            if listener is not None:
+                listener.close()
+        self.cache = self.planner = self.hierarchy = None
 
     def heuristic(self, a, b, allow_diagonal):
         """
@@ -26,17 +127,242 @@ class PathFinder:
         :return: Estimated distance as a float.
         """
         if allow_diagonal:
-            return max(abs(a.x - b.x), abs(a.y - b.y))  # Chebyshev distance
+            return max(abs(a.x - b.x), abs(a.y - b.y)) * self.map.min_cost  # Chebyshev distance
         else:
-            return abs(a.x - b.x) + abs(a.y - b.y)  # Manhattan distance
+            return (abs(a.x - b.x) + abs(a.y - b.y)) * self.map.min_cost  # Manhattan distance
 
     def reset_pathfinding_state(self):
         """
-        Reset the pathfinding state of each node in the map.
+        Reset the pathfinding state of each cell in the map.
+        This is constant time: values from earlier searches are invalidated by
+        starting a new search generation.
+        """
+        self.state.new_search()
+
+    def search(self, start, goal):
+        """
+        Find the path from start to goal with the selected strategy.
+        Results are served from the path cache when one is enabled.
+
+        :param start: The start node.
+        :param goal: The goal node.
+        :return: Path object from start to goal if a path exists.
+        """
+        start_index = self.map.index(start.x, start.y)
+        goal_index = self.map.index(goal.x, goal.y)
+        key = self._cache_key(start_index, goal_index)
+        if key is not None:
+            path = self.cache.get(key)
+            if path is None:
+                path = self._result_path(self._run(start_index, goal_index), goal_index)
+                self.cache.put(key, path)
+            return path
+        return self._result_path(self._run(start_index, goal_index), goal_index)
+
+    def _cache_key(self, start_index, goal_index, strategy=None):
+        """
+        The key of a query in the path cache.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :param strategy: The strategy that answers the query, if not the selected one.
+        :return: The key, or None if the result may not be cached.
+        """
+        # Results cut short by a budget depend on timing, so they are never cached
+        if self.cache is None or self.max_expansions is not None or self.time_limit is not None:
+            return None
+        return start_index, goal_index, self.allow_diagonal, strategy or self.strategy, self.weight, self.path_format
+
+    def search_indices(self, start_index, goal_index):
+        """
+        Find the path between two cells given by flat index, without creating Node objects.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: Tuple of (array of path cell indices, path cost); the array is empty if no
+                 path was found. The suboptimality bound is left in ``self.bound``.
+        """
+        if self._run(start_index, goal_index):
+            return self.path_indices(goal_index), self.state.g(goal_index)
+        return array('i'), 0
+
+    def find_paths(self, pairs, processes=None, chunksize=64):
+        """
+        Solve many independent queries across a pool of worker processes.
+        Each worker has its own search state and maps the grid from shared memory.
+
+        :param pairs: Iterable of (start, goal) pairs, each a Node or an (x, y) tuple.
+        :param processes: Number of worker processes, defaults to the number of CPUs.
+        :param chunksize: Number of queries sent to a worker at a time.
+        :return: List of Path objects, in the same order as the pairs.
+        """
+        from .ParallelSearch import ParallelSearch  # multiprocessing is only loaded when needed
+        return ParallelSearch(self, processes, chunksize).find_paths(pairs)
+
+    def iter_paths(self, pairs, processes=None, chunksize=64):
+        """
+        Streaming version of find_paths, yielding each Path as soon as it is available.
+
+        :param pairs: Iterable of (start, goal) pairs, each a Node or an (x, y) tuple.
+        :param processes: Number of worker processes, defaults to the number of CPUs.
+        :param chunksize: Number of queries sent to a worker at a time.
+        :return: Iterator of Path objects, in the same order as the pairs.
+        """
+        from .ParallelSearch import ParallelSearch
+        return ParallelSearch(self, processes, chunksize).iter_paths(pairs)
+
+    def search_nearest(self, start, goals):
+        """
+        Find the path to whichever of several goals is cheapest to reach, in one search
+        that stops at the first goal it reaches.
+
+        :param start: The start node.
+        :param goals: Iterable of goal cells, each a Node or an (x, y) tuple.
+        :return: Path object from start to the nearest goal, or an empty Path if no goal
+                 can be reached.
+        """
+        started = time.perf_counter()
+        goal_index = self._nearest(self.map.index(start.x, start.y), {self._point_index(goal) for goal in goals})
+        self._record(goal_index != -1, started)
+        if goal_index == -1:
+            return self.make_path([], 0)
+        return self.reconstruct_path(goal_index)
+
+    def distance_field(self, sources, reverse=False):
+        """
+        Compute the distance from the nearest of one or more cells to every cell of the map.
+
+        :param sources: Iterable of source cells, each a Node or an (x, y) tuple.
+        :param reverse: If True, measure the cost from every cell to its nearest source instead.
+        :return: A DistanceField, from which the path to any cell can be read without searching.
+        """
+        return DistanceField(self.map, self.allow_diagonal, [self._point_index(source) for source in sources], reverse)
+
+    def _point_index(self, point):
+        """
+        Convert a Node or (x, y) tuple into a flat map index.
+
+        :param point: A Node or an (x, y) tuple.
+        :return: The index of the cell in the map arrays.
+        """
+        x, y = (point.x, point.y) if hasattr(point, 'x') else point
+        return self.map.index(x, y)
+
+    def _run(self, start_index, goal_index):
+        """
+        Run the selected strategy, leaving the result in the search state and its
+        suboptimality bound in ``self.bound``.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if the goal was reached.
+        """
+        started = time.perf_counter()
+        return self._record(self._dispatch(start_index, goal_index), started)
+
+    def _dispatch(self, start_index, goal_index):
+        """
+        Run the search of the selected strategy.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if the goal was reached.
+        """
+        self.bound = 1.0  # searches without an optimality guarantee overwrite this
+        if self.strategy == 'jps' and self.map.costs is None:
+            return JumpPointSearch(self).search(start_index, goal_index)
+        if self.strategy == 'incremental':
+            if self.planner is None:
+                self.planner = IncrementalPlanner(self)
+            return self.planner.plan(start_index, goal_index)
+        if self.strategy == 'hierarchical':
+            if self.hierarchy is None:
+                self.hierarchy = HierarchicalPlanner(self, self.cluster_size, self.entrance_spacing)
+            found = self.hierarchy.plan(start_index, goal_index)
+            if found:
+                self.bound = INFINITY  # abstract paths carry no optimality guarantee
+            return found
+        if self.strategy == 'anytime':
+            if self.anytime_planner is None:
+                self.anytime_planner = AnytimePlanner(self)
+            return self.anytime_planner.plan(start_index, goal_index)
+        if self.strategy == 'bidirectional':
+            return self._bidirectional(start_index, goal_index)
+        return self._a_star(start_index, goal_index)
+
+    def _record(self, found, started):
+        """
+        Complete the stats of the search that just ended and pass them to the observers.
+
+        :param found: Whether the search reached its goal.
+        :param started: The perf_counter reading taken when the search began.
+        :return: found, unchanged.
+        """
+        stats = self.stats
+        stats.found = bool(found)
+        stats.elapsed = time.perf_counter() - started
+        for observer in self.observers:
+            observer(stats)
+        return found
+
+    def _result_path(self, found, goal_index):
+        """
+        Build the Path for the result of the last search.
+
+        :param found: Whether the search reached the goal.
+        :param goal_index: The index of the goal cell.
+        :return: The Path to the goal, or an empty Path.
+        """
+        if found:
+            return self.reconstruct_path(goal_index)
+        return self.make_path([], 0, self.bound)
+
+    def jump_point_search(self, start, goal):
+        """
+        Perform Jump Point Search to find the path from start to goal.
+        Gives paths of the same cost as a_star_search while expanding far fewer
+        nodes on open, uniform-cost grids. Jump Point Search relies on every cell
+        costing the same, so on maps with cell costs this falls back to A*.
+
+        :param start: The start node.
+        :param goal: The goal node.
+        :return: Path object from start to goal if a path exists.
         """
-        for row in self.map.nodes:
-            for node in row:
-                node.reset()
+        goal_index = self.map.index(goal.x, goal.y)
+        if self.map.costs is not None:
+            return self.a_star_search(start, goal)
+        self.bound = 1.0
+        started = time.perf_counter()
+        found = JumpPointSearch(self).search(self.map.index(start.x, start.y), goal_index)
+        return self._result_path(self._record(found, started), goal_index)
+
+    def bidirectional_search(self, start, goal):
+        """
+        Perform bidirectional A*, searching from both ends at once and joining the halves
+        where they meet. Gives paths of the same cost as a_star_search, usually expanding
+        fewer nodes on long queries.
+
+        :param start: The start node.
+        :param goal: The goal node.
+        :return: Path object from start to goal if a path exists.
+        """
+        goal_index = self.map.index(goal.x, goal.y)
+        self.bound = 1.0
+        started = time.perf_counter()
+        found = self._bidirectional(self.map.index(start.x, start.y), goal_index)
+        return self._result_path(self._record(found, started), goal_index)
+
+    def _bidirectional(self, start_index, goal_index):
+        """
+        Run bidirectional A*, reusing the backward search state between queries.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if the goal was reached.
+        """
+        if self.bidirectional is None:
+            self.bidirectional = BidirectionalSearch(self)
+        return self.bidirectional.search(start_index, goal_index)
 
     def a_star_search(self, start, goal):
         """
@@ -47,33 +373,373 @@ class PathFinder:
         :param goal: The goal node.
         :return: Path object from start to goal if a path exists.
         """
-        open_set = []
-        heapq.heappush(open_set, (0, start))
-        start.g = 0
-        start.h = self.heuristic(start, goal, self.allow_diagonal)
-        start.f = start.h
-        start.in_open_set = True
-
-        while open_set:
-            current = heapq.heappop(open_set)[1]
-            if current == goal:
-                return self.reconstruct_path(current)
-            current.in_closed_set = True
-            for neighbour in self.get_neighbours(current):
-                if neighbour.block or neighbour.in_closed_set:
-                    continue
-                diagonal = abs(neighbour.x - current.x) == 1 and abs(neighbour.y - current.y) == 1
-                cost = 1.414 if diagonal and self.allow_diagonal else 1
-                tentative_g_score = current.g + cost
-                if tentative_g_score < neighbour.g:
-                    neighbour.parent = current
-                    neighbour.g = tentative_g_score
-                    neighbour.h = self.heuristic(neighbour, goal, self.allow_diagonal)
-                    neighbour.f = neighbour.g + neighbour.h
-                    if not neighbour.in_open_set:
-                        heapq.heappush(open_set, (neighbour.f, neighbour))
-                        neighbour.in_open_set = True
-        return Path()
+        goal_index = self.map.index(goal.x, goal.y)
+        started = time.perf_counter()
+        found = self._a_star(self.map.index(start.x, start.y), goal_index)
+        return self._result_path(self._record(found, started), goal_index)
+
+    def search_steps(self, start, goal, step_size=100):
+        """
+        Run A* as a resumable search that reports its progress every few expansions.
+        Each step gives the cells opened and closed since the previous one, so the
+        search can be spread over several frames or time slices, or abandoned early by
+        closing the generator. The last step has ``done`` set and carries the Path.
+
+        Like search(), the search is answered from the path cache when one is enabled,
+        in a single step without opening or closing any cells, and its result is cached.
+        Only A* results are shared this way, whichever strategy search() uses.
+
+        :param start: The start node.
+        :param goal: The goal node.
+        :param step_size: Number of expansions between steps.
+        :return: Iterator of SearchStep objects.
+        """
+        if step_size < 1:
+            raise ValueError("step_size must be at least 1")
+        start_index = self.map.index(start.x, start.y)
+        goal_index = self.map.index(goal.x, goal.y)
+        key = self._cache_key(start_index, goal_index, 'astar')  # whatever strategy is selected
+        if key is not None:
+            path = self.cache.get(key)
+            if path is not None:
+                yield SearchStep((), (), 0, True, bool(path.nodes), path)
+                return
+        steps = self._a_star_steps(start_index, goal_index, step_size)
+        elapsed = 0.0  # time spent searching, not counting the time between steps
+        while True:
+            started = time.perf_counter()
+            step = next(steps)
+            elapsed += time.perf_counter() - started
+            if step.done:
+                self._record(step.found, time.perf_counter() - elapsed)
+                step.path = self._result_path(step.found, goal_index)
+                if key is not None:
+                    self.cache.put(key, step.path)
+            yield step
+            if step.done:
+                return
+
+    def _a_star(self, start_index, goal_index):
+        """
+        A* search between two cells given by flat index, run to completion.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :return: True if the goal was reached.
+        """
+        for step in self._a_star_steps(start_index, goal_index):
+            pass
+        return step.found
+
+    def _a_star_steps(self, start_index, goal_index, step_size=None):
+        """
+        A* search between two cells given by flat index, as a generator.
+
+        Cells whose g-score improves while they are queued are re-inserted into the
+        open list and the outdated entries are skipped when popped. The work done is
+        recorded in ``self.stats``; the counters are kept in locals and only written
+        out when a step is yielded, so counting costs next to nothing. When profiling,
+        the open list and heuristic are replaced by timed wrappers. With a step size, a SearchStep with the open and
+        closed cells changed since the previous step is yielded after every step_size
+        expansions; without one, only the final step is yielded and no deltas are kept.
+
+        :param start_index: The index of the start cell.
+        :param goal_index: The index of the goal cell.
+        :param step_size: Number of expansions between steps, or None to run to the end.
+        :return: Iterator of SearchStep objects, the last of which has done set.
+        """
+        self.bound = 1.0
+        state = self.state
+        state.new_search()
+        generation = state.generation
+        stamps = state.stamps
+        g_scores = state.g_scores
+        parents = state.parents
+        flags = state.flags
+        width = self.map.width
+        table = self.map.neighbour_table
+        masks = table.masks
+        moves = table.moves[self.allow_diagonal]
+        allow_diagonal = self.allow_diagonal
+        costs = self.map.costs
+        min_cost = self.map.min_cost
+        goal_y, goal_x = divmod(goal_index, width)
+        start_y, start_x = divmod(start_index, width)
+        stats = self.stats = SearchStats()
+        # Landmark estimates for every cell, or None to compute the distance inline
+        heuristic = self.map.landmarks(allow_diagonal, self.landmarks).heuristic(goal_index) if self.landmarks else None
+        weight = self.weight
+        # Budgets are only checked when the expansion count reaches the next checkpoint
+        max_expansions = self.max_expansions
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        checkpoint = self._next_checkpoint(0) if max_expansions is not None or deadline is not None else -1
+
+        open_list = OpenList()
+        push, pop = open_list.push, open_list.pop
+        heap = open_list.heap
+        profile = self.profile
+        if profile:
+            profiler = SearchProfiler(stats)
+            push, pop = profiler.heap(push, pop)
+            if heuristic is None:
+                def estimate(index):
+                    y, x = divmod(index, width)
+                    dx, dy = abs(x - goal_x), abs(y - goal_y)
+                    return (max(dx, dy) if allow_diagonal else dx + dy) * min_cost
+                heuristic = profiler.heuristic(estimate)
+            else:
+                heuristic = profiler.heuristic(heuristic)
+            busy, resumed = 0.0, time.perf_counter()  # time spent inside this generator
+        state.touch(start_index)
+        g_scores[start_index] = 0
+        flags[start_index] = OPEN
+        if heuristic is None:
+            dx, dy = abs(start_x - goal_x), abs(start_y - goal_y)
+            start_h = (max(dx, dy) if allow_diagonal else dx + dy) * min_cost
+        else:
+            start_h = heuristic[start_index]
+        if start_h == float('inf'):
+            # The landmarks show the goal is in another region, so no search is needed
+            yield SearchStep([], [], 0, True, False)
+            return
+        push(weight * start_h, start_h, start_index)
+        stats.pushes += 1
+        checked = 0  # neighbour cells checked
+        peak = 1  # largest open list size; it can only grow during an expansion, so is checked after each
+        closed = []  # cells expanded since the last step
+        reported = set()  # open cells already included in a step
+        remaining = step_size  # expansions left until the next step
+
+        found = exhausted = False
+        while open_list:
+            current = pop()
+            if flags[current] == CLOSED:
+                stats.stale += 1
+                continue
+            if current == goal_index:
+                found = True
+                break
+            if stats.expanded == checkpoint:
+                if (max_expansions is not None and checkpoint >= max_expansions) or \
+                        (deadline is not None and time.perf_counter() >= deadline):
+                    exhausted = True
+                    break
+                checkpoint = self._next_checkpoint(checkpoint)
+            flags[current] = CLOSED
+            stats.expanded += 1
+            current_g = g_scores[current]
+            neighbour_moves = moves[masks[current]]
+            checked += len(neighbour_moves)
+            for offset, cost in neighbour_moves:
+                neighbour = current + offset
+                if stamps[neighbour] != generation:
+                    # First visit in this search: discard values from older searches
+                    stamps[neighbour] = generation
+                    g_scores[neighbour] = float('inf')
+                    parents[neighbour] = -1
+                    flags[neighbour] = 0
+                if costs is not None:
+                    cost *= costs[neighbour]
+                tentative_g_score = current_g + cost
+                if tentative_g_score < g_scores[neighbour]:
+                    flag = flags[neighbour]
+                    if flag == OPEN:
+                        stats.decreased += 1
+                    elif flag == CLOSED:
+                        stats.reopened += 1
+                    parents[neighbour] = current
+                    g_scores[neighbour] = tentative_g_score
+                    flags[neighbour] = OPEN
+                    if heuristic is None:
+                        neighbour_y, neighbour_x = divmod(neighbour, width)
+                        dx, dy = abs(neighbour_x - goal_x), abs(neighbour_y - goal_y)
+                        h = (max(dx, dy) if allow_diagonal else dx + dy) * min_cost
+                    else:
+                        h = heuristic[neighbour]
+                    push(tentative_g_score + weight * h, h, neighbour)
+                    stats.pushes += 1
+            if len(heap) > peak:
+                peak = len(heap)
+            if step_size:
+                closed.append(current)
+                remaining -= 1
+                if not remaining:
+                    stats.neighbours, stats.heap_peak = checked, peak
+                    if profile:
+                        busy += time.perf_counter() - resumed
+                    yield SearchStep(self._newly_opened(closed, reported), closed, stats.expanded)
+                    if profile:
+                        resumed = time.perf_counter()
+                    closed, remaining = [], step_size
+        if found and weight != 1:
+            # The inflated heuristic may settle the goal before its path is optimal, or
+            # before an improved ancestor reaches it, so measure the actual path and
+            # compare it with the lowest unweighted f-score still open
+            cost = g_scores[goal_index] = self.path_cost(self.path_indices(goal_index))
+            lower = open_list.lower_bound(g_scores, flags)
+            self.bound = max(1.0, min(weight, cost / lower)) if lower > 0 else 1.0
+        elif exhausted:
+            if stamps[goal_index] == generation and g_scores[goal_index] < INFINITY:
+                # The goal has been generated, so return the best path to it so far with
+                # the bound proven by the lowest f-score still open
+                found = True
+                cost = g_scores[goal_index] = self.path_cost(self.path_indices(goal_index))
+                lower = open_list.lower_bound(g_scores, flags)
+                self.bound = max(1.0, cost / lower) if lower > 0 else INFINITY
+            else:
+                self.bound = INFINITY  # not proven unreachable, the budget ran out first
+        stats.neighbours, stats.heap_peak = checked, peak
+        if profile:
+            busy += time.perf_counter() - resumed
+            stats.neighbour_time = max(0.0, busy - stats.heuristic_time - stats.heap_time)
+        if step_size:
+            yield SearchStep(self._newly_opened(closed, reported), closed, stats.expanded, True, found)
+        else:
+            yield SearchStep([], [], stats.expanded, True, found)
+
+    def _newly_opened(self, closed, reported):
+        """
+        Find the cells opened by a batch of expansions that no earlier step reported.
+        Only cells next to an expanded cell can have been opened, so the open list
+        itself does not need to record anything while the search runs.
+
+        :param closed: Indices of the cells expanded in the batch.
+        :param reported: Set of cells already reported as opened; updated in place.
+        :return: List of indices of newly opened cells.
+        """
+        table = self.map.neighbour_table
+        masks, moves = table.masks, table.moves[self.allow_diagonal]
+        opened = []
+        for current in closed:
+            for offset, _ in moves[masks[current]]:
+                neighbour = current + offset
+                if neighbour not in reported and self.state.flag(neighbour) == OPEN:
+                    reported.add(neighbour)
+                    opened.append(neighbour)
+        return opened
+
+    def _nearest(self, start_index, goal_indices):
+        """
+        A* towards a set of goals. The heuristic is the distance to the closest goal, which
+        is still consistent, so the first goal taken from the open list is the cheapest one
+        to reach. With more than NEAREST_HEURISTIC_GOALS goals, estimating would cost more
+        than it saves and the search runs as Dijkstra's algorithm instead.
+
+        :param start_index: The index of the start cell.
+        :param goal_indices: Set of goal cell indices.
+        :return: The index of the goal reached, or -1 if none can be reached.
+        """
+        self.bound = 1.0
+        state = self.state
+        state.new_search()
+        generation = state.generation
+        stamps, g_scores, parents, flags = state.stamps, state.g_scores, state.parents, state.flags
+        map = self.map
+        width = map.width
+        table = map.neighbour_table
+        masks, moves = table.masks, table.moves[self.allow_diagonal]
+        costs = map.costs
+        min_cost = map.min_cost
+        allow_diagonal = self.allow_diagonal
+        stats = self.stats = SearchStats()
+        targets = [divmod(goal, width) for goal in goal_indices] if len(goal_indices) <= NEAREST_HEURISTIC_GOALS else []
+
+        def estimate(index):
+            y, x = divmod(index, width)
+            if allow_diagonal:
+                return min((max(abs(x - goal_x), abs(y - goal_y)) for goal_y, goal_x in targets), default=0) * min_cost
+            return min((abs(x - goal_x) + abs(y - goal_y) for goal_y, goal_x in targets), default=0) * min_cost
+
+        open_list = OpenList()
+        push, pop = open_list.push, open_list.pop
+        state.touch(start_index)
+        g_scores[start_index] = 0
+        flags[start_index] = OPEN
+        h = estimate(start_index)
+        push(h, h, start_index)
+        stats.pushes += 1
+        heap = open_list.heap
+        checked, peak = 0, 1
+        while open_list:
+            current = pop()
+            if flags[current] == CLOSED:
+                stats.stale += 1
+                continue
+            if current in goal_indices:
+                break
+            flags[current] = CLOSED
+            stats.expanded += 1
+            current_g = g_scores[current]
+            neighbour_moves = moves[masks[current]]
+            checked += len(neighbour_moves)
+            for offset, cost in neighbour_moves:
+                neighbour = current + offset
+                if stamps[neighbour] != generation:
+                    stamps[neighbour] = generation
+                    g_scores[neighbour] = float('inf')
+                    parents[neighbour] = -1
+                    flags[neighbour] = 0
+                if costs is not None:
+                    cost *= costs[neighbour]
+                tentative_g_score = current_g + cost
+                if tentative_g_score < g_scores[neighbour]:
+                    flag = flags[neighbour]
+                    if flag == OPEN:
+                        stats.decreased += 1
+                    elif flag == CLOSED:
+                        stats.reopened += 1
+                    parents[neighbour] = current
+                    g_scores[neighbour] = tentative_g_score
+                    flags[neighbour] = OPEN
+                    h = estimate(neighbour)
+                    push(tentative_g_score + h, h, neighbour)
+                    stats.pushes += 1
+            if len(heap) > peak:
+                peak = len(heap)
+        else:
+            current = -1
+        stats.neighbours, stats.heap_peak = checked, peak
+        return current
+
+    def _next_checkpoint(self, expanded):
+        """
+        The expansion count at which the search budgets are checked next.
+
+        :param expanded: The current expansion count.
+        :return: The next expansion count to stop and check at.
+        """
+        checkpoint = expanded + BUDGET_CHECK_INTERVAL
+        if self.max_expansions is not None:
+            checkpoint = min(checkpoint, self.max_expansions)
+        return checkpoint
+
+    def path_cost(self, cells):
+        """
+        Calculate the movement cost of a path.
+
+        :param cells: Sequence of adjacent cell indices from start to goal.
+        :return: The sum of the step costs, including the costs of the cells entered.
+        """
+        width = self.map.width
+        costs = self.map.costs
+        total = 0
+        for previous, index in zip(cells, cells[1:]):
+            y, x = divmod(index, width)
+            previous_y, previous_x = divmod(previous, width)
+            step = DIAGONAL_COST if x != previous_x and y != previous_y else 1
+            total += step * costs[index] if costs is not None else step
+        return total
+
+    def get_neighbour_indices(self, index):
+        """
+        Retrieve the flat indices of all possible neighbours of a cell considering diagonal movement.
+        Diagonal moves that would cut the corner of a blocked cell are excluded.
+
+        :param index: The index of the cell for which neighbours are to be found.
+        :return: A list of neighbouring cell indices.
+        """
+        table = self.map.neighbour_table
+        return [index + offset for offset, _ in table.moves[self.allow_diagonal][table.masks[index]]]
 
     def get_neighbours(self, node):
         """
@@ -82,38 +748,71 @@ class PathFinder:
         :param node: The node for which neighbours are to be found.
         :return: A list of neighbouring nodes.
         """
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        if self.allow_diagonal:
-            directions.extend([(-1, -1), (-1, 1), (1, -1), (1, 1)])
-
-        neighbours = []
-        for dx, dy in directions:
-            nx, ny = node.x + dx, node.y + dy
-            if 0 <= nx < self.map.width and 0 <= ny < self.map.height:
-                next_node = self.map.get_node(nx, ny)
-                if self.allow_diagonal and abs(dx) == 1 and abs(dy) == 1:
-                    adjacent1 = self.map.get_node(node.x + dx, node.y)
-                    adjacent2 = self.map.get_node(node.x, node.y + dy)
-                    if not adjacent1.block and not adjacent2.block:
-                        neighbours.append(next_node)
-                elif not next_node.block:
-                    neighbours.append(next_node)
-        return neighbours
+        return [self.map.node_at(index) for index in self.get_neighbour_indices(node.index)]
+
+    def path_indices(self, current):
+        """
+        Trace the parent indices of the last search back from a cell to the start.
+        A parent that is not adjacent (such as a jump point) is joined to its child by
+        the straight or diagonal line of cells between them.
+
+        :param current: The index of the ending cell of the path.
+        :return: An array of cell indices from start to the given cell.
+        """
+        width = self.map.width
+        cells = array('i')
+        while current != -1:
+            cells.append(current)
+            parent = self.state.parent(current)
+            if parent == -1:
+                break
+            y, x = divmod(current, width)
+            parent_y, parent_x = divmod(parent, width)
+            step = ((parent_x > x) - (parent_x < x)) + ((parent_y > y) - (parent_y < y)) * width
+            current += step
+            while current != parent:
+                cells.append(current)
+                current += step
+        cells.reverse()
+        return cells
 
     def reconstruct_path(self, current):
         """
-        Reconstruct the path from the goal node to the start node using parent references.
+        Reconstruct the path from the goal cell to the start cell using parent indices.
 
-        :param current: The ending node of the path.
+        :param current: The index of the ending cell of the path.
         :return: A path object tracing from start to goal.
         """
-        path = Path()
-        while current:
-            path.add_node(current)
-            current = current.parent
-        path.nodes.reverse()
-        return path
-    
+        return self.make_path(self.path_indices(current), self.state.g(current), self.bound)
+
+    def make_path(self, cells, cost, bound=1.0):
+        """
+        Build a path in the pathfinder's ``path_format`` from the cells of a grid path.
+
+        :param cells: Sequence of adjacent cell indices from start to goal.
+        :param cost: The movement cost of the path.
+        :param bound: The suboptimality bound of the path.
+        :return: A Path, or a CompactPath for the 'compact' and 'smooth' formats.
+        """
+        if self.path_format == 'smooth':
+            waypoints, cost = PathSmoother(self.map).smooth(cells)
+            return CompactPath(self.map, waypoints, cost, bound, self.allow_diagonal)
+        if self.path_format == 'compact':
+            return CompactPath.from_cells(self.map, cells, cost, bound, self.allow_diagonal)
+        node_at = self.map.node_at
+        return Path([node_at(index) for index in cells], cost, bound)
+
+    def smooth_path(self, path):
+        """
+        Straighten a path found earlier by string pulling over the map's obstacles.
+
+        :param path: A Path, or a CompactPath of a grid path.
+        :return: A CompactPath of any-angle segments, costing no more than the original.
+        """
+        cells = array('i', path.cells()) if isinstance(path, CompactPath) else [node.index for node in path.nodes]
+        waypoints, cost = PathSmoother(self.map).smooth(cells)
+        return CompactPath(self.map, waypoints, cost, path.bound, self.allow_diagonal)
+
     def toggle_metric(self):
         """
         Toggle the metric used for calculating distances between allowing or disallowing diagonal movements.
@@ -0,0 +1,443 @@
+"""
+An asyncio front end that answers path queries against named maps.
+
+Searches run in a pool of worker processes (or threads), each keeping its own
+PathFinder and search state per map, so concurrent queries never share mutable state.
+Maps are shared with the workers as memory-mapped binary map files (see MapFile).
+
+Identical queries that arrive while a search for them is still running are merged
+into that search rather than started again. The number of searches queued or running
+is capped, and requests over the cap are refused at once with ServiceBusy instead of
+piling up; each request may also carry a deadline.
+
+The service can be used in-process by awaiting PathService.find_path, or over a Unix
+socket with serve_unix and PathClient. The socket protocol is one JSON object per
+line in each direction; responses carry the ``id`` of their request and may arrive
+out of order.
+"""
+
+from .Path import Path
+from .CompactPath import CompactPath
+from .PathFinder import PathFinder, STRATEGIES, PATH_FORMATS
+from .MapFile import share_map, load_map
+from array import array
+from collections import namedtuple, Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import json
+import mmap
+import os
+import threading
+import time
+
+INFINITY = float('inf')
+LINE_LIMIT = 1 << 24  # longest protocol line in bytes; a path of n cells takes about 12n bytes
+WORKER_PATH_FINDERS = 16  # PathFinders each worker keeps, least recently used dropped first
+
+_worker = threading.local()  # PathFinders of the current worker process or thread
+
+MapEntry = namedtuple('MapEntry', 'map filename temporary serial')
+
+
+class ServiceBusy(RuntimeError):
+    """
+    Raised when a request would exceed the number of searches a PathService may queue.
+    """
+
+
+def _search(filename, serial, allow_diagonal, strategy, start, goal, deadline, path_format):
+    """
+    Worker task: solve one query with this worker's own PathFinder for the map,
+    mapping the map file on first use.
+
+    :param filename: Path of the shared map file.
+    :param serial: Serial number of the map's registration, so a file name reused for
+                   another map is never confused with an earlier one.
+    :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+    :param strategy: The search algorithm to use.
+    :param start: The index of the start cell.
+    :param goal: The index of the goal cell.
+    :param deadline: time.time() by which the search must end, or None for no limit.
+    :param path_format: 'nodes' to return every cell of the path, 'compact' or 'smooth'
+                        to return the waypoints of the path in that format.
+    :return: Tuple of (array of path cell or waypoint indices, path cost, suboptimality bound).
+    """
+    path_finders = getattr(_worker, 'path_finders', None)
+    if path_finders is None:
+        path_finders = _worker.path_finders = {}
+    key = (serial, allow_diagonal, strategy)
+    path_finder = path_finders.pop(key, None)
+    if path_finder is None:
+        path_finder = PathFinder(load_map(filename, access=mmap.ACCESS_READ), allow_diagonal, strategy)
+        if len(path_finders) >= WORKER_PATH_FINDERS:
+            # Also unmaps replaced maps, whose files are only freed once no worker maps them
+            del path_finders[next(iter(path_finders))]
+    path_finders[key] = path_finder  # reinserted to keep the dictionary in least recently used order
+    if deadline is not None:
+        time_limit = deadline - time.time()
+        if time_limit <= 0:
+            # Waited in the queue past its deadline: nobody is waiting for the result
+            return array('i'), 0, INFINITY
+        path_finder.time_limit = time_limit
+    else:
+        path_finder.time_limit = None
+    cells, cost = path_finder.search_indices(start, goal)
+    if path_format != 'nodes' and len(cells):
+        path_finder.path_format = path_format
+        path = path_finder.make_path(cells, cost, path_finder.bound)
+        return path.waypoints, path.cost, path.bound
+    return cells, cost, path_finder.bound
+
+
+class PathService:
+    """
+    Serves path queries on named maps from a pool of workers, merging identical
+    concurrent queries and refusing work beyond a fixed queue size.
+
+    A query is identified by its map, start, goal, movement mode, strategy and path
+    format (see PathFinder.path_format; compact paths are much cheaper to send). While a
+    search for a query is running, further requests for it wait on the same search.
+    Requests with a deadline give up with TimeoutError when it passes; the search they
+    started is also given the remaining time as its ``time_limit``, so a joined request
+    may receive a result cut short by an earlier request's deadline (an empty path or
+    one whose ``bound`` is not 1).
+
+    Maps are snapshots: the workers see a map as it was when added, so an edited map
+    must be added again.
+    """
+
+    def __init__(self, workers=None, processes=True, max_pending=256):
+        """
+        Initialise the service and its worker pool.
+
+        :param workers: Number of workers, defaults to the number of CPUs.
+        :param processes: If True the workers are processes, which search in parallel;
+                          otherwise they are threads, which share the interpreter and
+                          suit in-process use and testing.
+        :param max_pending: Most searches queued or running at once; requests that would
+                            start another are refused with ServiceBusy.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.executor = executor(self.workers)
+        self.max_pending = max_pending
+        self.maps = {}  # name -> MapEntry
+        self.inflight = {}  # query key -> future of the running search
+        self.running = Counter()  # map serial -> searches pending on that map
+        self.retired = {}  # map serial -> temporary file of a removed map to delete once its searches end
+        self.serial = 0  # number of maps added so far
+        self.requests = 0  # queries received
+        self.searches = 0  # searches started
+        self.coalesced = 0  # queries answered by a search started for an identical one
+        self.rejected = 0  # queries refused because max_pending searches were pending
+        self.timeouts = 0  # queries that passed their deadline
+
+    def add_map(self, name, map):
+        """
+        Make a map available to queries under a name, replacing any map of that name.
+
+        :param name: The name queries will use.
+        :param map: The Map to serve.
+        """
+        filename, temporary = share_map(map)
+        self.remove_map(name)
+        self.serial += 1
+        self.maps[name] = MapEntry(map, filename, temporary, self.serial)
+
+    def remove_map(self, name):
+        """
+        Stop serving a map. Searches already pending on it still complete.
+
+        :param name: The name the map was added under.
+        """
+        entry = self.maps.pop(name, None)
+        if entry is not None and entry.temporary:
+            if self.running[entry.serial]:
+                self.retired[entry.serial] = entry.filename
+            else:
+                os.unlink(entry.filename)
+
+    async def find_path(self, name, start, goal, allow_diagonal=False, strategy='astar', deadline=None,
+                        path_format='nodes'):
+        """
+        Find a path on a named map.
+
+        :param name: The name of the map.
+        :param start: The start cell, a Node or an (x, y) tuple.
+        :param goal: The goal cell, a Node or an (x, y) tuple.
+        :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+        :param strategy: The search algorithm to use, one of STRATEGIES.
+        :param deadline: Seconds to wait for the result, None to wait indefinitely.
+        :param path_format: The form of the path, one of PATH_FORMATS.
+        :return: Path object on the named map (a CompactPath unless path_format is
+                 'nodes'), empty if no path was found.
+        """
+        map = self._entry(name).map
+        cells, cost, bound = await self.query(name, start, goal, allow_diagonal, strategy, deadline, path_format)
+        if path_format != 'nodes':
+            return CompactPath(map, cells, cost, bound, allow_diagonal)
+        node_at = map.node_at
+        return Path([node_at(index) for index in cells], cost, bound)
+
+    async def query(self, name, start, goal, allow_diagonal=False, strategy='astar', deadline=None,
+                    path_format='nodes'):
+        """
+        Find a path on a named map as cell indices, without creating Node objects.
+
+        :param name: The name of the map.
+        :param start: The start cell, a Node or an (x, y) tuple.
+        :param goal: The goal cell, a Node or an (x, y) tuple.
+        :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+        :param strategy: The search algorithm to use, one of STRATEGIES.
+        :param deadline: Seconds to wait for the result, None to wait indefinitely.
+        :param path_format: The form of the path, one of PATH_FORMATS.
+        :return: Tuple of (array of path cell indices, or of waypoint indices unless
+                 path_format is 'nodes', path cost, suboptimality bound).
+        """
+        entry = self._entry(name)
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        if path_format not in PATH_FORMATS:
+            raise ValueError(f"Unknown path format {path_format!r}, expected one of {PATH_FORMATS}")
+        start_index, goal_index = self._index(entry.map, start), self._index(entry.map, goal)
+        allow_diagonal = bool(allow_diagonal)
+        self.requests += 1
+        key = (entry.serial, start_index, goal_index, allow_diagonal, strategy, path_format)
+        future = self.inflight.get(key)
+        if future is None:
+            if len(self.inflight) >= self.max_pending:
+                self.rejected += 1
+                raise ServiceBusy(f"{len(self.inflight)} searches are already pending")
+            expires = time.time() + deadline if deadline is not None else None
+            future = asyncio.get_running_loop().run_in_executor(
+                self.executor, _search, entry.filename, entry.serial, allow_diagonal, strategy,
+                start_index, goal_index, expires, path_format)
+            self.inflight[key] = future
+            self.running[entry.serial] += 1
+            self.searches += 1
+            future.add_done_callback(lambda _: self._finished(key))
+        else:
+            self.coalesced += 1
+        try:
+            # Shielded so that a request giving up does not cancel a search others wait on
+            return await asyncio.wait_for(asyncio.shield(future), deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _finished(self, key):
+        """
+        Forget a completed search, deleting its map file if the map was removed meanwhile.
+
+        :param key: The query key of the search.
+        """
+        del self.inflight[key]
+        serial = key[0]
+        self.running[serial] -= 1
+        if not self.running[serial]:
+            del self.running[serial]
+            if serial in self.retired:
+                os.unlink(self.retired.pop(serial))
+
+    def _entry(self, name):
+        """
+        Look up a named map.
+
+        :param name: The name of the map.
+        :return: Its MapEntry.
+        """
+        entry = self.maps.get(name)
+        if entry is None:
+            raise KeyError(f"No map named {name!r}")
+        return entry
+
+    def _index(self, map, point):
+        """
+        Convert a Node or (x, y) tuple into a flat map index, checking it is on the map.
+
+        :param map: The map the point is on.
+        :param point: A Node or an (x, y) tuple.
+        :return: The index of the cell in the map arrays.
+        """
+        x, y = (point.x, point.y) if hasattr(point, 'x') else point
+        if not map.in_bounds(x, y):
+            raise ValueError(f"({x}, {y}) is outside the {map.width}x{map.height} map")
+        return map.index(x, y)
+
+    async def serve_unix(self, path):
+        """
+        Accept queries over a Unix socket.
+
+        :param path: Filesystem path of the socket to create.
+        :return: The asyncio Server; close it to stop accepting connections.
+        """
+        return await asyncio.start_unix_server(self._serve_connection, path, limit=LINE_LIMIT)
+
+    async def _serve_connection(self, reader, writer):
+        """
+        Answer the requests of one connection, each as soon as its result is ready.
+
+        :param reader: The connection's StreamReader.
+        :param writer: The connection's StreamWriter.
+        """
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.CancelledError):
+            # The client went away, or the event loop is shutting down
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+
+    async def _respond(self, line, writer):
+        """
+        Answer one protocol request.
+
+        :param line: The JSON request: ``id``, ``map``, ``start`` and ``goal`` as [x, y],
+                     and optionally ``diagonal``, ``strategy``, ``deadline`` (seconds) and
+                     ``format``. The response's ``path`` holds every cell of the path for
+                     the default 'nodes' format and only the waypoints otherwise.
+        :param writer: The StreamWriter to send the response to.
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            missing = [field for field in ('map', 'start', 'goal') if field not in request]
+            if missing:
+                raise ValueError(f"Request has no {', '.join(missing)}")
+            width = self._entry(request['map']).map.width
+            cells, cost, bound = await self.query(request['map'], tuple(request['start']), tuple(request['goal']),
+                                                  request.get('diagonal', False), request.get('strategy', 'astar'),
+                                                  request.get('deadline'), request.get('format', 'nodes'))
+            path = [divmod(index, width)[::-1] for index in cells]
+            response = {'id': request_id, 'path': path, 'cost': cost, 'bound': bound if bound != INFINITY else None}
+        except ServiceBusy as error:
+            response = {'id': request_id, 'error': 'busy', 'message': str(error)}
+        except asyncio.TimeoutError:
+            response = {'id': request_id, 'error': 'deadline', 'message': "deadline exceeded"}
+        except KeyError as error:
+            response = {'id': request_id, 'error': 'invalid', 'message': error.args[0]}
+        except (ValueError, TypeError, AttributeError) as error:
+            response = {'id': request_id, 'error': 'invalid', 'message': str(error)}
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    def as_dict(self):
+        """
+        Get the service counters as a dictionary.
+
+        :return: A dictionary of the request, search, merge, rejection and timeout counts.
+        """
+        return {'requests': self.requests, 'searches': self.searches, 'coalesced': self.coalesced,
+                'rejected': self.rejected, 'timeouts': self.timeouts, 'pending': len(self.inflight)}
+
+    def close(self):
+        """
+        Shut the worker pool down and delete the temporary map files.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for name in list(self.maps):
+            self.remove_map(name)
+        for filename in self.retired.values():
+            os.unlink(filename)
+        self.retired.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class PathClient:
+    """
+    Sends queries to a PathService over a Unix socket. Any number of queries may be
+    outstanding on one connection; responses are matched to them by id.
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Initialise a client on an open connection; use connect() to open one.
+
+        :param reader: The connection's StreamReader.
+        :param writer: The connection's StreamWriter.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.counter = 0  # id of the last request sent
+        self.waiting = {}  # request id -> future of its response
+        self.receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, path):
+        """
+        Connect to a service listening on a Unix socket.
+
+        :param path: Filesystem path of the socket.
+        :return: The connected PathClient.
+        """
+        reader, writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def find_path(self, name, start, goal, allow_diagonal=False, strategy='astar', deadline=None,
+                        path_format='nodes'):
+        """
+        Find a path on a named map.
+
+        :param name: The name of the map.
+        :param start: The start cell as an (x, y) tuple.
+        :param goal: The goal cell as an (x, y) tuple.
+        :param allow_diagonal: Boolean indicating if diagonal movement is allowed.
+        :param strategy: The search algorithm to use.
+        :param deadline: Seconds the service may take, None for no limit.
+        :param path_format: 'nodes' to receive every cell of the path, or 'compact' or
+                            'smooth' to receive only its waypoints.
+        :return: Tuple of (list of (x, y) cells or waypoints, path cost, suboptimality
+                 bound); the list is empty if no path was found.
+        """
+        self.counter += 1
+        request = {'id': self.counter, 'map': name, 'start': list(start), 'goal': list(goal),
+                   'diagonal': allow_diagonal, 'strategy': strategy, 'deadline': deadline, 'format': path_format}
+        future = self.waiting[self.counter] = asyncio.get_running_loop().create_future()
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        response = await future
+        error = response.get('error')
+        if error == 'busy':
+            raise ServiceBusy(response['message'])
+        if error == 'deadline':
+            raise asyncio.TimeoutError(response['message'])
+        if error is not None:
+            raise ValueError(response['message'])
+        bound = response['bound'] if response['bound'] is not None else INFINITY
+        return [tuple(cell) for cell in response['path']], response['cost'], bound
+
+    async def _receive(self):
+        """
+        Hand each response to the request waiting for it, until the connection closes.
+        """
+        try:
+            while line := await self.reader.readline():
+                response = json.loads(line)
+                future = self.waiting.pop(response['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("connection to the path service closed"))
+            self.waiting.clear()
+
+    async def close(self):
+        """
+        Close the connection.
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
@@ -0,0 +1,193 @@
+from .NeighbourTable import DIAGONAL_COST
+from array import array
+from bisect import bisect_right
+import math
+
+def line_cells(x0, y0, x1, y1, corners=True):
+    """
+    The cells crossed by the straight line between the centres of two cells, in order
+    from the first to the second.
+
+    Where the line passes exactly through a grid corner it also touches the two cells on
+    either side of that corner. With corners set both are included, which is what a
+    line-of-sight test needs to honour the rule that moves may not cut the corner of a
+    blocked cell; otherwise only the one beside the line's horizontal step is, so that
+    consecutive cells are always orthogonally adjacent.
+
+    :param x0: The x-coordinate of the first cell.
+    :param y0: The y-coordinate of the first cell.
+    :param x1: The x-coordinate of the second cell.
+    :param y1: The y-coordinate of the second cell.
+    :param corners: If True, include both cells touched at each corner.
+    :return: Iterator of (x, y) tuples.
+    """
+    nx, ny = abs(x1 - x0), abs(y1 - y0)
+    sx, sy = (x1 > x0) - (x1 < x0), (y1 > y0) - (y1 < y0)
+    x, y = x0, y0
+    yield x, y
+    ix = iy = 0
+    while ix < nx or iy < ny:
+        # Compare where the line next crosses a vertical and a horizontal grid line
+        decision = (1 + 2 * ix) * ny - (1 + 2 * iy) * nx
+        if decision == 0:
+            yield x + sx, y
+            if corners:
+                yield x, y + sy
+            x, y = x + sx, y + sy
+            ix, iy = ix + 1, iy + 1
+        elif decision < 0:
+            x += sx
+            ix += 1
+        else:
+            y += sy
+            iy += 1
+        yield x, y
+
+
+def turning_points(cells):
+    """
+    Find where a grid path changes direction.
+
+    :param cells: Sequence of adjacent cell indices from start to goal.
+    :return: Array of the positions in cells of the first cell, every turn and the last cell.
+    """
+    positions = array('i', [0] if len(cells) else [])
+    for position in range(1, len(cells) - 1):
+        if cells[position] - cells[position - 1] != cells[position + 1] - cells[position]:
+            positions.append(position)
+    if len(cells) > 1:
+        positions.append(len(cells) - 1)
+    return positions
+
+
+def segment_length(dx, dy):
+    """
+    The length of a straight move, measured like grid steps when it is orthogonal or
+    exactly diagonal and as the Euclidean distance otherwise.
+
+    :param dx: The distance moved along x.
+    :param dy: The distance moved along y.
+    :return: The length of the move.
+    """
+    dx, dy = abs(dx), abs(dy)
+    if dx == dy:
+        return DIAGONAL_COST * dx
+    if not dx or not dy:
+        return dx + dy
+    return math.hypot(dx, dy)
+
+
+class PathSmoother:
+    """
+    Straightens grid paths by string pulling: waypoints are dropped wherever the cells
+    on either side of them can see each other in a straight line, leaving a path of
+    any-angle segments between the remaining waypoints.
+
+    A segment has line of sight when every cell it crosses is free, including the cells
+    beside any grid corner it passes through, so a segment never cuts a blocked corner
+    or squeezes between two diagonally adjacent blocked cells. On maps with cell costs a
+    segment is charged its length times the cost of the most expensive cell it crosses,
+    and it is only used when that is no more than the grid path it replaces, so
+    smoothing never makes a path more expensive.
+
+    From each waypoint the next one is found by moving to the path's next turn, which
+    is always in sight, then galloping ahead along the path (checking 1, 2, 4, ... cells
+    further on) while the path stays in sight and bisecting the gap where it does not.
+    Each waypoint therefore costs a logarithmic number of line-of-sight checks rather
+    than one per cell, although the result is not always the fewest waypoints possible.
+    """
+
+    def __init__(self, map):
+        """
+        Initialise the smoother for a map.
+
+        :param map: The map whose obstacle layer is checked for line of sight.
+        """
+        self.map = map
+
+    def crossing_cost(self, a, b):
+        """
+        Check the line of sight between two cells.
+
+        :param a: The index of the first cell.
+        :param b: The index of the second cell.
+        :return: The highest cost of any cell the line crosses (1 on maps without
+                 costs), or None if it crosses a blocked cell.
+        """
+        map = self.map
+        width, obstacles, costs = map.width, map.obstacles, map.costs
+        y0, x0 = divmod(a, width)
+        y1, x1 = divmod(b, width)
+        highest = 1
+        for x, y in line_cells(x0, y0, x1, y1):
+            index = y * width + x
+            if obstacles[index]:
+                return None
+            if costs is not None and costs[index] > highest:
+                highest = costs[index]
+        return highest
+
+    def smooth(self, cells):
+        """
+        String-pull a grid path.
+
+        :param cells: Sequence of adjacent cell indices from start to goal.
+        :return: Tuple of (array of waypoint cell indices, cost of the smoothed path).
+        """
+        map = self.map
+        width, costs = map.width, map.costs
+        waypoints = array('i')
+        if not len(cells):
+            return waypoints, 0
+        # Cost of the grid path up to each of its cells, to compare shortcuts against
+        spent = array('d', [0.0])
+        total = 0.0
+        for position in range(1, len(cells)):
+            index = cells[position]
+            y, x = divmod(index, width)
+            previous_y, previous_x = divmod(cells[position - 1], width)
+            base = DIAGONAL_COST if x != previous_x and y != previous_y else 1
+            total += base * costs[index] if costs is not None else base
+            spent.append(total)
+        turns = turning_points(cells)
+
+        def shortcut(anchor, target):
+            # Cost of the straight segment between two cells of the path, or None if it is not usable
+            a, b = cells[anchor], cells[target]
+            highest = self.crossing_cost(a, b)
+            if highest is None:
+                return None
+            (ay, ax), (by, bx) = divmod(a, width), divmod(b, width)
+            cost = segment_length(bx - ax, by - ay) * highest
+            return cost if cost <= spent[target] - spent[anchor] + 1e-9 else None
+
+        last = len(cells) - 1
+        anchor = 0
+        cost = 0.0
+        waypoints.append(cells[0])
+        while anchor < last:
+            # The straight run up to the next turn is always usable; from there gallop
+            # ahead while the path stays in sight, then bisect the gap
+            reached = turns[bisect_right(turns, anchor)]
+            reached_cost = spent[reached] - spent[anchor]
+            step = 1
+            failed = None
+            while reached < last:
+                target = min(reached + step, last)
+                segment = shortcut(anchor, target)
+                if segment is None:
+                    failed = target
+                    break
+                reached, reached_cost = target, segment
+                step *= 2
+            while failed is not None and failed - reached > 1:
+                target = (reached + failed) // 2
+                segment = shortcut(anchor, target)
+                if segment is None:
+                    failed = target
+                else:
+                    reached, reached_cost = target, segment
+            waypoints.append(cells[reached])
+            cost += reached_cost
+            anchor = reached
+        return waypoints, cost
@@ -0,0 +1,108 @@
+from bisect import bisect_left
+
+# Upper bounds in seconds of the latency histogram buckets; slower queries fall in a final unbounded bucket
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# SearchStats fields that are summed over queries
+TOTALS = ('expanded', 'pushes', 'decreased', 'reopened', 'stale', 'neighbours',
+          'elapsed', 'heuristic_time', 'heap_time', 'neighbour_time')
+
+class SearchMetrics:
+    """
+    Aggregates the SearchStats of many queries for export to a metrics system.
+
+    A SearchMetrics is a callable that takes a SearchStats, so it can be added to the
+    ``observers`` of one or more pathfinders and is then updated after every search
+    they run. It keeps totals of the counters, the largest open list seen, and a
+    histogram of query latencies with fixed buckets (LATENCY_BUCKETS), so its memory
+    use does not grow with the number of queries and aggregates from several
+    processes can be merged by adding them up.
+    """
+
+    def __init__(self):
+        """
+        Initialise empty aggregates.
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Discard everything recorded so far, for example after each export.
+        """
+        self.queries = 0  # searches recorded
+        self.found = 0  # searches that reached their goal
+        self.totals = dict.fromkeys(TOTALS, 0)  # sums of the per-query counters and times
+        self.heap_peak = 0  # largest open list of any recorded search
+        self.slowest = 0.0  # longest query latency in seconds
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # query counts per latency bucket
+
+    def __call__(self, stats):
+        """
+        Record the counters of one search.
+
+        :param stats: The SearchStats of the search.
+        """
+        self.queries += 1
+        self.found += stats.found
+        totals = self.totals
+        for name in TOTALS:
+            totals[name] += getattr(stats, name)
+        self.heap_peak = max(self.heap_peak, stats.heap_peak)
+        self.slowest = max(self.slowest, stats.elapsed)
+        self.buckets[bisect_left(LATENCY_BUCKETS, stats.elapsed)] += 1
+
+    def percentile(self, fraction):
+        """
+        Estimate a latency percentile from the histogram.
+
+        :param fraction: The percentile as a fraction, such as 0.99.
+        :return: The upper bound of the bucket holding that percentile (the slowest
+                 latency for the final bucket), or 0 if nothing was recorded.
+        """
+        if not self.queries:
+            return 0.0
+        rank = fraction * self.queries
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.slowest)
+        return self.slowest
+
+    def as_dict(self):
+        """
+        Get the aggregates as a dictionary, for example to serialise as JSON.
+
+        :return: A dictionary of the query counts, totals, means, peak and latency figures.
+        """
+        queries = self.queries or 1
+        return {
+            'queries': self.queries,
+            'found': self.found,
+            'totals': dict(self.totals),
+            'means': {name: total / queries for name, total in self.totals.items()},
+            'heap_peak': self.heap_peak,
+            'latency': {'p50': self.percentile(0.5), 'p99': self.percentile(0.99), 'max': self.slowest,
+                        'buckets': dict(zip([*LATENCY_BUCKETS, float('inf')], self.buckets))},
+        }
+
+    def prometheus(self, prefix='pathfinder'):
+        """
+        Format the aggregates in the Prometheus text exposition format.
+
+        :param prefix: Prefix for the metric names.
+        :return: The metrics as a string.
+        """
+        lines = [f"# TYPE {prefix}_queries_total counter", f"{prefix}_queries_total {self.queries}",
+                 f"# TYPE {prefix}_found_total counter", f"{prefix}_found_total {self.found}"]
+        for name, total in self.totals.items():
+            if name != 'elapsed':
+                metric = f"{prefix}_{name}_seconds_total" if name.endswith('_time') else f"{prefix}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {total}"]
+        lines += [f"# TYPE {prefix}_heap_peak gauge", f"{prefix}_heap_peak {self.heap_peak}",
+                  f"# TYPE {prefix}_query_seconds histogram"]
+        cumulative = 0
+        for bound, count in zip([*LATENCY_BUCKETS, '+Inf'], self.buckets):
+            cumulative += count
+            lines.append(f'{prefix}_query_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f"{prefix}_query_seconds_sum {self.totals['elapsed']}", f"{prefix}_query_seconds_count {self.queries}"]
+        return "\n".join(lines) + "\n"
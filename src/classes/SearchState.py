@@ -0,0 +1,102 @@
+from array import array
+
+OPEN = 1  # flag value for cells queued in the open set
+CLOSED = 2  # flag value for cells that have been processed
+
+class SearchState:
+    """
+    Holds the per-search data (g-scores, parent indices and open/closed flags) for every
+    cell of a map in flat arrays.
+
+    Instead of clearing the arrays before each query, every cell carries the number of
+    the search that last wrote to it. Starting a new search only increments the counter,
+    so values left over from older searches are treated as unset the first time a cell
+    is touched. A query therefore costs time proportional to the cells it visits rather
+    than to the size of the map.
+    """
+
+    MAX_GENERATION = 0xFFFFFFFF  # largest value an 'I' array stamp can hold
+
+    def __init__(self, size):
+        """
+        Initialise the state arrays for a map with the given number of cells.
+
+        :param size: The number of cells in the map.
+        """
+        self.size = size
+        self.generation = 0  # number of the current search
+        self.stamps = array('I', [0]) * size  # generation that last wrote each cell
+        self.g_scores = array('d', [0.0]) * size  # cost from start to each cell
+        self.parents = array('i', [-1]) * size  # index of the parent cell, -1 for none
+        self.flags = bytearray(size)  # OPEN / CLOSED state of each cell
+
+    def new_search(self):
+        """
+        Invalidate all values from previous searches in constant time.
+        """
+        if self.generation == self.MAX_GENERATION:
+            # The counter is about to wrap, so clear the stamps once for real
+            self.stamps[:] = array('I', [0]) * self.size
+            self.generation = 0
+        self.generation += 1
+
+    def touch(self, index):
+        """
+        Make a cell's values valid for the current search, resetting them if stale.
+
+        :param index: The index of the cell in the map arrays.
+        """
+        if self.stamps[index] != self.generation:
+            self.stamps[index] = self.generation
+            self.g_scores[index] = float('inf')
+            self.parents[index] = -1
+            self.flags[index] = 0
+
+    def store_path(self, cells, cost):
+        """
+        Start a new search and record a path found by other means as its parent chain,
+        so it can be reconstructed like the result of a normal search.
+
+        :param cells: Sequence of cell indices from start to goal.
+        :param cost: The total cost of the path.
+        """
+        self.new_search()
+        parent = -1
+        for index in cells:
+            self.touch(index)
+            self.parents[index] = parent
+            parent = index
+        self.g_scores[parent] = cost
+
+    def g(self, index):
+        """
+        The g-score of a cell in the current search.
+
+        :param index: The index of the cell in the map arrays.
+        :return: The cost from the start, or infinity if the cell was not reached.
+        """
+        if self.stamps[index] != self.generation:
+            return float('inf')
+        return self.g_scores[index]
+
+    def parent(self, index):
+        """
+        The parent index of a cell in the current search.
+
+        :param index: The index of the cell in the map arrays.
+        :return: The parent cell index, or -1 if the cell has no parent.
+        """
+        if self.stamps[index] != self.generation:
+            return -1
+        return self.parents[index]
+
+    def flag(self, index):
+        """
+        The open/closed flag of a cell in the current search.
+
+        :param index: The index of the cell in the map arrays.
+        :return: OPEN, CLOSED or 0.
+        """
+        if self.stamps[index] != self.generation:
+            return 0
+        return self.flags[index]
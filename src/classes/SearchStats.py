@@ -0,0 +1,42 @@
+class SearchStats:
+    """
+    Counters describing the work done by a single search.
+
+    The counters are kept by every strategy, although ``neighbours`` and ``heap_peak``
+    are only counted by A*, bidirectional A* and nearest-goal searches. ``elapsed`` is
+    the wall-clock time of the query. The time split between heuristic evaluation,
+    open list operations and neighbour generation is only measured by A* on a
+    pathfinder created with ``profile=True``, and is zero otherwise.
+    """
+
+    __slots__ = ('expanded', 'pushes', 'decreased', 'reopened', 'stale', 'neighbours', 'heap_peak', 'found',
+                 'elapsed', 'heuristic_time', 'heap_time', 'neighbour_time')
+
+    def __init__(self):
+        """
+        Initialise all counters to zero.
+        """
+        self.expanded = 0  # cells taken from the open list and expanded
+        self.pushes = 0  # entries pushed onto the open list
+        self.decreased = 0  # open cells re-inserted after their g-score improved
+        self.reopened = 0  # closed cells moved back to the open list
+        self.stale = 0  # outdated open list entries skipped when popped
+        self.neighbours = 0  # neighbour cells checked while expanding
+        self.heap_peak = 0  # largest number of entries in the open list at once
+        self.found = False  # whether the search reached its goal
+        self.elapsed = 0.0  # wall-clock seconds spent in the search
+        self.heuristic_time = 0.0  # seconds spent estimating distances to the goal (profiling only)
+        self.heap_time = 0.0  # seconds spent pushing to and popping from the open list (profiling only)
+        self.neighbour_time = 0.0  # seconds spent generating and relaxing neighbours (profiling only)
+
+    def as_dict(self):
+        """
+        Get the counters as a dictionary.
+
+        :return: A dictionary mapping counter names to values.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        counters = ", ".join(f"{name}={value}" for name, value in self.as_dict().items())
+        return f"SearchStats({counters})"
@@ -0,0 +1,29 @@
+class SearchStep:
+    """
+    Progress report from a stepping search, describing what changed since the previous
+    step so a caller can update a display or spread a search over several frames.
+    """
+
+    __slots__ = ('opened', 'closed', 'expanded', 'done', 'found', 'path')
+
+    def __init__(self, opened, closed, expanded, done=False, found=False, path=None):
+        """
+        Initialise a step.
+
+        :param opened: Indices of cells that joined the open set since the last step.
+        :param closed: Indices of cells that were expanded since the last step.
+        :param expanded: Total number of cells expanded so far.
+        :param done: Whether the search has finished.
+        :param found: Whether the goal was reached (only meaningful once done).
+        :param path: The resulting Path once done, or None.
+        """
+        self.opened = opened
+        self.closed = closed
+        self.expanded = expanded
+        self.done = done
+        self.found = found
+        self.path = path
+
+    def __repr__(self):
+        return (f"SearchStep(opened={len(self.opened)}, closed={len(self.closed)}, "
+                f"expanded={self.expanded}, done={self.done}, found={self.found})")
@@ -1,7 +1,10 @@
 from .Path import Path
 from .Map import Map
 from .PathFinder import PathFinder
-from .Visualizer import Visualizer
+from .SearchStep import SearchStep
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Simulation:
     """
@@ -9,19 +12,50 @@ class Simulation:
     and visualisation via a PyGame interface.
     """
 
-    def __init__(self, width, height, pass_allow_diagonal=False):
+    def __init__(self, width, height, pass_allow_diagonal=False, strategy='astar', cache_size=256, map=None,
+                 cluster_size=16, entrance_spacing=6):
         """
         Initialise the simulation with the map size and the diagonal movement setting.
 
         :param width: Width of the map in nodes.
         :param height: Height of the map in nodes.
         :param pass_allow_diagonal: Boolean to allow diagonal movements in pathfinding.
-        """
-        self.map = Map(width, height)
-        self.path_finder = PathFinder(self.map, pass_allow_diagonal)
+        :param strategy: The search algorithm to use, one of STRATEGIES: 'astar', 'jps' (Jump
+                         Point Search), 'incremental' (LPA*, which repairs the previous search
+                         after obstacle edits), 'hierarchical' (HPA*, for large maps), 'anytime'
+                         (ARA*, which improves a weighted path towards the optimum) or
+                         'bidirectional' (A* from both ends).
+        :param cache_size: Number of pathfinding results to cache, 0 to disable caching.
+        :param map: An existing Map to use instead of a new empty one of the given size.
+        :param cluster_size: Cluster width and height of the 'hierarchical' strategy.
+        :param entrance_spacing: Distance between border entrances of the 'hierarchical'
+                                 strategy; smaller values give shorter paths but slower searches.
+        """
+        self.map = map if map is not None else Map(width, height)
+        self.path_finder = PathFinder(self.map, pass_allow_diagonal, strategy, cache_size,
+                                      cluster_size=cluster_size, entrance_spacing=entrance_spacing)
         self.path = None
 
-    def setup(self, start, goal, obstacles):
+    @classmethod
+    def from_file(cls, filename, pass_allow_diagonal=False, strategy='astar', cache_size=256,
+                  cluster_size=16, entrance_spacing=6):
+        """
+        Create a simulation on a map loaded from a binary map file or a MovingAI ``.map`` file.
+
+        :param filename: Path of the map file.
+        :param pass_allow_diagonal: Boolean to allow diagonal movements in pathfinding.
+        :param strategy: The search algorithm to use.
+        :param cache_size: Number of pathfinding results to cache, 0 to disable caching.
+        :param cluster_size: Cluster width and height of the 'hierarchical' strategy.
+        :param entrance_spacing: Distance between border entrances of the 'hierarchical' strategy.
+        :return: The new Simulation.
+        """
+        from .MapFile import open_map
+        map = open_map(filename)
+        return cls(map.width, map.height, pass_allow_diagonal, strategy, cache_size, map=map,
+                   cluster_size=cluster_size, entrance_spacing=entrance_spacing)
+
+    def setup(self, start, goal, obstacles=()):
         """
         Set up the simulation map with start point, goal point, and obstacles.
 
@@ -36,47 +70,74 @@ class Simulation:
 
     def run_pathfinding(self):
         """
-        Execute the pathfinding algorithm using the A* search from the PathFinder.
+        Execute the pathfinding algorithm selected on the PathFinder (A* by default).
         """
-        self.path_finder.reset_pathfinding_state()
         start_node = self.map.get_node(*self.map.start)
         goal_node = self.map.get_node(*self.map.goal)
-        self.path = self.path_finder.a_star_search(start_node, goal_node)
+        self.path = self.path_finder.search(start_node, goal_node)
+        self.report_path()
+
+    def pathfinding_steps(self, step_size=100):
+        """
+        Run A* a few expansions at a time, so a caller such as the visualiser can keep
+        handling events while the search runs. The path is stored once the search ends.
+        Other strategies cannot be stepped, so they run to completion in one step.
+
+        :param step_size: Number of expansions between steps.
+        :return: Iterator of SearchStep objects with the cells opened and closed in each step.
+        """
+        if self.path_finder.strategy != 'astar':
+            self.run_pathfinding()
+            yield SearchStep((), (), self.path_finder.stats.expanded, True, bool(self.path.nodes), self.path)
+            return
+        start_node = self.map.get_node(*self.map.start)
+        goal_node = self.map.get_node(*self.map.goal)
+        for step in self.path_finder.search_steps(start_node, goal_node, step_size):
+            if step.done:
+                self.path = step.path
+                self.report_path()
+            yield step
 
+    def report_path(self):
+        """
+        Log the result of the last pathfinding run. Nothing is output unless logging is
+        configured for this module: a summary with the search stats is logged at INFO
+        level, and the full list of nodes at DEBUG level, where it is only formatted when
+        that level is enabled.
+        """
+        stats = self.path_finder.stats
         if self.path.nodes:
-            print("Path found with nodes:", self.path.get_path())
+            logger.info("Path found with %d nodes, cost %s: %s", len(self.path.nodes), self.path.cost, stats)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Path nodes: %s", self.path.get_path())
         else:
-            print("No path found.")
+            logger.info("No path found: %s", stats)
 
     def reset_pathfinding(self):
         """
         Reset the pathfinding state and clear all obstacles from the map.
         """
         self.path_finder.reset_pathfinding_state()
-        for row in self.map.nodes:
-            for node in row:
-                node.block = False
+        self.map.clear_obstacles()
 
     def clear_obstacles(self):
         """
         Clear all obstacles from the map.
         """
-        for row in self.map.nodes:
-            for node in row:
-                node.block = False
+        self.map.clear_obstacles()
 
     def reset_path(self):
         """
-        Reset the attributes of each node.
+        Reset the pathfinding state of each node.
         """
-        for row in self.map.nodes:
-            for node in row:
-                node.reset()
+        self.path_finder.reset_pathfinding_state()
 
     def visualize(self):
         """
         Create and run the visualiser with the current simulation settings.
+        PyGame is only imported here, so the rest of the simulation runs headless.
         """
+        from .Visualizer import Visualizer
         visualizer = Visualizer(self.map, self.path, self, cell_size=10)
         visualizer.run()
 
@@ -1,6 +1,10 @@
 import pygame
+import time
 from .Path import Path
 
+# Events after which the window contents must be redrawn in full
+EXPOSE_EVENTS = tuple(getattr(pygame, name) for name in ('VIDEOEXPOSE', 'WINDOWEXPOSED') if hasattr(pygame, name))
+
 class Visualizer:
     """
     Creates a display using PyGame to visually represent the PathFinder's path result and the map layout.
@@ -38,6 +42,8 @@ class Visualizer:
         self.start_color = (0, 255, 0)  # green
         self.goal_color = (255, 0, 0)  # red
         self.path_color = (0, 0, 255)  # blue
+        self.open_color = (180, 235, 180)  # pale green
+        self.closed_color = (255, 215, 170)  # pale orange
         self.menu_color = (100, 100, 100)  # medium grey
         self.button_color = (200, 200, 0)  # yellow
 
@@ -53,20 +59,44 @@ class Visualizer:
         self.clear_path_button_rect = pygame.Rect(self.width + 10, button_margin_top + 3 * (button_height + button_spacing), button_width, button_height)
         self.clear_obstacles_button_rect = pygame.Rect(self.width + 10, button_margin_top + 4 * (button_height + button_spacing), button_width, button_height)
 
-    def draw_grid(self):
+        # Retained-mode rendering: static parts are drawn once, then only changed cells
+        self.build_grid_surface()
+        self.build_menu_surface()
+        self.fps = 60  # frame rate cap
+        self.clock = pygame.time.Clock()
+        self.full_redraw = True  # whether the whole screen must be redrawn
+        self.dirty = set()  # indices of cells to redraw on the next frame
+        self.path_cells = set()
+        self.open_cells = set()  # cells in the open set of the running or last search
+        self.closed_cells = set()  # cells expanded by the running or last search
+        self.set_path(path)
+
+        # Searches run a few expansions at a time between frames so the window stays responsive
+        self.search = None  # generator of the running search, None when idle
+        self.step_size = 200  # expansions between progress updates
+        self.search_budget = 0.012  # seconds of searching per frame
+        self.map.add_listener(self._cell_changed)
+
+    def build_grid_surface(self):
         """
-        Generates a grid visualisation from cell sizes and node positions.
+        Pre-renders the empty grid (white tiles and grid lines) once, so clearing a cell
+        later only needs a blit of the matching area of this surface.
         """
+        self.grid_surface = pygame.Surface((self.width, self.height))
+        self.grid_surface.fill(self.tile_color)
         for x in range(self.map.width):
-            for y in range(self.map.height):
-                rect = pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
-                pygame.draw.rect(self.screen, self.grid_color, rect, 1)  # Draw grid lines
+            for left in (x * self.cell_size, (x + 1) * self.cell_size - 1):  # both edges of each cell
+                pygame.draw.line(self.grid_surface, self.grid_color, (left, 0), (left, self.height - 1))
+        for y in range(self.map.height):
+            for top in (y * self.cell_size, (y + 1) * self.cell_size - 1):
+                pygame.draw.line(self.grid_surface, self.grid_color, (0, top), (self.width - 1, top))
 
-    def draw_menu(self):
+    def build_menu_surface(self):
         """
-        Draws the menu sidebar.
+        Pre-renders the menu sidebar and its button labels once.
         """
-        pygame.draw.rect(self.screen, self.menu_color, pygame.Rect(self.width, 0, self.menu_width, self.height))  # draw the menu background
+        self.menu_surface = pygame.Surface((self.menu_width, self.height))
+        self.menu_surface.fill(self.menu_color)  # draw the menu background
         buttons = [
             (self.pathfind_button_rect, "Pathfind"),
             (self.reset_button_rect, "Reset"),
@@ -75,62 +105,179 @@ class Visualizer:
             (self.clear_obstacles_button_rect, "Clear Obstacles")
         ]
         for rect, text in buttons:
-            pygame.draw.rect(self.screen, self.button_color, rect)
+            rect = rect.move(-self.width, 0)  # button rects are in screen coordinates
+            pygame.draw.rect(self.menu_surface, self.button_color, rect)
             text_surface = self.font.render(text, True, (0, 0, 0))
-            self.screen.blit(text_surface, (rect.x + (rect.width - text_surface.get_width()) / 2, rect.y + (rect.height - text_surface.get_height()) / 2))
+            self.menu_surface.blit(text_surface, (rect.x + (rect.width - text_surface.get_width()) / 2, rect.y + (rect.height - text_surface.get_height()) / 2))
+
+    def cell_color(self, index):
+        """
+        The colour a cell should be drawn in.
+
+        :param index: The index of the cell in the map arrays.
+        :return: An RGB tuple, or None for an empty tile.
+        """
+        if index in self.path_cells:
+            return self.path_color
+        if self.map.obstacles[index]:
+            return self.obstacle_color
+        coords = self.map.coords(index)
+        if coords == self.map.start:
+            return self.start_color
+        if coords == self.map.goal:
+            return self.goal_color
+        if index in self.closed_cells:
+            return self.closed_color
+        if index in self.open_cells:
+            return self.open_color
+        return None
+
+    def draw_cell(self, index):
+        """
+        Redraws a single cell from the cached grid and its current colour.
+
+        :param index: The index of the cell in the map arrays.
+        :return: The screen rectangle that was drawn.
+        """
+        x, y = self.map.coords(index)
+        rect = pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
+        self.screen.blit(self.grid_surface, rect, rect)
+        color = self.cell_color(index)
+        if color is not None:
+            self.screen.fill(color, rect)
+        return rect
 
     def draw(self):
         """
-        Renders the entire visualisation including map, path, and menu.
+        Renders the visualisation. The whole screen is only drawn when needed (on start-up,
+        after bulk map changes or when the window is exposed); otherwise only the cells
+        marked dirty since the last frame are redrawn and pushed to the display.
         """
-        self.screen.fill(self.tile_color)
-        self.draw_grid()
-        self.draw_menu()
+        if self.full_redraw:
+            self.screen.blit(self.grid_surface, (0, 0))
+            self.screen.blit(self.menu_surface, (self.width, 0))
+            obstacles = self.map.obstacles
+            cells = self.path_cells | self.open_cells | self.closed_cells
+            index = obstacles.find(b'\x01')
+            while index != -1:  # jump straight to the blocked cells instead of visiting every cell
+                cells.add(index)
+                index = obstacles.find(b'\x01', index + 1)
+            for coords in (self.map.start, self.map.goal):
+                if coords is not None:
+                    cells.add(self.map.index(*coords))
+            for index in cells:
+                self.draw_cell(index)
+            pygame.display.update()
+        elif self.dirty:
+            pygame.display.update([self.draw_cell(index) for index in self.dirty])
+        self.full_redraw = False
+        self.dirty.clear()
 
-        for x in range(self.map.width):
-            for y in range(self.map.height):
-                node = self.map.get_node(x, y)
-                rect = pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
+    def set_path(self, path):
+        """
+        Shows a new path, marking the cells of the old and new paths for redrawing.
+
+        :param path: The new Path, or None to clear it.
+        """
+        self.dirty |= self.path_cells
+        self.path = path
+        self.path_cells = {node.index for node in path.nodes} if isinstance(path, Path) else set()
+        self.dirty |= self.path_cells
 
-                if node.block:
-                    pygame.draw.rect(self.screen, self.obstacle_color, rect)
-                elif (x, y) == self.map.start:
-                    pygame.draw.rect(self.screen, self.start_color, rect)
-                elif (x, y) == self.map.goal:
-                    pygame.draw.rect(self.screen, self.goal_color, rect)
+    def start_search(self):
+        """
+        Start a new stepped search from the map's start to its goal, replacing any
+        search in progress and the cells shown from the previous one.
+        """
+        self.cancel_search()
+        self.clear_explored()
+        self.set_path(None)
+        self.search = self.simulation.pathfinding_steps(self.step_size)
 
-        if self.path and isinstance(self.path, Path):
-            for node in self.path.nodes:
-                rect = pygame.Rect(node.x * self.cell_size, node.y * self.cell_size, self.cell_size, self.cell_size)
-                pygame.draw.rect(self.screen, self.path_color, rect)
+    def advance_search(self):
+        """
+        Run the current search for up to one frame's time budget, showing the cells it
+        opens and closes. Once it finishes, the resulting path is shown.
+        """
+        deadline = time.perf_counter() + self.search_budget
+        while self.search is not None and time.perf_counter() < deadline:
+            step = next(self.search)
+            self.open_cells.update(step.opened)
+            self.open_cells.difference_update(step.closed)
+            self.closed_cells.update(step.closed)
+            self.dirty.update(step.opened)
+            self.dirty.update(step.closed)
+            if step.done:
+                self.search = None
+                self.set_path(step.path)
 
-        pygame.display.update()
+    def cancel_search(self):
+        """
+        Abandon the search in progress, if any. The cells it explored stay on screen.
+        """
+        if self.search is not None:
+            self.search.close()
+            self.search = None
 
-    def handle_events(self):
+    def clear_explored(self):
+        """
+        Remove the open and closed cells of the last search from the display.
+        """
+        self.dirty |= self.open_cells | self.closed_cells
+        self.open_cells.clear()
+        self.closed_cells.clear()
+
+    def _cell_changed(self, index, blocked):
+        """
+        Map listener: mark edited cells for redrawing. A running search is cancelled,
+        since its open and closed sets no longer match the map.
+
+        :param index: The index of the changed cell, or None for a bulk change.
+        :param blocked: Whether the cell is now blocked.
+        """
+        self.cancel_search()
+        if index is None:
+            self.full_redraw = True
+        else:
+            self.dirty.add(index)
+
+    def handle_events(self, wait=False):
         """
         Processes PyGame events like mouse clicks and button presses, updating the simulation state.
         Adds functionality to handle dragging to paint obstacles on the grid.
+
+        :param wait: If True and no events are queued, sleep until the next event arrives.
         """
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if wait and not events:
+            events = [pygame.event.wait()]
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
+            elif event.type in EXPOSE_EVENTS:
+                self.full_redraw = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.cancel_search()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
                 if event.button == 1:  # Left mouse button
                     self.mouse_button_down = True
                     if self.pathfind_button_rect.collidepoint(pos):
-                        self.simulation.run_pathfinding()
-                        self.path = self.simulation.path
+                        self.start_search()
                     elif self.reset_button_rect.collidepoint(pos):
+                        self.cancel_search()
                         self.simulation.reset_pathfinding()
-                        self.path = None
+                        self.clear_explored()
+                        self.set_path(None)
                     elif self.toggle_metric_button_rect.collidepoint(pos):
                         self.simulation.path_finder.toggle_metric()
-                        self.simulation.run_pathfinding()
-                        self.path = self.simulation.path
+                        self.start_search()
                     elif self.clear_path_button_rect.collidepoint(pos):
+                        self.cancel_search()
                         self.simulation.reset_path()
-                        self.path = None
+                        self.clear_explored()
+                        self.set_path(None)
                     elif self.clear_obstacles_button_rect.collidepoint(pos):
                         self.simulation.clear_obstacles()
                     else:
@@ -168,7 +315,14 @@ class Visualizer:
         """
         running = True
         while running:
-            if not self.handle_events():
+            # With nothing left to draw or search, block until the next event instead of spinning
+            idle = not self.full_redraw and not self.dirty and self.search is None
+            if not self.handle_events(wait=idle):
                 running = False
+            if self.search is not None:
+                self.advance_search()
             self.draw()
+            self.clock.tick(self.fps)
+        self.cancel_search()
+        self.map.remove_listener(self._cell_changed)
         pygame.quit()
\ No newline at end of file
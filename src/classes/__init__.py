@@ -1,4 +1,45 @@
-from classes.Simulation import Simulation
+"""
+Pathfinding core and simulation.
 
+The core classes are imported eagerly and do not depend on PyGame, so pathfinding can
+be used headless (in scripts, benchmarks or worker processes) with a fast start-up.
+Simulation and Visualizer are only loaded when first accessed, and no simulation is
+created at import time.
+"""
 
-sim = Simulation(50, 50, pass_allow_diagonal=True) # create simulation object with grid 50x50 and using chevyshev distance
\ No newline at end of file
+from .Node import Node
+from .Map import Map
+from .Path import Path
+from .CompactPath import CompactPath
+from .PathSmoother import PathSmoother
+from .PathFinder import PathFinder, STRATEGIES, PATH_FORMATS
+
+_LAZY = {
+    'Simulation': '.Simulation',
+    'Visualizer': '.Visualizer',  # imports PyGame
+    'MapGenerator': '.MapGenerator',
+    'open_map': '.MapFile',
+    'load_map': '.MapFile',
+    'save_map': '.MapFile',
+    'load_movingai': '.MapFile',
+    'SearchMetrics': '.SearchMetrics',
+    'PathService': '.PathService',
+    'PathClient': '.PathService',
+}
+
+__all__ = ['Node', 'Map', 'Path', 'CompactPath', 'PathSmoother', 'PathFinder', 'STRATEGIES', 'PATH_FORMATS', *_LAZY]
+
+
+def __getattr__(name):
+    """
+    Import the lazily loaded classes and functions on first access.
+
+    :param name: The attribute being looked up.
+    :return: The requested class or function.
+    """
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value  # cache so later lookups skip __getattr__
+    return value
@@ -0,0 +1,169 @@
+"""
+Load generator for the PathService.
+
+Starts a service on a generated map and sends it a stream of queries from a number
+of concurrent clients, either in-process or over a Unix socket, then reports the
+throughput, the p50/p99 latency and how many requests were merged, refused or timed
+out. Queries are drawn from a fixed pool of distinct (start, goal) pairs, so a small
+pool means many identical requests in flight at once. Runs headless.
+
+Example:
+    python loadgen.py --size 256 --requests 5000 --concurrency 64
+    python loadgen.py --socket /tmp/astar.sock --distinct 50 --deadline 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from benchmark import pick_queries, MODES
+from classes.MapGenerator import MapGenerator, GENERATORS
+from classes.PathFinder import STRATEGIES, PATH_FORMATS
+from classes.PathService import PathService, PathClient, ServiceBusy
+
+
+def percentile(latencies, fraction):
+    """
+    The latency below which a fraction of the requests completed.
+
+    :param latencies: Sorted list of latencies in seconds.
+    :param fraction: The percentile as a fraction, such as 0.99.
+    :return: The latency, or 0 if there are none.
+    """
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+async def generate_load(find_path, queries, request_count, concurrency, seed, deadline):
+    """
+    Send requests from concurrent clients and time each one.
+
+    :param find_path: Coroutine function taking (start, goal, deadline).
+    :param queries: List of distinct ((x, y), (x, y)) queries to draw from.
+    :param request_count: Number of requests to send.
+    :param concurrency: Number of clients sending requests at once.
+    :param seed: Seed for the order of the requests.
+    :param deadline: Per-request deadline in seconds, or None.
+    :return: Tuple of (sorted latencies of the answered requests, dictionary of error counts).
+    """
+    rng = random.Random(seed)
+    requests = [rng.choice(queries) for _ in range(request_count)]
+    latencies = []
+    errors = {'busy': 0, 'deadline': 0}
+
+    async def client():
+        while requests:
+            start, goal = requests.pop()
+            started = time.perf_counter()
+            try:
+                await find_path(start, goal, deadline)
+            except ServiceBusy:
+                errors['busy'] += 1
+                continue
+            except asyncio.TimeoutError:
+                errors['deadline'] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    latencies.sort()
+    return latencies, errors
+
+
+async def run(args):
+    """
+    Start the service, warm its workers up and measure one load run.
+
+    :param args: The parsed command line arguments.
+    :return: Dictionary of results.
+    """
+    map = MapGenerator(args.seed).generate(args.generator, args.size, args.size)
+    width = map.width
+    queries = [(divmod(start, width)[::-1], divmod(goal, width)[::-1])
+               for start, goal in pick_queries(map, args.distinct, random.Random(args.seed))]
+    allow_diagonal = MODES[args.mode]
+
+    async with PathService(args.workers, not args.threads, args.max_pending) as service:
+        service.add_map('bench', map)
+        server = client = None
+        if args.socket:
+            if os.path.exists(args.socket):
+                os.unlink(args.socket)
+            server = await service.serve_unix(args.socket)
+            client = await PathClient.connect(args.socket)
+            send = client.find_path
+        else:
+            send = service.query
+
+        async def find_path(start, goal, deadline):
+            return await send('bench', start, goal, allow_diagonal, args.strategy, deadline, args.format)
+
+        try:
+            # Start every worker and map the grid in each before timing
+            await generate_load(find_path, queries, service.workers * 4, service.workers, args.seed, None)
+            counters = service.as_dict()
+            started = time.perf_counter()
+            latencies, errors = await generate_load(find_path, queries, args.requests, args.concurrency,
+                                                    args.seed + 1, args.deadline)
+            elapsed = time.perf_counter() - started
+        finally:
+            if client is not None:
+                await client.close()
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+                os.unlink(args.socket)
+        counts = {name: value - counters[name] for name, value in service.as_dict().items() if name != 'pending'}
+    return {
+        'transport': 'unix' if args.socket else 'in-process',
+        'workers': service.workers,
+        'requests': args.requests,
+        'answered': len(latencies),
+        'errors': errors,
+        'time': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else 0.0,
+        'service': counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure PathService throughput and latency.")
+    parser.add_argument('--generator', default='noise', choices=GENERATORS)
+    parser.add_argument('--size', type=int, default=256, help="square map size")
+    parser.add_argument('--mode', default='manhattan', choices=MODES)
+    parser.add_argument('--strategy', default='astar', choices=STRATEGIES)
+    parser.add_argument('--format', default='nodes', choices=PATH_FORMATS,
+                        help="path format: every cell, or the waypoints of a compact or smoothed path")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32, help="requests in flight at once")
+    parser.add_argument('--distinct', type=int, default=500, help="number of distinct queries to draw from")
+    parser.add_argument('--workers', type=int, help="worker count, defaults to the number of CPUs")
+    parser.add_argument('--threads', action='store_true', help="use worker threads instead of processes")
+    parser.add_argument('--max-pending', type=int, default=256, help="searches the service may queue")
+    parser.add_argument('--deadline', type=float, help="per-request deadline in seconds")
+    parser.add_argument('--socket', help="serve and query over a Unix socket at this path")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(f"{result['transport']}, {result['workers']} workers: {result['answered']}/{result['requests']} answered "
+          f"in {result['time']:.2f} s, {result['throughput']:.0f} requests/s")
+    print(f"latency p50 {result['p50'] * 1000:.2f} ms, p99 {result['p99'] * 1000:.2f} ms, "
+          f"max {result['max'] * 1000:.2f} ms")
+    print(f"searches {result['service']['searches']}, coalesced {result['service']['coalesced']}, "
+          f"busy {result['errors']['busy']}, deadline {result['errors']['deadline']}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Parity of the search strategies against plain A* on seeded random maps.
+
+Every optimal strategy must find a path exactly when A* does, at the same cost, and
+every path must be a legal walk: adjacent free cells from start to goal that never cut
+the corner of a blocked cell. Some queries end on a blocked goal, which has no path.
+"""
+
+import random
+
+import pytest
+
+from classes.Map import Map
+from classes.PathFinder import PathFinder
+
+OPTIMAL_STRATEGIES = ('jps', 'bidirectional', 'incremental', 'anytime')
+MODES = {'manhattan': False, 'diagonal': True}
+MAPS = 150  # random maps per strategy and movement mode
+QUERIES = 4  # queries per map
+
+
+def random_map(rng, costs=False):
+    """
+    Build a small map with a random obstacle density, and random cell costs if asked.
+
+    :param rng: The random.Random to draw from.
+    :param costs: If True, give every cell a cost between 1 and 5.
+    :return: The Map.
+    """
+    width, height = rng.randint(2, 30), rng.randint(2, 30)
+    map = Map(width, height)
+    density = rng.random() * 0.45
+    for y in range(height):
+        for x in range(width):
+            if rng.random() < density:
+                map.set_obstacle(x, y)
+            if costs:
+                map.set_cost(x, y, rng.choice((1, 1, 2, 5)))
+    return map
+
+
+def random_queries(rng, map, count=QUERIES):
+    """
+    Draw (start, goal) node pairs with a free start; the goal may be blocked.
+
+    :param rng: The random.Random to draw from.
+    :param map: The Map to draw cells from.
+    :param count: Number of queries.
+    :return: List of (start node, goal node) tuples.
+    """
+    free = [index for index in range(map.size) if not map.obstacles[index]]
+    queries = []
+    for _ in range(count):
+        if not free:
+            break
+        start = rng.choice(free)
+        goal = rng.randrange(map.size) if rng.random() < 0.2 else rng.choice(free)
+        queries.append((map.node_at(start), map.node_at(goal)))
+    return queries
+
+
+def assert_legal(map, path, start, goal, allow_diagonal):
+    """
+    Check that a path is a legal walk from start to goal on the map.
+    """
+    cells = path.get_path()
+    assert cells[0] == (start.x, start.y)
+    assert cells[-1] == (goal.x, goal.y)
+    for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+        dx, dy = abs(x1 - x0), abs(y1 - y0)
+        assert max(dx, dy) == 1
+        assert not map.is_blocked(x1, y1)
+        if dx and dy:
+            assert allow_diagonal
+            assert not map.is_blocked(x1, y0) and not map.is_blocked(x0, y1)
+
+
+def check_parity(strategy, allow_diagonal, seed, costs=False):
+    """
+    Compare a strategy with A* on random maps, failing on the first difference.
+    """
+    rng = random.Random(seed)
+    for _ in range(MAPS):
+        map = random_map(rng, costs)
+        reference = PathFinder(map, allow_diagonal)
+        path_finder = PathFinder(map, allow_diagonal, strategy)
+        for start, goal in random_queries(rng, map):
+            expected = reference.search(start, goal)
+            path = path_finder.search(start, goal)
+            query = f"{strategy} on {map.width}x{map.height} from {start} to {goal}"
+            assert bool(path.nodes) == bool(expected.nodes), query
+            if expected.nodes:
+                assert path.cost == pytest.approx(expected.cost), query
+                assert_legal(map, path, start, goal, allow_diagonal)
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('strategy', OPTIMAL_STRATEGIES)
+def test_strategy_matches_astar(strategy, mode):
+    check_parity(strategy, MODES[mode], seed=1)
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('strategy', ('bidirectional', 'incremental', 'anytime'))
+def test_strategy_matches_astar_with_costs(strategy, mode):
+    check_parity(strategy, MODES[mode], seed=2, costs=True)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_astar_paths_are_legal(mode):
+    allow_diagonal = MODES[mode]
+    rng = random.Random(3)
+    for _ in range(MAPS):
+        map = random_map(rng)
+        path_finder = PathFinder(map, allow_diagonal)
+        for start, goal in random_queries(rng, map):
+            path = path_finder.search(start, goal)
+            if path.nodes:
+                assert_legal(map, path, start, goal, allow_diagonal)
+            if map.is_blocked(goal.x, goal.y) and (start.x, start.y) != (goal.x, goal.y):
+                assert not path.nodes
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_incremental_matches_astar_after_edits(mode):
+    allow_diagonal = MODES[mode]
+    rng = random.Random(4)
+    for _ in range(MAPS // 3):
+        map = random_map(rng)
+        queries = random_queries(rng, map, 1)
+        if not queries:
+            continue
+        start, goal = queries[0]
+        reference = PathFinder(map, allow_diagonal)
+        planner = PathFinder(map, allow_diagonal, 'incremental')
+        for _ in range(5):
+            path, expected = planner.search(start, goal), reference.search(start, goal)
+            assert bool(path.nodes) == bool(expected.nodes)
+            if expected.nodes:
+                assert path.cost == pytest.approx(expected.cost)
+                assert_legal(map, path, start, goal, allow_diagonal)
+            # Toggle a few cells away from the endpoints and replan
+            for _ in range(3):
+                x, y = rng.randrange(map.width), rng.randrange(map.height)
+                if (x, y) in ((start.x, start.y), (goal.x, goal.y)):
+                    continue
+                if map.is_blocked(x, y):
+                    map.clear_obstacle(x, y)
+                else:
+                    map.set_obstacle(x, y)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_hierarchical_finds_a_path_when_astar_does(mode):
+    allow_diagonal = MODES[mode]
+    rng = random.Random(5)
+    for _ in range(MAPS // 3):
+        map = random_map(rng)
+        reference = PathFinder(map, allow_diagonal)
+        path_finder = PathFinder(map, allow_diagonal, 'hierarchical')
+        for start, goal in random_queries(rng, map):
+            expected = reference.search(start, goal)
+            path = path_finder.search(start, goal)
+            assert bool(path.nodes) == bool(expected.nodes)
+            if expected.nodes:
+                assert path.cost >= expected.cost - 1e-9
+                assert_legal(map, path, start, goal, allow_diagonal)
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('strategy', OPTIMAL_STRATEGIES)
+def test_external_obstacle_bytes_other_than_one_block(strategy, mode):
+    # Any non-zero byte of an obstacle layer handed to Map is a blocked cell
+    obstacles = bytearray(30)
+    obstacles[15] = 2
+    map = Map(10, 3, obstacles=obstacles)
+    start, goal = map.get_node(0, 1), map.get_node(9, 1)
+    expected = PathFinder(map, MODES[mode]).search(start, goal)
+    path = PathFinder(map, MODES[mode], strategy).search(start, goal)
+    assert (5, 1) not in path.get_path()
+    assert path.cost == pytest.approx(expected.cost)
+    assert_legal(map, path, start, goal, MODES[mode])
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('strategy', OPTIMAL_STRATEGIES + ('hierarchical',))
+def test_search_may_leave_a_blocked_start(strategy, mode):
+    allow_diagonal = MODES[mode]
+    rng = random.Random(6)
+    for _ in range(MAPS // 3):
+        map = random_map(rng)
+        blocked = [index for index in range(map.size) if map.obstacles[index]]
+        free = [index for index in range(map.size) if not map.obstacles[index]]
+        if not blocked or not free:
+            continue
+        reference = PathFinder(map, allow_diagonal)
+        path_finder = PathFinder(map, allow_diagonal, strategy, cluster_size=4)
+        for _ in range(QUERIES):
+            start, goal = map.node_at(rng.choice(blocked)), map.node_at(rng.choice(free))
+            expected = reference.search(start, goal)
+            path = path_finder.search(start, goal)
+            assert bool(path.nodes) == bool(expected.nodes)
+            if expected.nodes and strategy != 'hierarchical':
+                assert path.cost == pytest.approx(expected.cost)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_budgeted_astar_returns_the_best_path_so_far(mode):
+    # Once the goal has been generated, a search that runs out of budget still returns
+    # a path, within the bound it reports of the optimum
+    allow_diagonal = MODES[mode]
+    rng = random.Random(7)
+    returned = 0
+    for _ in range(MAPS):
+        map = random_map(rng)
+        reference = PathFinder(map, allow_diagonal)
+        for start, goal in random_queries(rng, map):
+            expected = reference.search(start, goal)
+            for budget in (5, 20):
+                path = PathFinder(map, allow_diagonal, max_expansions=budget).search(start, goal)
+                if path.nodes:
+                    returned += 1
+                    assert expected.nodes
+                    assert expected.cost - 1e-9 <= path.cost <= expected.cost * path.bound + 1e-9
+                    assert_legal(map, path, start, goal, allow_diagonal)
+    assert returned
+
+
+def test_budgeted_astar_returns_a_generated_goal():
+    # The goal is next to the start but expensive to enter, so A* generates it at once
+    # and then spends its budget on the cheap cells around it
+    map = Map(10, 10)
+    map.set_cost(0, 1, 50)
+    start, goal = map.get_node(1, 1), map.get_node(0, 1)
+    path = PathFinder(map, False, max_expansions=5).search(start, goal)
+    assert path.get_path() == [(1, 1), (0, 1)]
+    assert path.cost == 50
+    assert 1 <= path.bound < float('inf')
@@ -0,0 +1,59 @@
+"""
+Invalidation of cached paths when the map changes.
+"""
+
+from classes.Map import Map
+from classes.PathFinder import PathFinder
+from classes.PathSmoother import PathSmoother
+
+
+def test_blocking_a_cell_drops_paths_through_it():
+    map = Map(6, 4)
+    path_finder = PathFinder(map, True, cache_size=16)
+    start, goal = map.get_node(0, 0), map.get_node(5, 0)
+    path = path_finder.search(start, goal)
+    assert path_finder.search(start, goal) is path
+    map.set_obstacle(2, 0)
+    assert path_finder.search(start, goal) is not path
+
+
+def test_blocking_a_corner_of_a_smoothed_segment_drops_it():
+    # The line from (0, 0) to (3, 1) passes through the corner shared by (1, 0) and
+    # (1, 1), so blocking either cell breaks its line of sight
+    map = Map(5, 3)
+    path_finder = PathFinder(map, True, cache_size=16, path_format='smooth')
+    start, goal = map.get_node(0, 0), map.get_node(3, 1)
+    path = path_finder.search(start, goal)
+    assert path.get_waypoints() == [(0, 0), (3, 1)]
+    map.set_obstacle(1, 1)
+    path = path_finder.search(start, goal)
+    smoother = PathSmoother(map)
+    waypoints = path.waypoints
+    assert all(smoother.crossing_cost(a, b) is not None for a, b in zip(waypoints, waypoints[1:]))
+
+
+def test_discarded_caches_and_planners_stop_listening():
+    import gc
+    map = Map(8, 8)
+    start, goal = map.get_node(0, 0), map.get_node(7, 7)
+    for strategy in ('astar', 'incremental', 'hierarchical'):
+        PathFinder(map, False, strategy, cache_size=8).search(start, goal)
+    gc.collect()
+    assert not map._listeners
+    path_finder = PathFinder(map, False, 'incremental', cache_size=8)
+    path_finder.search(start, goal)
+    path_finder.close()
+    assert not map._listeners
+
+
+def test_stepped_searches_only_share_astar_results():
+    map = Map(40, 40)
+    for y in range(35):
+        map.set_obstacle(20, y)
+    path_finder = PathFinder(map, True, 'hierarchical', cache_size=16, cluster_size=8)
+    start, goal = map.get_node(0, 0), map.get_node(39, 0)
+    hierarchical = path_finder.search(start, goal)
+    stepped = list(path_finder.search_steps(start, goal))[-1].path
+    assert stepped is not hierarchical and stepped.optimal
+    assert path_finder.search(start, goal) is hierarchical
+    assert list(path_finder.search_steps(start, goal))[-1].path is stepped